@@ -6,6 +6,8 @@ import os
 from dotenv import load_dotenv
 import time
 
+from frontend import api
+
 # Load environment variables
 load_dotenv()
 
@@ -541,14 +543,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Check if backend is running
-def check_backend():
-    try:
-        response = requests.get('http://localhost:8000/api/health', timeout=2)
-        return response.status_code == 200
-    except:
-        return False
-
-if not check_backend():
+if not api.check_backend():
     st.error("""
         ⚠️ Backend server is not running. Please start it first:
         1. Open a new terminal
@@ -556,6 +551,9 @@ if not check_backend():
     """)
     st.stop()
 
+# Load every panel's data concurrently (cached between reruns, invalidated after changes)
+dashboard = api.fetch_dashboard()
+
 # Helper function to format file size
 def format_file_size(size_bytes):
     if size_bytes is None:
@@ -577,9 +575,8 @@ with people_tab:
         Automatically detected people from your chat histories. Each profile is built from the names found in your uploaded chats.
     """)
     try:
-        response = requests.get('http://localhost:8000/api/people')
-        if response.status_code == 200:
-            people = response.json()
+        people, error = dashboard['people']
+        if error is None:
             if people:
                 for person in people:
                     with st.container():
@@ -600,10 +597,10 @@ with people_tab:
                         with col2:
                             if st.button("🗑️", key=f"delete_person_{person['id']}", help="Delete person"):
                                 try:
-                                    delete_response = requests.delete(f'http://localhost:8000/api/people/{person["id"]}')
+                                    delete_response = api.delete_person(person["id"])
                                     if delete_response.status_code == 200:
                                         st.success("Person deleted!")
-                                        st.experimental_rerun()
+                                        st.rerun()
                                     else:
                                         st.error("Error deleting person")
                                 except Exception as e:
@@ -611,7 +608,7 @@ with people_tab:
             else:
                 st.info("No people detected yet. Upload a chat file to get started!")
         else:
-            st.error("Error loading people profiles.")
+            st.error(f"Error loading people profiles: {error}")
     except Exception as e:
         st.error(f"Error loading people: {str(e)}")
 
@@ -622,43 +619,23 @@ with tab1:
         Support for WhatsApp, iMessage, and other messenger exports.
     """)
 
-    uploaded_file = st.file_uploader("Choose a chat history file", type=['txt'], help="Upload your exported chat files here")
+    uploaded_file = st.file_uploader("Choose a chat history file", type=['txt', 'zip'], help="Upload your exported chat files here (.txt, or a WhatsApp .zip export with media)")
 
     if uploaded_file is not None:
         if st.button("🧵 Weave Memories", type="primary"):
             with st.spinner("Weaving your memories into the tapestry..."):
                 try:
                     # Send file to backend
-                    files = {'file': uploaded_file}
-                    response = requests.post('http://localhost:8000/api/upload-chat', files=files, timeout=30)
+                    response = api.upload_chat(uploaded_file)
                     
                     if response.status_code == 200:
                         data = response.json()
                         st.session_state['chat_uploaded'] = True
                         st.session_state['metadata'] = data['metadata']
                         st.session_state['files_refresh'] += 1
-                        st.success("✨ Memories successfully woven into your tapestry!")
-                        
-                        # Display metadata
-                        st.markdown("""
-                            <div class="memory-analysis-card">
-                                <h3>🧠 Memory Analysis</h3>
-                                <div class="memory-analysis-details">
-                        """, unsafe_allow_html=True)
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Total Messages", st.session_state['metadata']['total_messages'])
-                            if st.session_state['metadata']['date_range']['start']:
-                                st.write("Date Range:", 
-                                       st.session_state['metadata']['date_range']['start'].split('T')[0],
-                                       "to",
-                                       st.session_state['metadata']['date_range']['end'].split('T')[0])
-                        with col2:
-                            st.write("Participants:", ", ".join(st.session_state['metadata']['participants']))
-                        st.markdown("""
-                                </div>
-                            </div>
-                        """, unsafe_allow_html=True)
+                        # Rerun so the stats and file panels are fetched after the upload
+                        st.session_state['upload_succeeded'] = True
+                        st.rerun()
                     else:
                         st.error(f"Error weaving memories: {response.text}")
                 except requests.exceptions.Timeout:
@@ -668,6 +645,30 @@ with tab1:
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
 
+    if st.session_state.pop('upload_succeeded', False):
+        st.success("✨ Memories successfully woven into your tapestry!")
+
+        # Display metadata
+        st.markdown("""
+            <div class="memory-analysis-card">
+                <h3>🧠 Memory Analysis</h3>
+                <div class="memory-analysis-details">
+        """, unsafe_allow_html=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total Messages", st.session_state['metadata']['total_messages'])
+            if st.session_state['metadata']['date_range']['start']:
+                st.write("Date Range:", 
+                       st.session_state['metadata']['date_range']['start'].split('T')[0],
+                       "to",
+                       st.session_state['metadata']['date_range']['end'].split('T')[0])
+        with col2:
+            st.write("Participants:", ", ".join(st.session_state['metadata']['participants']))
+        st.markdown("""
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+
 with tab2:
     st.header("Manage Your Memory Files")
     st.markdown("""
@@ -676,9 +677,8 @@ with tab2:
     
     # Display stats
     try:
-        stats_response = requests.get('http://localhost:8000/api/stats')
-        if stats_response.status_code == 200:
-            stats = stats_response.json()
+        stats, error = dashboard['stats']
+        if error is None:
             st.markdown(f"""
                 <div class="stats-card">
                     <h4>🧵 Your Memory Tapestry</h4>
@@ -692,9 +692,8 @@ with tab2:
     
     # Display uploaded files
     try:
-        response = requests.get('http://localhost:8000/api/chat-files')
-        if response.status_code == 200:
-            chat_files = response.json()
+        chat_files, error = dashboard['chat_files']
+        if error is None:
             if chat_files:
                 st.subheader("Your Memory Files")
                 for file in chat_files:
@@ -723,7 +722,7 @@ with tab2:
                         with col2:
                             if st.button("🗑️", key=f"delete_file_{file['id']}", help="Remove from tapestry"):
                                 try:
-                                    delete_response = requests.delete(f'http://localhost:8000/api/chat-files/{file["id"]}')
+                                    delete_response = api.delete_chat_file(file["id"])
                                     if delete_response.status_code == 200:
                                         st.success("Memory file removed from tapestry!")
                                         st.session_state['files_refresh'] += 1
@@ -735,7 +734,7 @@ with tab2:
             else:
                 st.info("No memory files yet. Upload your first file in the 'Upload Memories' tab to start weaving your tapestry!")
         else:
-            st.error("Error loading memory files")
+            st.error(f"Error loading memory files: {error}")
     except Exception as e:
         st.error(f"Error loading memory files: {str(e)}")
 
@@ -757,12 +756,7 @@ with tab3:
         if st.form_submit_button("🧵 Weave Note", type="primary"):
             if note_title and note_content:
                 try:
-                    response = requests.post('http://localhost:8000/api/notes', 
-                                           json={
-                                               "title": note_title,
-                                               "content": note_content,
-                                               "category": note_category if note_category else None
-                                           })
+                    response = api.create_note(note_title, note_content, note_category if note_category else None)
                     if response.status_code == 200:
                         st.success("✨ Note woven into your tapestry!")
                         st.session_state['notes_refresh'] += 1
@@ -777,9 +771,8 @@ with tab3:
     # Display existing notes
     st.subheader("Your Woven Notes")
     try:
-        response = requests.get('http://localhost:8000/api/notes')
-        if response.status_code == 200:
-            notes = response.json()
+        notes, error = dashboard['notes']
+        if error is None:
             if notes:
                 for note in notes:
                     with st.container():
@@ -796,7 +789,7 @@ with tab3:
                         with col2:
                             if st.button("🗑️", key=f"delete_note_{note['id']}", help="Remove note"):
                                 try:
-                                    delete_response = requests.delete(f'http://localhost:8000/api/notes/{note["id"]}')
+                                    delete_response = api.delete_note(note["id"])
                                     if delete_response.status_code == 200:
                                         st.success("Note removed!")
                                         st.rerun()
@@ -807,7 +800,7 @@ with tab3:
             else:
                 st.info("No notes woven yet. Add your first note above to start building your tapestry of insights!")
         else:
-            st.error("Error loading notes")
+            st.error(f"Error loading notes: {error}")
     except Exception as e:
         st.error(f"Error loading notes: {str(e)}")
 
@@ -828,11 +821,7 @@ with tab4:
             with st.spinner("Weaving your memories into a personalized recommendation..."):
                 try:
                     # Send question to backend
-                    response = requests.post(
-                        'http://localhost:8000/api/get-recommendation',
-                        json={'question': question},
-                        timeout=30
-                    )
+                    response = api.get_recommendation(question)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -0,0 +1,277 @@
+"""
+Offline bulk import of chat exports (.txt or WhatsApp .zip) from a directory or glob.
+
+Files are parsed in a process pool and written through the bulk storage path, many files
+per transaction. A manifest of content hashes makes interrupted imports resumable.
+
+Usage:
+    python -m app.bulk_import ~/exports --workers 8 --batch-size 50
+    python -m app.bulk_import "exports/**/*.txt" --manifest import_manifest.json
+    python -m app.bulk_import ~/exports --profile alice   # into the "alice" profile database
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List
+
+from app.utils.chat_processor import ChatProcessor
+from app.utils.uploads import UPLOAD_BLOCK_SIZE, ZIP_MAGIC, SpooledUpload, extract_transcripts
+
+EXPORT_EXTENSIONS = ('.txt', '.zip')
+DEFAULT_MANIFEST = os.path.expanduser("~/.perfect_partner_import_manifest.json")
+
+def find_exports(source: str) -> List[str]:
+    """
+    Expand a directory (searched recursively) or a glob pattern into export file paths
+    """
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, '**', '*'), recursive=True)
+    else:
+        paths = glob.glob(os.path.expanduser(source), recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(EXPORT_EXTENSIONS))
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(UPLOAD_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def file_signature(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def parse_export(path: str) -> Dict:
+    """
+    Hash and parse one export file. Runs in a worker process, so it touches no database state.
+    """
+    processor = ChatProcessor()
+    with open(path, 'rb') as f:
+        is_archive = f.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+
+    transcripts = []
+    if is_archive:
+        archive = SpooledUpload(path, os.path.basename(path), os.path.getsize(path), None, is_archive=True)
+        spooled, _ = extract_transcripts(archive)
+        try:
+            for transcript in spooled:
+                transcripts.append({
+                    "filename": transcript.filename,
+                    "file_size": transcript.size,
+                    "content_hash": transcript.content_hash,
+                    "processed": processor.process_chat(processor.read_export(transcript.path)),
+                })
+        finally:
+            for transcript in spooled:
+                transcript.cleanup()
+    else:
+        transcripts.append({
+            "filename": os.path.basename(path),
+            "file_size": os.path.getsize(path),
+            "content_hash": file_hash(path),
+            "processed": processor.process_chat(processor.read_export(path)),
+        })
+
+    return {"path": path, "bytes": os.path.getsize(path), "transcripts": transcripts}
+
+class ImportManifest:
+    """
+    JSON manifest of imported content hashes (and the path signatures that produced them)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.data = {"hashes": {}, "paths": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+
+    def has_hash(self, content_hash: str) -> bool:
+        return content_hash in self.data["hashes"]
+
+    def path_unchanged(self, path: str) -> bool:
+        entry = self.data["paths"].get(os.path.abspath(path))
+        return entry is not None and entry["signature"] == file_signature(path)
+
+    def record(self, path: str, content_hash: str, chat_file_id: int):
+        self.data["hashes"][content_hash] = {
+            "path": os.path.abspath(path),
+            "chat_file_id": chat_file_id,
+            "imported_at": datetime.utcnow().isoformat(),
+        }
+
+    def record_path(self, path: str):
+        self.data["paths"][os.path.abspath(path)] = {"signature": file_signature(path)}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+def run_import(paths: List[str], manifest: ImportManifest, workers: int, batch_size: int) -> Dict:
+    """
+    Parse `paths` in a process pool and store them, committing every `batch_size` files.
+    Participants come from parsed message senders; no LLM calls are made.
+    """
+    from app.models.database import ChatFile, init_db, open_session
+    from app.services.llm_provider import DisabledLLMProvider
+    from app.services.memory_service import MemoryService, parsed_senders
+
+    init_db()
+    db = open_session()
+    # Storing parsed chats needs no LLM, so no backend (or API key) is set up
+    service = MemoryService(db, llm=DisabledLLMProvider())
+    known_hashes = {h for (h,) in db.query(ChatFile.content_hash).filter(ChatFile.content_hash.isnot(None))}
+
+    pending = [p for p in paths if not manifest.path_unchanged(p)]
+    skipped_paths = len(paths) - len(pending)
+    totals = {"files": 0, "transcripts": 0, "skipped": skipped_paths, "bytes": 0, "chunks": 0, "failed": 0}
+    batch_paths = []
+    batch_records = []  # (path, content_hash, chat_file_id) applied to the manifest on commit
+    batch_totals = {"transcripts": 0, "chunks": 0, "bytes": 0}  # taken back out of totals on rollback
+    start = time.perf_counter()
+
+    def report():
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(
+            f"📦 {totals['files'] + totals['failed']}/{len(pending)} files | "
+            f"{totals['bytes'] / 1e6 / elapsed:.2f} MB/s | "
+            f"{totals['chunks'] / elapsed:.0f} chunks/s | "
+            f"{totals['skipped']} skipped, {totals['failed']} failed",
+            flush=True
+        )
+
+    def commit_batch():
+        db.commit()
+        for path, content_hash, chat_file_id in batch_records:
+            manifest.record(path, content_hash, chat_file_id)
+        for path in batch_paths:
+            manifest.record_path(path)
+        manifest.save()
+        batch_paths.clear()
+        batch_records.clear()
+        batch_totals.update(dict.fromkeys(batch_totals, 0))
+
+    def rollback_batch():
+        db.rollback()
+        for _, content_hash, _ in batch_records:
+            known_hashes.discard(content_hash)
+        totals["failed"] += len(batch_paths)
+        totals["files"] -= len(batch_paths)
+        for key, value in batch_totals.items():
+            totals[key] -= value
+        print(f"⚠️ Rolled back {len(batch_paths)} files in the current batch; they will be retried on the next run", file=sys.stderr)
+        batch_paths.clear()
+        batch_records.clear()
+        batch_totals.update(dict.fromkeys(batch_totals, 0))
+
+    def count(key: str, value: int):
+        totals[key] += value
+        batch_totals[key] += value
+
+    def store(result: Dict):
+        for transcript in result["transcripts"]:
+            content_hash = transcript["content_hash"]
+            if manifest.has_hash(content_hash) or content_hash in known_hashes:
+                totals["skipped"] += 1
+                continue
+            processed = transcript["processed"]
+            metadata = service.store_processed_chat(
+                processed,
+                parsed_senders(processed),
+                filename=transcript["filename"],
+                file_size=transcript["file_size"],
+                content_hash=content_hash,
+                commit=False
+            )
+            batch_records.append((result["path"], content_hash, metadata["chat_file_id"]))
+            known_hashes.add(content_hash)
+            count("transcripts", 1)
+            count("chunks", len(processed["chunks"]))
+        totals["files"] += 1
+        count("bytes", result["bytes"])
+        batch_paths.append(result["path"])
+
+    print(f"🔎 {len(paths)} export files found, {skipped_paths} unchanged since the last import")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            queue = iter(pending)
+            in_flight = {}
+            # Keep a bounded window of files in flight so parsed results don't pile up in memory
+            for path in queue:
+                in_flight[pool.submit(parse_export, path)] = path
+                if len(in_flight) >= workers * 2:
+                    break
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        totals["failed"] += 1
+                        print(f"⚠️ Failed to parse {path}: {e}", file=sys.stderr)
+                        result = None
+                    if result:
+                        try:
+                            store(result)
+                        except Exception as e:
+                            print(f"⚠️ Failed to store {path}: {e}", file=sys.stderr)
+                            rollback_batch()
+                            totals["failed"] += 1
+                    if len(batch_paths) >= batch_size:
+                        commit_batch()
+                    report()
+                    next_path = next(queue, None)
+                    if next_path:
+                        in_flight[pool.submit(parse_export, next_path)] = next_path
+        commit_batch()
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    totals["seconds"] = round(elapsed, 2)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import chat exports into Perfect Partner")
+    parser.add_argument("source", help="directory (searched recursively) or glob of .txt/.zip exports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parser processes")
+    parser.add_argument("--batch-size", type=int, default=50, help="files per database transaction")
+    parser.add_argument("--manifest", default=None, help="resume manifest of imported content hashes")
+    parser.add_argument("--profile", default=None, help="import into this profile's database (as X-Profile-Id)")
+    args = parser.parse_args()
+
+    manifest_path = args.manifest or DEFAULT_MANIFEST
+    if args.profile:
+        from app.models.database import TENANT_ID_RE, current_tenant
+
+        if not TENANT_ID_RE.fullmatch(args.profile):
+            print("Profile ids are 1-64 letters, digits, '-' or '_'")
+            sys.exit(1)
+        current_tenant.set(args.profile)
+        # Imported hashes are per database, so each profile resumes from its own manifest
+        if args.manifest is None:
+            manifest_path = DEFAULT_MANIFEST.replace(".json", f".{args.profile}.json")
+
+    paths = find_exports(args.source)
+    if not paths:
+        print(f"No .txt or .zip exports found for {args.source}")
+        sys.exit(1)
+
+    manifest = ImportManifest(manifest_path)
+    totals = run_import(paths, manifest, args.workers, args.batch_size)
+    print(
+        f"✅ Imported {totals['transcripts']} transcripts from {totals['files']} files "
+        f"({totals['bytes'] / 1e6:.1f} MB, {totals['chunks']} chunks) in {totals['seconds']}s; "
+        f"{totals['skipped']} skipped, {totals['failed']} failed"
+    )
+
+if __name__ == "__main__":
+    main()
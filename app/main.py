@@ -1,20 +1,48 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Response, BackgroundTasks
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import google.generativeai as genai
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+import asyncio
 import os
+import time
+import zipfile
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
 from sqlalchemy.orm import Session
 
-from app.models.database import get_db, ChatMemory, Person
-from app.services.memory_service import MemoryService
+from app.models.database import get_db, init_db, open_session
+from app.services.cold_storage import compact_cold_memories
+from app.services.maintenance import ACTIVITY, MAINTENANCE, MAINTENANCE_ENABLED, ActivityMiddleware
+from app.services.memory_service import MemoryService, COMPACT_CONTEXT_MEMORIES, FULL_CONTEXT_MEMORIES
+from app.services.profile_service import refresh_stale_profiles
+from app.utils.concurrency import run_db, run_llm
+from app.utils.http_cache import conditional_get
+from app.utils.jobs import JOBS
+from app.utils.metrics import REQUEST_LATENCY, render_metrics, server_timing_header, start_request_timing
+from app.utils.responses import CompressionMiddleware, FastJSONResponse, dumps_line, json_response
+from app.utils.tenancy import TenantMiddleware
+from app.utils.uploads import SpooledUpload, UploadLimitMiddleware, UploadTooLarge, spool_upload
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation and migrations run at startup, not as a side effect of importing the app
+    await run_db(init_db)
+    maintenance = asyncio.create_task(MAINTENANCE.run()) if MAINTENANCE_ENABLED else None
+    yield
+    if maintenance:
+        maintenance.cancel()
+
 # Initialize FastAPI app
-app = FastAPI(title="Perfect Partner API")
+app = FastAPI(title="Perfect Partner API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+# Route requests with an X-Profile-Id header to that profile's own database
+app.add_middleware(TenantMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -25,8 +53,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Google Gemini
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Compress large JSON responses (streamed NDJSON is flushed line by line)
+app.add_middleware(CompressionMiddleware)
+
+# Background maintenance waits for a quiet period without user requests
+app.add_middleware(ActivityMiddleware)
+
+# Refuse oversized uploads before the multipart body is received and buffered
+app.add_middleware(UploadLimitMiddleware)
+
+# Emit a Server-Timing header with per-stage durations on every response
+ENABLE_TIMING_HEADER = os.getenv("ENABLE_TIMING_HEADER", "false").lower() in ("1", "true", "yes")
+# Items accepted per request by the batch endpoints
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "5000"))
+MAX_BATCH_QUESTIONS = int(os.getenv("MAX_BATCH_QUESTIONS", "100"))
+# Generations one batch recommendation request runs at once
+RECOMMENDATION_CONCURRENCY = int(os.getenv("RECOMMENDATION_CONCURRENCY", "4"))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = start_request_timing()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        route_path = route.path if route else "unmatched"
+        REQUEST_LATENCY.observe((request.method, route_path, str(status)), elapsed)
+    if ENABLE_TIMING_HEADER:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
 
 class ChatMemorySchema(BaseModel):
     text: str
@@ -36,6 +95,9 @@ class ChatMemorySchema(BaseModel):
 class RecommendationRequest(BaseModel):
     question: str
 
+class RecommendationBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_QUESTIONS)
+
 class NoteRequest(BaseModel):
     title: str
     content: str
@@ -46,6 +108,45 @@ class NoteUpdateRequest(BaseModel):
     content: Optional[str] = None
     category: Optional[str] = None
 
+class NoteBatchRequest(BaseModel):
+    notes: List[NoteRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class NoteBatchUpdateItem(NoteUpdateRequest):
+    id: int
+
+class NoteBatchUpdateRequest(BaseModel):
+    notes: List[NoteBatchUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class MemoryRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+    timestamp: Optional[datetime] = None
+    person_id: Optional[int] = None
+    chat_file_id: Optional[int] = None
+
+class MemoryBatchRequest(BaseModel):
+    memories: List[MemoryRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class MemoryUpdateItem(BaseModel):
+    id: int
+    text: Optional[str] = Field(None, min_length=1)
+    timestamp: Optional[datetime] = None
+    person_id: Optional[int] = None
+
+class MemoryBatchUpdateRequest(BaseModel):
+    memories: List[MemoryUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+def batch_response(results: List[Dict]) -> FastJSONResponse:
+    """
+    Per-item results of a batch endpoint, in request order, with a count per status
+    """
+    return json_response({
+        "summary": dict(Counter(result["status"] for result in results)),
+        "results": [{"index": i, **result} for i, result in enumerate(results)]
+    })
+
 @app.get("/api/health")
 async def health_check():
     """
@@ -53,54 +154,142 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Endpoint and pipeline stage latency histograms in Prometheus text format
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def ingest_upload(db: Session, upload: SpooledUpload) -> Dict:
+    """
+    Process a spooled upload (a single transcript or a ZIP export) and build the upload response body
+    """
+    memory_service = MemoryService(db)
+    if upload.is_archive:
+        result = memory_service.process_and_store_archive(path=upload.path, filename=upload.filename)
+        if not result["files"]:
+            raise HTTPException(status_code=400, detail="No chat transcript (.txt) found in the archive")
+        return {
+            "message": f"Processed {len(result['files'])} chat transcript(s) from the archive",
+            "metadata": result["files"][0],
+            "files": result["files"],
+            "archive": result["archive"]
+        }
+
+    metadata = memory_service.process_and_store_chat_file(
+        path=upload.path,
+        filename=upload.filename,
+        file_size=upload.size,
+        content_hash=upload.content_hash
+    )
+    return {
+        "message": "Chat history uploaded and processed successfully",
+        "metadata": metadata
+    }
+
+def ingestion_error(e: Exception) -> HTTPException:
+    """
+    Map an ingestion failure onto the HTTP error reported for it
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, zipfile.BadZipFile):
+        return HTTPException(status_code=400, detail="Uploaded archive is not a valid ZIP file")
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, UnicodeDecodeError):
+        return HTTPException(status_code=400, detail="Chat transcripts must be UTF-8 encoded text")
+    return HTTPException(status_code=500, detail=str(e))
+
+@ACTIVITY.tracked
+def run_ingestion_job(job_id: str, upload: SpooledUpload):
+    """
+    Background ingestion for ?background=true uploads, in a session of its own; the outcome is
+    recorded on the job, then stale profiles are refreshed
+    """
+    JOBS.start(job_id)
+    db = open_session()
+    try:
+        with upload:
+            JOBS.succeed(job_id, ingest_upload(db, upload))
+    except Exception as e:
+        error = ingestion_error(e)
+        print(f"❌ Ingestion job {job_id} failed: {error.detail}")
+        JOBS.fail(job_id, error.detail, status_code=error.status_code)
+        return
+    finally:
+        db.close()
+    refresh_stale_profiles()
+
 @app.post("/api/upload-chat")
 async def upload_chat(
+    background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
+    background: bool = False,
     db: Session = Depends(get_db)
 ):
     """
-    Upload and process a chat history file
+    Upload and process a chat history file, or a ZIP export containing chat transcripts.
+    Profile summaries are refreshed in the background once the response is sent.
+    With background=true the upload is only spooled: the response is 202 with a job to poll
+    at /api/jobs/{job_id}, whose result is the usual upload response.
     """
     try:
-        content = await file.read()
-        text = content.decode('utf-8')
-        
-        memory_service = MemoryService(db)
-        metadata = memory_service.process_and_store_chat(
-            text=text,
-            filename=file.filename,
-            file_size=len(content)
-        )
-        
-        return {
-            "message": "Chat history uploaded and processed successfully",
-            "metadata": metadata
-        }
+        upload = await spool_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Chat export must be UTF-8 encoded text")
+
+    if background:
+        job = JOBS.create("ingest_chat")
+        background_tasks.add_task(run_llm, run_ingestion_job, job["id"], upload)
+        response.status_code = 202
+        return job
+
+    try:
+        with upload:
+            result = await run_llm(ingest_upload, db, upload)
+        background_tasks.add_task(run_llm, ACTIVITY.tracked(refresh_stale_profiles))
+        return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise ingestion_error(e)
 
-@app.get("/api/chat-files")
-async def get_chat_files(db: Session = Depends(get_db)):
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a background job; `result` is set once it succeeded, `error` once it failed
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/chat-files", dependencies=[Depends(conditional_get)])
+async def get_chat_files(response: Response, db: Session = Depends(get_db)):
     """
     Get all uploaded chat files
     """
     try:
         memory_service = MemoryService(db)
-        chat_files = memory_service.get_all_chat_files()
+        chat_files = await run_db(memory_service.get_all_chat_files)
         
-        return [
+        return json_response([
             {
                 "id": file.id,
                 "filename": file.filename,
                 "file_size": file.file_size,
                 "total_messages": file.total_messages,
                 "participants": file.participants,
-                "date_range_start": file.date_range_start.isoformat() if file.date_range_start else None,
-                "date_range_end": file.date_range_end.isoformat() if file.date_range_end else None,
-                "uploaded_at": file.uploaded_at.isoformat()
+                "date_range_start": file.date_range_start,
+                "date_range_end": file.date_range_end,
+                "attachment_count": file.attachment_count,
+                "uploaded_at": file.uploaded_at
             }
             for file in chat_files
-        ]
+        ], response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -111,7 +300,7 @@ async def delete_chat_file(file_id: int, db: Session = Depends(get_db)):
     """
     try:
         memory_service = MemoryService(db)
-        success = memory_service.delete_chat_file(file_id)
+        success = await run_db(memory_service.delete_chat_file, file_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="Chat file not found")
@@ -122,14 +311,14 @@ async def delete_chat_file(file_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/stats")
+@app.get("/api/stats", dependencies=[Depends(conditional_get)])
 async def get_stats(db: Session = Depends(get_db)):
     """
     Get statistics about the stored data
     """
     try:
         memory_service = MemoryService(db)
-        stats = memory_service.get_chat_file_stats()
+        stats = await run_db(memory_service.get_chat_file_stats)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -145,28 +334,76 @@ async def get_recommendation(
     try:
         memory_service = MemoryService(db)
         
-        # Find relevant memories and notes
-        memories = memory_service.find_relevant_memories(request.question)
-        notes = memory_service.find_relevant_notes(request.question)
+        # Profile summaries and indexed facts replace most raw chunks, so fewer memories are needed when they exist
+        profiles = await run_db(memory_service.get_profile_summaries)
+        facts = await run_db(memory_service.find_relevant_facts, request.question)
+        memories = await run_db(
+            memory_service.find_relevant_memories, request.question, COMPACT_CONTEXT_MEMORIES if profiles or facts else FULL_CONTEXT_MEMORIES
+        )
+        notes = await run_db(memory_service.find_relevant_notes, request.question)
         
-        if not memories and not notes:
+        if not memories and not notes and not facts:
             raise HTTPException(
                 status_code=404,
                 detail="No chat memories or notes found. Please upload a chat history or add some notes first."
             )
         
         # Generate recommendation
-        result = memory_service.generate_recommendation(request.question, memories, notes)
+        result = await run_llm(memory_service.generate_recommendation, request.question, memories, notes, profiles, facts)
         
-        return result
+        return json_response(result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/get-recommendations")
+async def get_recommendations(request: RecommendationBatchRequest, db: Session = Depends(get_db)):
+    """
+    Generate recommendations for many questions at once. Retrieval runs once for the whole batch,
+    generations run concurrently (up to RECOMMENDATION_CONCURRENCY at a time), and results are
+    streamed as NDJSON lines in completion order, each tagged with the question's index.
+    """
+    try:
+        memory_service = MemoryService(db)
+        contexts = await run_db(memory_service.retrieve_contexts, request.questions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    semaphore = asyncio.Semaphore(RECOMMENDATION_CONCURRENCY)
+
+    async def generate(index: int, question: str, context: Dict) -> Dict:
+        item = {"index": index, "question": question}
+        if not context["memories"] and not context["notes"] and not context["facts"]:
+            return {**item, "status": "not_found", "detail": "No chat memories or notes found. Please upload a chat history or add some notes first."}
+        try:
+            async with semaphore:
+                result = await run_llm(memory_service.generate_recommendation, question, **context)
+            return {**item, "status": "ok", "result": result}
+        except Exception as e:
+            return {**item, "status": "error", "detail": str(e)}
+
+    async def stream_results():
+        tasks = [
+            asyncio.ensure_future(generate(index, question, context))
+            for index, (question, context) in enumerate(zip(request.questions, contexts))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield dumps_line(await next_done)
+        finally:
+            # Client went away: don't start the generations still waiting for a slot
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @app.post("/api/notes")
 async def create_note(note: NoteRequest, db: Session = Depends(get_db)):
     try:
         memory_service = MemoryService(db)
-        created_note = memory_service.add_partner_note(
+        created_note = await run_db(
+            memory_service.add_partner_note,
             title=note.title,
             content=note.content,
             category=note.category
@@ -182,12 +419,55 @@ async def create_note(note: NoteRequest, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/notes")
-async def get_notes(db: Session = Depends(get_db)):
+@app.post("/api/notes/batch")
+async def create_notes(batch: NoteBatchRequest, db: Session = Depends(get_db)):
+    """
+    Create many notes in one transaction
+    """
     try:
         memory_service = MemoryService(db)
-        notes = memory_service.get_all_notes()
-        return [
+        notes = await run_db(memory_service.add_notes, [note.model_dump() for note in batch.notes])
+        return batch_response([{"status": "created", "id": note["id"], "note": note} for note in notes])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/api/notes/batch")
+async def update_notes(batch: NoteBatchUpdateRequest, db: Session = Depends(get_db)):
+    """
+    Update many notes in one transaction; items for missing notes come back as not_found
+    """
+    try:
+        memory_service = MemoryService(db)
+        notes = await run_db(memory_service.update_notes, [item.model_dump() for item in batch.notes])
+        return batch_response([
+            {"status": "updated", "id": note["id"], "note": note} if note else
+            {"status": "not_found", "id": item.id, "note": None}
+            for item, note in zip(batch.notes, notes)
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/notes/batch-delete")
+async def delete_notes(batch: BatchDeleteRequest, db: Session = Depends(get_db)):
+    """
+    Delete many notes in one transaction; ids of missing notes, and repeats of an id, come back as not_found
+    """
+    try:
+        memory_service = MemoryService(db)
+        deleted = await run_db(memory_service.delete_notes, batch.ids)
+        return batch_response([
+            {"status": "deleted" if found else "not_found", "id": note_id}
+            for note_id, found in zip(batch.ids, deleted)
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/notes", dependencies=[Depends(conditional_get)])
+async def get_notes(response: Response, db: Session = Depends(get_db)):
+    try:
+        memory_service = MemoryService(db)
+        notes = await run_db(memory_service.get_all_notes)
+        return json_response([
             {
                 "id": note.id,
                 "title": note.title,
@@ -197,7 +477,7 @@ async def get_notes(db: Session = Depends(get_db)):
                 "updated_at": note.updated_at
             }
             for note in notes
-        ]
+        ], response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -205,7 +485,8 @@ async def get_notes(db: Session = Depends(get_db)):
 async def update_note(note_id: int, note_update: NoteUpdateRequest, db: Session = Depends(get_db)):
     try:
         memory_service = MemoryService(db)
-        updated_note = memory_service.update_note(
+        updated_note = await run_db(
+            memory_service.update_note,
             note_id=note_id,
             title=note_update.title,
             content=note_update.content,
@@ -231,7 +512,7 @@ async def update_note(note_id: int, note_update: NoteUpdateRequest, db: Session
 async def delete_note(note_id: int, db: Session = Depends(get_db)):
     try:
         memory_service = MemoryService(db)
-        success = memory_service.delete_note(note_id)
+        success = await run_db(memory_service.delete_note, note_id)
         if not success:
             raise HTTPException(status_code=404, detail="Note not found")
         
@@ -241,31 +522,155 @@ async def delete_note(note_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/people")
-async def get_people(db: Session = Depends(get_db)):
+@app.get("/api/memories", dependencies=[Depends(conditional_get)])
+async def get_memories(
+    response: Response,
+    chat_file_id: Optional[int] = None,
+    person_id: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+):
+    """
+    Get stored chat memories, newest first, optionally filtered by chat file and person
+    """
+    try:
+        memory_service = MemoryService(db)
+        memories = await run_db(
+            memory_service.get_memories, chat_file_id=chat_file_id, person_id=person_id, limit=limit, offset=offset
+        )
+        return json_response([
+            {
+                "id": memory.id,
+                "chat_file_id": memory.chat_file_id,
+                "person_id": memory.person_id,
+                "text": memory.text,
+                "timestamp": memory.timestamp,
+                "ref_count": memory.ref_count,
+                "created_at": memory.created_at
+            }
+            for memory in memories
+        ], response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/memories/batch")
+async def create_memories(batch: MemoryBatchRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Store many memories in one transaction, deduplicated and indexed like uploaded chat chunks
+    """
+    try:
+        memory_service = MemoryService(db)
+        results = await run_db(memory_service.add_memories, [memory.model_dump() for memory in batch.memories])
+        background_tasks.add_task(run_llm, ACTIVITY.tracked(refresh_stale_profiles))
+        return batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/api/memories/batch")
+async def update_memories(batch: MemoryBatchUpdateRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Update the text, timestamp or person of many memories in one transaction, re-indexing changed text
+    """
+    try:
+        memory_service = MemoryService(db)
+        results = await run_db(memory_service.update_memories, [item.model_dump() for item in batch.memories])
+        background_tasks.add_task(run_llm, ACTIVITY.tracked(refresh_stale_profiles))
+        return batch_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/memories/batch-delete")
+async def delete_memories(batch: BatchDeleteRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Delete many memories and their index entries in one transaction; ids of missing memories,
+    and repeats of an id, come back as not_found
+    """
+    try:
+        memory_service = MemoryService(db)
+        deleted = await run_db(memory_service.delete_memories, batch.ids)
+        background_tasks.add_task(run_llm, ACTIVITY.tracked(refresh_stale_profiles))
+        return batch_response([
+            {"status": "deleted" if found else "not_found", "id": memory_id}
+            for memory_id, found in zip(batch.ids, deleted)
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/memories/compact")
+async def compact_memories(background_tasks: BackgroundTasks):
+    """
+    Schedule a background pass moving memories older than COLD_STORAGE_AGE_DAYS into the compressed cold tier
+    """
+    background_tasks.add_task(run_llm, ACTIVITY.tracked(compact_cold_memories))
+    return {"message": "Cold storage compaction scheduled"}
+
+@app.get("/api/maintenance")
+async def get_maintenance_status():
+    """
+    Background maintenance progress: pending and last steps per database, idle state and the last pass
+    """
+    return MAINTENANCE.status()
+
+@app.post("/api/maintenance/run")
+async def run_maintenance():
+    """
+    Start a maintenance pass at the next idle moment instead of waiting for MAINTENANCE_INTERVAL
+    """
+    MAINTENANCE.request_pass()
+    return {"message": "Maintenance pass scheduled"}
+
+@app.get("/api/facts", dependencies=[Depends(conditional_get)])
+async def get_facts(
+    response: Response,
+    fact_type: Optional[str] = None,
+    person_id: Optional[int] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    Get facts extracted from chat histories, optionally filtered by type and person
+    """
+    try:
+        memory_service = MemoryService(db)
+        facts = await run_db(
+            memory_service.get_facts,
+            fact_types=[fact_type] if fact_type else None,
+            person_id=person_id,
+            limit=limit
+        )
+        return json_response(facts, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/people", dependencies=[Depends(conditional_get)])
+async def get_people(response: Response, db: Session = Depends(get_db)):
     """
     Get all people/profiles
     """
     try:
         memory_service = MemoryService(db)
-        people = memory_service.get_all_people()
-        return people
+        people = await run_db(memory_service.get_all_people)
+        return json_response(people, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/people/refresh-profiles")
+async def refresh_profiles(background_tasks: BackgroundTasks):
+    """
+    Schedule a background refresh of every profile with chat memories newer than its summary
+    """
+    background_tasks.add_task(run_llm, ACTIVITY.tracked(refresh_stale_profiles))
+    return {"message": "Profile refresh scheduled"}
+
 @app.delete("/api/people/{person_id}")
 async def delete_person(person_id: int, db: Session = Depends(get_db)):
     """
     Delete a person and all their associated chat memories
     """
     try:
-        # Delete all memories associated with this person
-        db.query(ChatMemory).filter(ChatMemory.person_id == person_id).delete()
-        # Delete the person
-        person = db.query(Person).filter(Person.id == person_id).first()
-        if person:
-            db.delete(person)
-            db.commit()
+        memory_service = MemoryService(db)
+        if await run_db(memory_service.delete_person, person_id):
             return {"message": "Person and associated memories deleted successfully"}
         else:
             return {"message": "Person not found"}
@@ -1,17 +1,32 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, text
+from sqlalchemy import create_engine, event, Column, Integer, BigInteger, String, Float, DateTime, Text, LargeBinary, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
+import re
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Dict, List, Optional
 
-# Create SQLite database in the user's home directory
+# Create SQLite database in the user's home directory (DATABASE_URL overrides, e.g. for benchmarks)
 db_path = os.path.expanduser("~/perfect_partner.db")
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{db_path}")
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Per-profile databases (one SQLite file each, selected by the X-Profile-Id request header)
+TENANT_DB_DIR = os.path.expanduser(os.getenv("TENANT_DB_DIR", "~/perfect_partner_profiles"))
+# Profile engines kept open at once; the least recently used one is disposed beyond this
+TENANT_ENGINE_CACHE_SIZE = int(os.getenv("TENANT_ENGINE_CACHE_SIZE", "32"))
+TENANT_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Profile of the current request or job; None is the default database
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
 class ChatFile(Base):
     __tablename__ = "chat_files"
 
@@ -23,6 +38,8 @@ class ChatFile(Base):
     date_range_start = Column(DateTime, nullable=True)
     date_range_end = Column(DateTime, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the uploaded file
+    attachment_count = Column(Integer, nullable=True)  # Media placeholders dropped from the transcript
 
 class Person(Base):
     __tablename__ = "people"
@@ -33,7 +50,9 @@ class Person(Base):
     first_message_date = Column(DateTime, nullable=True)
     last_message_date = Column(DateTime, nullable=True)
     message_count = Column(Integer, default=0)
-    profile_notes = Column(Text, nullable=True)
+    profile_notes = Column(Text, nullable=True)  # JSON profile summary (interests, preferences, dates, dislikes)
+    profile_memory_id = Column(Integer, nullable=True)  # Last ChatMemory folded into profile_notes
+    profile_updated_at = Column(DateTime, nullable=True)
 
 class ChatMemory(Base):
     __tablename__ = "chat_memories"
@@ -46,6 +65,46 @@ class ChatMemory(Base):
     embedding = Column(Text, nullable=True)  # Store embedding as JSON string
     relevance_score = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    minhash = Column(LargeBinary, nullable=True)  # MinHash signature used for near-duplicate detection
+    ref_count = Column(Integer, default=1)  # Chunks (across all files) collapsed into this memory
+    compressed_text = Column(LargeBinary, nullable=True)  # Cold tier: deflated text (text is then empty)
+    text_dict_id = Column(Integer, nullable=True)  # TextDictionary compressed_text was deflated with; NULL while hot
+
+class MemoryBand(Base):
+    __tablename__ = "chat_memory_bands"
+
+    id = Column(Integer, primary_key=True)
+    memory_id = Column(Integer, nullable=False, index=True)  # Reference to ChatMemory
+    bucket = Column(BigInteger, nullable=False, index=True)  # LSH band bucket key
+
+class MemoryReference(Base):
+    __tablename__ = "chat_memory_refs"
+
+    id = Column(Integer, primary_key=True)
+    memory_id = Column(Integer, nullable=False, index=True)  # Canonical ChatMemory
+    chat_file_id = Column(Integer, nullable=False, index=True)  # Another file containing a duplicate of it
+    occurrences = Column(Integer, default=1)
+
+class Fact(Base):
+    __tablename__ = "facts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    memory_id = Column(Integer, nullable=False, index=True)  # ChatMemory the fact was extracted from
+    person_id = Column(Integer, nullable=True, index=True)  # Person who mentioned it
+    fact_type = Column(String(32), nullable=False, index=True)  # date, place, product, like, dislike
+    label = Column(String(64), nullable=True)  # e.g. "birthday" for dates
+    value = Column(String(255), nullable=False)
+    value_key = Column(String(255), nullable=False, index=True)  # Lowercased value for lookups
+    mention_count = Column(Integer, default=1)  # Mentions within the chat file
+    mentioned_at = Column(DateTime, nullable=True)  # Latest mention within the chat file
+
+class TextDictionary(Base):
+    __tablename__ = "text_dictionaries"
+
+    id = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # zlib preset dictionary trained on cold memory texts
+    sample_count = Column(Integer, nullable=True)  # Memories it was trained on
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class PartnerNote(Base):
     __tablename__ = "partner_notes"
@@ -57,12 +116,20 @@ class PartnerNote(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-def migrate_database():
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)  # Bumped by every committed write
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+def migrate_database(bind: Engine = None):
     """
     Handle database migrations for schema changes
     """
+    bind = bind or engine
     try:
-        with engine.connect() as conn:
+        with bind.connect() as conn:
             # Check if chat_file_id and person_id columns exist in chat_memories table
             result = conn.execute(text("PRAGMA table_info(chat_memories)"))
             columns = [row[1] for row in result.fetchall()]
@@ -74,21 +141,204 @@ def migrate_database():
                 conn.execute(text("ALTER TABLE chat_memories ADD COLUMN person_id INTEGER"))
                 conn.commit()
                 print("✅ Database migration: Added person_id column to chat_memories table")
+            if 'minhash' not in columns:
+                conn.execute(text("ALTER TABLE chat_memories ADD COLUMN minhash BLOB"))
+                conn.commit()
+                print("✅ Database migration: Added minhash column to chat_memories table")
+            if 'ref_count' not in columns:
+                conn.execute(text("ALTER TABLE chat_memories ADD COLUMN ref_count INTEGER DEFAULT 1"))
+                conn.commit()
+                print("✅ Database migration: Added ref_count column to chat_memories table")
+            if 'compressed_text' not in columns:
+                conn.execute(text("ALTER TABLE chat_memories ADD COLUMN compressed_text BLOB"))
+                conn.commit()
+                print("✅ Database migration: Added compressed_text column to chat_memories table")
+            if 'text_dict_id' not in columns:
+                conn.execute(text("ALTER TABLE chat_memories ADD COLUMN text_dict_id INTEGER"))
+                conn.commit()
+                print("✅ Database migration: Added text_dict_id column to chat_memories table")
+            result = conn.execute(text("PRAGMA table_info(chat_files)"))
+            file_columns = [row[1] for row in result.fetchall()]
+            if 'content_hash' not in file_columns:
+                conn.execute(text("ALTER TABLE chat_files ADD COLUMN content_hash VARCHAR(64)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chat_files_content_hash ON chat_files (content_hash)"))
+                conn.commit()
+                print("✅ Database migration: Added content_hash column to chat_files table")
+            if 'attachment_count' not in file_columns:
+                conn.execute(text("ALTER TABLE chat_files ADD COLUMN attachment_count INTEGER"))
+                conn.commit()
+                print("✅ Database migration: Added attachment_count column to chat_files table")
             # Check if people table exists
             result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='people'"))
             if not result.fetchone():
                 # Create the people table
-                Base.metadata.tables['people'].create(bind=engine)
+                Base.metadata.tables['people'].create(bind=bind)
                 print("✅ Database migration: Created people table")
+            result = conn.execute(text("PRAGMA table_info(people)"))
+            people_columns = [row[1] for row in result.fetchall()]
+            if 'profile_memory_id' not in people_columns:
+                conn.execute(text("ALTER TABLE people ADD COLUMN profile_memory_id INTEGER"))
+                conn.commit()
+                print("✅ Database migration: Added profile_memory_id column to people table")
+            if 'profile_updated_at' not in people_columns:
+                conn.execute(text("ALTER TABLE people ADD COLUMN profile_updated_at DATETIME"))
+                conn.commit()
+                print("✅ Database migration: Added profile_updated_at column to people table")
+            # Seed the single data version row
+            conn.execute(
+                text("INSERT INTO data_version (id, version, updated_at) SELECT 1, 1, :now WHERE NOT EXISTS (SELECT 1 FROM data_version)"),
+                {"now": datetime.utcnow()}
+            )
+            conn.commit()
     except Exception as e:
         print(f"⚠️ Database migration warning: {e}")
 
-# Create tables and run migrations
-Base.metadata.create_all(bind=engine)
-migrate_database()
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# Registered on the Engine class so every profile database is covered
+@event.listens_for(Engine, "after_cursor_execute")
+def _mark_pending_write(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS) and "data_version" not in statement:
+        conn.info["pending_write"] = True
+
+@event.listens_for(Engine, "rollback")
+def _clear_pending_write(conn):
+    conn.info.pop("pending_write", None)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _bump_data_version(session):
+    """
+    Bump the data version in the same transaction as any write, so HTTP caches can validate against it
+    """
+    if not session.in_transaction():
+        return
+    session.flush()
+    conn = session.connection()
+    if conn.info.pop("pending_write", False):
+        conn.execute(
+            text("UPDATE data_version SET version = version + 1, updated_at = :now WHERE id = 1"),
+            {"now": datetime.utcnow()}
+        )
+        session.info["data_version_bumped"] = True
+
+def get_data_version(db) -> tuple:
+    """
+    Current (version, updated_at) of the stored data
+    """
+    row = db.execute(text("SELECT version, updated_at FROM data_version WHERE id = 1")).first()
+    if not row:
+        return 0, datetime(1970, 1, 1)
+    updated_at = row[1]
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    return row[0], updated_at
+
+def create_schema(bind: Engine):
+    """
+    Create missing tables and run migrations on one database
+    """
+    with bind.begin() as conn:
+        # Only takes effect while the database has no tables; older databases are converted by maintenance
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        Base.metadata.create_all(bind=conn)
+    migrate_database(bind)
+
+_initialized = False
+_init_lock = threading.Lock()
+
+def init_db():
+    """
+    Create missing tables and run migrations. Called once at startup (the FastAPI lifespan,
+    command-line entry points) rather than on import, so importing the models stays cheap.
+    """
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        create_schema(engine)
+        _initialized = True
+
+class TenantEngines:
+    """
+    LRU of open engines for profile databases. A profile's database is created (with its
+    schema) the first time it is used; evicted engines are disposed, and sessions still
+    holding one of their connections keep it until they close.
+    """
+    def __init__(self, directory: str = TENANT_DB_DIR, capacity: int = TENANT_ENGINE_CACHE_SIZE):
+        self.directory = directory
+        self.capacity = capacity
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self._creating: Dict[str, threading.Lock] = {}
+
+    def path(self, tenant: str) -> str:
+        return os.path.join(self.directory, f"{tenant}.db")
+
+    def _cached(self, tenant: str) -> Optional[Engine]:
+        # Caller holds self._lock
+        tenant_engine = self._engines.get(tenant)
+        if tenant_engine is not None:
+            self._engines.move_to_end(tenant)
+        return tenant_engine
+
+    def get(self, tenant: str) -> Engine:
+        if not TENANT_ID_RE.fullmatch(tenant):
+            raise ValueError("Profile ids are 1-64 letters, digits, '-' or '_'")
+        with self._lock:
+            tenant_engine = self._cached(tenant)
+            if tenant_engine is not None:
+                return tenant_engine
+            creating = self._creating.setdefault(tenant, threading.Lock())
+
+        # The schema is created outside the LRU lock, so a new profile's first request does not
+        # hold up other profiles; concurrent first requests for the same profile wait for one another
+        with creating:
+            with self._lock:
+                tenant_engine = self._cached(tenant)
+                if tenant_engine is not None:
+                    return tenant_engine
+            os.makedirs(self.directory, exist_ok=True)
+            tenant_engine = create_engine(f"sqlite:///{self.path(tenant)}")
+            try:
+                create_schema(tenant_engine)
+            except Exception:
+                tenant_engine.dispose()
+                raise
+            evicted = []
+            with self._lock:
+                published = self._cached(tenant)
+                if published is None:
+                    self._engines[tenant] = published = tenant_engine
+                    while len(self._engines) > self.capacity:
+                        evicted.append(self._engines.popitem(last=False)[1])
+                else:
+                    evicted.append(tenant_engine)
+                if self._creating.get(tenant) is creating:
+                    del self._creating[tenant]
+        for unused in evicted:
+            unused.dispose()
+        return published
+
+    def open_tenants(self) -> List[str]:
+        with self._lock:
+            return list(self._engines)
+
+TENANT_ENGINES = TenantEngines()
+
+def engine_for(tenant: Optional[str]) -> Engine:
+    return engine if tenant is None else TENANT_ENGINES.get(tenant)
+
+def open_session() -> Session:
+    """
+    Session on the current profile's database (the default database outside a profile)
+    """
+    tenant = current_tenant.get()
+    if tenant is None:
+        return SessionLocal()
+    return SessionLocal(bind=engine_for(tenant), info={"tenant": tenant})
 
 def get_db():
-    db = SessionLocal()
+    db = open_session()
     try:
         yield db
     finally:
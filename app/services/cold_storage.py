@@ -0,0 +1,218 @@
+"""
+Compressed cold tier for old chat memories.
+
+Memories older than COLD_STORAGE_AGE_DAYS have their text deflated with a zlib preset dictionary
+trained on cold memory texts (sender names, greetings and phrases recur across chunks, so even
+short chunks compress well) and moved into ChatMemory.compressed_text. Recent memories stay
+uncompressed. Readers call texts()/hydrate() on the rows they actually return, so retrieval only
+decompresses its top-k winners.
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.database import ChatMemory, TextDictionary, current_tenant, open_session
+from app.utils.metrics import timed_stage
+
+COLD_STORAGE_AGE_DAYS = int(os.getenv("COLD_STORAGE_AGE_DAYS", "365"))
+COLD_STORAGE_LEVEL = int(os.getenv("COLD_STORAGE_LEVEL", "9"))
+# zlib only references the last 32 KB of a preset dictionary
+COLD_DICT_SIZE = min(int(os.getenv("COLD_DICT_SIZE", "32768")), 32768)
+COLD_DICT_SAMPLES = 2000
+COLD_STORAGE_BATCH = 1000
+DICT_NGRAM_SIZES = (1, 2, 3, 4)
+DICT_MIN_LENGTH = 4
+
+TOKEN_RE = re.compile(r'\S+\s*')
+
+def train_dictionary(samples: List[str], size: int = COLD_DICT_SIZE) -> bytes:
+    """
+    zlib preset dictionary from the word n-grams that recur across the most samples, scored by
+    the bytes they would save. The most valuable strings go last: zlib finds matches closest to
+    the data cheapest to encode.
+    """
+    counts = Counter()
+    for sample in samples:
+        tokens = TOKEN_RE.findall(sample)
+        counts.update({
+            ''.join(tokens[i:i + n])
+            for n in DICT_NGRAM_SIZES
+            for i in range(len(tokens) - n + 1)
+        })
+    scored = sorted(
+        ((count - 1) * len(gram.encode('utf-8')), gram)
+        for gram, count in counts.items()
+        if count > 1 and len(gram) >= DICT_MIN_LENGTH
+    )
+    chosen, used = [], 0
+    for _, gram in reversed(scored):
+        data = gram.encode('utf-8')
+        if used + len(data) <= size:
+            chosen.append(data)
+            used += len(data)
+            if used >= size - DICT_MIN_LENGTH:
+                break
+    return b''.join(reversed(chosen))
+
+def compress_text(text: str, zdict: bytes) -> bytes:
+    # Raw deflate: the zlib header and checksum would cost 6 bytes per memory
+    compressor = zlib.compressobj(COLD_STORAGE_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+def decompress_text(data: bytes, zdict: bytes) -> str:
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=zdict)
+    return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+class ColdStorage:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _dictionaries(self, dict_ids) -> Dict[int, bytes]:
+        if not dict_ids:
+            return {}
+        return dict(self.db.query(TextDictionary.id, TextDictionary.data).filter(TextDictionary.id.in_(list(dict_ids))))
+
+    def texts(self, stored: List[Tuple[str, Optional[bytes], Optional[int]]]) -> List[str]:
+        """
+        Texts of memories given as (text, compressed_text, text_dict_id); cold ones are decompressed
+        """
+        dictionaries = self._dictionaries({dict_id for _, _, dict_id in stored if dict_id is not None})
+        return [
+            text if dict_id is None else decompress_text(data, dictionaries[dict_id])
+            for text, data, dict_id in stored
+        ]
+
+    def hydrate(self, memories: List[ChatMemory]) -> List[ChatMemory]:
+        """
+        Fill in the text of cold memories in place. The value is set as loaded, not as a change,
+        so committing the session never writes it back uncompressed.
+        """
+        cold = [memory for memory in memories if memory.text_dict_id is not None]
+        texts = self.texts([(memory.text, memory.compressed_text, memory.text_dict_id) for memory in cold])
+        for memory, text in zip(cold, texts):
+            set_committed_value(memory, "text", text)
+        return memories
+
+    def _candidates(self, cutoff: datetime):
+        return self.db.query(ChatMemory.id, ChatMemory.text)\
+            .filter(
+                ChatMemory.text_dict_id.is_(None),
+                func.coalesce(ChatMemory.timestamp, ChatMemory.created_at) < cutoff
+            )
+
+    def _train(self, cutoff: datetime) -> Optional[TextDictionary]:
+        samples = [row.text for row in self._candidates(cutoff).order_by(func.random()).limit(COLD_DICT_SAMPLES)]
+        zdict = train_dictionary(samples)
+        if not zdict:
+            return None
+        dictionary = TextDictionary(data=zdict, sample_count=len(samples))
+        self.db.add(dictionary)
+        # Committed right away, so the write lock is not held while the first batch is compressed
+        self.db.commit()
+        return dictionary
+
+    @timed_stage("cold_storage")
+    def compact(self, max_age_days: int = COLD_STORAGE_AGE_DAYS, retrain: bool = False, deadline: float = None) -> Dict:
+        """
+        Move hot memories older than `max_age_days` into the compressed tier, one commit per batch.
+        The newest dictionary is reused unless `retrain`; memories keep the dictionary they were
+        compressed with. Memories whose text would not shrink stay hot. With a `deadline`
+        (time.monotonic()) it stops between batches once the deadline passed; "complete" tells
+        whether everything eligible was processed.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        stats = {"compressed": 0, "text_bytes": 0, "compressed_bytes": 0, "dictionary_id": None, "complete": True}
+        if not self._candidates(cutoff).limit(1).first():
+            return stats
+        dictionary = None if retrain else self.db.query(TextDictionary).order_by(TextDictionary.id.desc()).first()
+        dictionary = dictionary or self._train(cutoff)
+        if dictionary is None:
+            return stats
+        stats["dictionary_id"] = dictionary.id
+
+        # Written only if the memory is still hot with the text that was read: an edit committed
+        # in between (update_memories) must not be overwritten with the compressed old text
+        memories = ChatMemory.__table__
+        compress = memories.update()\
+            .where(
+                memories.c.id == bindparam("memory_id"),
+                memories.c.text_dict_id.is_(None),
+                memories.c.text == bindparam("old_text")
+            )\
+            .values(text="", compressed_text=bindparam("data"), text_dict_id=dictionary.id)
+
+        last_id = 0
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                stats["complete"] = False
+                break
+            rows = self._candidates(cutoff)\
+                .filter(ChatMemory.id > last_id)\
+                .order_by(ChatMemory.id.asc())\
+                .limit(COLD_STORAGE_BATCH)\
+                .all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = []
+            for row in rows:
+                data = compress_text(row.text, dictionary.data)
+                if len(data) >= len(row.text.encode('utf-8')):
+                    continue
+                updates.append({"memory_id": row.id, "old_text": row.text, "data": data})
+            if updates and self.db.execute(compress, updates).rowcount != len(updates):
+                # Some memories changed since they were read and stay hot until the next pass
+                written = {
+                    memory_id for (memory_id,) in self.db.query(ChatMemory.id).filter(
+                        ChatMemory.id.in_([u["memory_id"] for u in updates]),
+                        ChatMemory.text_dict_id == dictionary.id
+                    )
+                }
+                updates = [u for u in updates if u["memory_id"] in written]
+            self.db.commit()
+            stats["compressed"] += len(updates)
+            stats["text_bytes"] += sum(len(u["old_text"].encode('utf-8')) for u in updates)
+            stats["compressed_bytes"] += sum(len(u["data"]) for u in updates)
+        return stats
+
+_compact_locks: Dict[Optional[str], threading.Lock] = {}
+_compact_locks_lock = threading.Lock()
+
+def compact_lock(tenant: Optional[str]) -> threading.Lock:
+    """
+    Held while a compaction pass runs on `tenant`'s database, so passes never overlap
+    """
+    with _compact_locks_lock:
+        return _compact_locks.setdefault(tenant, threading.Lock())
+
+def compact_cold_memories() -> Dict:
+    """
+    Background entry point: compact the current database in a session of its own.
+    A pass already running on the same database makes this a no-op.
+    """
+    lock = compact_lock(current_tenant.get())
+    if not lock.acquire(blocking=False):
+        return {}
+    try:
+        db = open_session()
+        try:
+            stats = ColdStorage(db).compact()
+        finally:
+            db.close()
+        if stats["compressed"]:
+            print(
+                f"✅ Moved {stats['compressed']} memories to cold storage "
+                f"({stats['text_bytes'] / 1e6:.1f} MB -> {stats['compressed_bytes'] / 1e6:.1f} MB)"
+            )
+        return stats
+    finally:
+        lock.release()
@@ -0,0 +1,121 @@
+"""
+Batched LLM calls for ingestion-time enrichment.
+
+Many items (chunks) are packed into one request as numbered sections and the model answers
+with a JSON array of {"id": n, "result": ...} objects. Items missing from a response, or whose
+batch failed outright, are retried in smaller follow-up batches; batches run concurrently
+within a fixed limit so throughput is bounded by the API rather than by round-trip latency.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from app.services.llm_provider import LLMProvider, get_llm_provider, parse_json_response
+from app.utils.metrics import timed_stage
+
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "20"))
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "4"))
+LLM_BATCH_RETRIES = 2
+LLM_BATCH_ITEM_CHARS = 2000  # longer items are truncated in the prompt
+
+BATCH_ITEM_HEADER = "### Item {number}"
+
+class LLMBatcher:
+    """
+    Run one LLM task over many items with batched, concurrent and retried requests.
+    `task` is sent to the provider as "batch:<task>"; `instructions` describe the per-item answer.
+    """
+    def __init__(
+        self,
+        task: str,
+        instructions: str,
+        llm: LLMProvider = None,
+        batch_size: int = LLM_BATCH_SIZE,
+        concurrency: int = LLM_BATCH_CONCURRENCY,
+        max_retries: int = LLM_BATCH_RETRIES
+    ):
+        self.task = task
+        self.instructions = instructions
+        self.llm = llm or get_llm_provider()
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def run(self, items: List[str]) -> List[Any]:
+        """
+        Return one result per item, in order; None for items that still failed after all retries
+        """
+        results = [None] * len(items)
+        pending = list(range(len(items)))
+        self.stats = {"items": len(items), "calls": 0, "retried": 0, "failed": 0}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for attempt in range(self.max_retries + 1):
+                if not pending:
+                    break
+                # Retry rounds use smaller batches so one bad item costs less the next time
+                size = max(1, self.batch_size >> attempt)
+                if attempt:
+                    self.stats["retried"] += len(pending)
+                batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+                failed = []
+                for batch, answers in zip(batches, pool.map(lambda b: self._call(b, items), batches)):
+                    for index in batch:
+                        if index in answers:
+                            results[index] = answers[index]
+                        else:
+                            failed.append(index)
+                pending = failed
+
+        elapsed = time.perf_counter() - start
+        self.stats["failed"] = len(pending)
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["chunks_per_s"] = round((len(items) - len(pending)) / elapsed, 2) if elapsed else 0.0
+        print(
+            f"🤖 {self.task}: {len(items) - len(pending)}/{len(items)} items in {self.stats['calls']} calls, "
+            f"{self.stats['chunks_per_s']} chunks/s ({self.stats['retried']} retried, {len(pending)} failed)"
+        )
+        return results
+
+    def _build_prompt(self, batch: List[int], items: List[str]) -> str:
+        sections = "\n\n".join(
+            f"{BATCH_ITEM_HEADER.format(number=number)}\n{items[index][:LLM_BATCH_ITEM_CHARS]}"
+            for number, index in enumerate(batch, start=1)
+        )
+        return (
+            f"{self.instructions}\n\n"
+            f"Answer every item below independently. Return only a JSON array with one object per item, "
+            f"in the form {{\"id\": <item number>, \"result\": <answer for that item>}}.\n\n"
+            f"{sections}"
+        )
+
+    def _call(self, batch: List[int], items: List[str]) -> Dict[int, Any]:
+        """
+        One request for `batch`; returns item index -> result for the items the response answered
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        try:
+            with timed_stage("llm_batch"):
+                raw = self.llm.generate(self._build_prompt(batch, items), task=f"batch:{self.task}")
+            answers = parse_json_response(raw, list)
+        except Exception as e:
+            print(f"⚠️ LLM batch of {len(batch)} {self.task} items failed: {e}")
+            return {}
+
+        resolved = {}
+        for answer in answers:
+            if not isinstance(answer, dict) or "result" not in answer:
+                continue
+            try:
+                number = int(answer.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= number <= len(batch):
+                resolved[batch[number - 1]] = answer["result"]
+        return resolved
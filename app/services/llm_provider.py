@@ -0,0 +1,174 @@
+"""
+LLM provider interface with a Gemini backend and a deterministic offline fake for load tests and benchmarks
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from app.utils.chat_processor import MESSAGE_LINE_PATTERN
+from app.utils.fact_extractor import extract_facts
+
+class LLMError(Exception):
+    """
+    Raised when the LLM backend fails to produce a response
+    """
+
+def strip_code_fences(raw: str) -> str:
+    """
+    Remove Markdown code block markers (```json ... ```) around an LLM response
+    """
+    raw = raw.strip()
+    if raw.startswith('```json'):
+        raw = raw[len('```json'):].strip()
+    if raw.startswith('```'):
+        raw = raw[len('```'):].strip()
+    if raw.endswith('```'):
+        raw = raw[:-3].strip()
+    return raw
+
+def parse_json_response(raw: str, expected: type = list):
+    """
+    Parse the JSON value of type `expected` (list or dict) from an LLM response,
+    tolerating code fences and stray prose before or after the JSON
+    """
+    text = strip_code_fences(raw)
+    try:
+        value = json.loads(text)
+    except ValueError:
+        opener, closer = ('[', ']') if expected is list else ('{', '}')
+        start, end = text.find(opener), text.rfind(closer)
+        if start == -1 or end <= start:
+            raise
+        value = json.loads(text[start:end + 1])
+    if not isinstance(value, expected):
+        raise ValueError(f"Expected a JSON {expected.__name__}, got {type(value).__name__}")
+    return value
+
+class LLMProvider:
+    """
+    Minimal text-generation interface used by the services.
+    `task` names the kind of request ("extract_people", "recommendation", ...) so
+    backends that do not understand prompts can still answer in the expected shape.
+    """
+    def generate(self, prompt: str, task: str = "generate") -> str:
+        raise NotImplementedError
+
+class GeminiProvider(LLMProvider):
+    def __init__(self, model_name: str = "gemini-1.5-flash", api_key: str = None):
+        # Imported here: the SDK takes most of a second to import and is unused with the fake provider
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, task: str = "generate") -> str:
+        response = self.model.generate_content(prompt)
+        return response.text
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Offline stand-in for Gemini: deterministic JSON for people extraction, profile summaries
+    and batched fact extraction, templated recommendations, and configurable latency and error injection
+    """
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._message_line = re.compile(MESSAGE_LINE_PATTERN, re.MULTILINE)
+        self._profile_patterns = {
+            "interests": re.compile(r"\b(?:really love|love|enjoy|obsessed with)\s+([^.,!?\n]+)", re.IGNORECASE),
+            "preferences": re.compile(r"\b(?:been wanting|prefer|should try)\s+([^.,!?\n]+)", re.IGNORECASE),
+            "dates": re.compile(r"\b((?:birthday|anniversary)\b[^.!?\n]*?\d{1,2}/\d{1,2})", re.IGNORECASE),
+            "dislikes": re.compile(r"\b(?:not a fan of|hate|don't like)\s+([^.,!?\n]+)", re.IGNORECASE),
+        }
+
+    def generate(self, prompt: str, task: str = "generate") -> str:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            fail = self._random.random() < self.error_rate
+        delay = max(self.latency_ms + jitter, 0) / 1000
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise LLMError(f"Injected fake LLM failure for task '{task}'")
+
+        if task == "extract_people":
+            senders = [match.group('sender').strip() for match in self._message_line.finditer(prompt)]
+            return json.dumps(list(dict.fromkeys(senders)))
+
+        if task.startswith("batch:"):
+            sections = re.split(r'^### Item (\d+)\n', prompt, flags=re.MULTILINE)[1:]
+            return json.dumps([
+                {"id": int(number), "result": self._answer_item(task[len("batch:"):], body.strip())}
+                for number, body in zip(sections[::2], sections[1::2])
+            ])
+
+        if task == "profile_summary":
+            current = re.search(r'Current profile JSON: (\{.*\})', prompt)
+            profile = json.loads(current.group(1)) if current else {}
+            messages = prompt.split("New messages:", 1)[-1]
+            for field, pattern in self._profile_patterns.items():
+                found = [match.group(1).strip() for match in pattern.finditer(messages)]
+                profile[field] = list(dict.fromkeys(list(profile.get(field, [])) + found))
+            return json.dumps(profile)
+
+        question = re.search(r'Question:\s*(.+)', prompt)
+        question = question.group(1).strip() if question else "your request"
+        context_lines = [line.strip()[2:] for line in prompt.splitlines() if line.strip().startswith('- ')]
+        highlights = "; ".join(line[:80] for line in context_lines[:3]) or "no stored context"
+        return (
+            f"Recommendation for \"{question}\": plan something personal around what you know. "
+            f"Based on: {highlights}."
+        )
+
+    def _answer_item(self, task: str, text: str):
+        if task == "extract_facts":
+            return [
+                {"type": fact["fact_type"], "label": fact["label"], "value": fact["value"], "sender": fact["sender"]}
+                for fact in extract_facts(text)
+            ]
+        return None
+
+class DisabledLLMProvider(LLMProvider):
+    """
+    Provider for offline paths that promise to make no LLM calls (bulk import): every call fails
+    """
+    def generate(self, prompt: str, task: str = "generate") -> str:
+        raise LLMError(f"LLM calls are disabled here (task '{task}')")
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_llm_provider() -> LLMProvider:
+    """
+    Return the process-wide LLM provider selected by LLM_PROVIDER ("gemini" or "fake")
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                backend = os.getenv("LLM_PROVIDER", "gemini").lower()
+                if backend == "fake":
+                    _provider = FakeLLMProvider(
+                        latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")),
+                        jitter_ms=float(os.getenv("FAKE_LLM_JITTER_MS", "0")),
+                        error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+                        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+                    )
+                elif backend == "gemini":
+                    _provider = GeminiProvider(model_name=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"))
+                else:
+                    raise ValueError(f"Unknown LLM_PROVIDER '{backend}', expected 'gemini' or 'fake'")
+    return _provider
+
+def set_llm_provider(provider: LLMProvider):
+    """
+    Override the process-wide provider (used by benchmarks and embedding applications)
+    """
+    global _provider
+    _provider = provider
@@ -0,0 +1,342 @@
+"""
+Background database maintenance during idle periods: removal of orphaned index rows (LSH bands,
+facts and duplicate references left behind by deletions), cold storage compaction, incremental
+vacuum, ANALYZE / PRAGMA optimize, and pruning of in-process caches.
+
+A pass covers the default database and every open profile database. Work is split into steps
+that each hold a database for at most MAINTENANCE_BUDGET_SECONDS, and a step only starts once
+no request has been in flight for MAINTENANCE_IDLE_SECONDS, so maintenance yields to user
+traffic between steps and resumes where it stopped in the next idle window. Two statements
+cannot be interrupted and run to completion regardless of the budget: the one-off full VACUUM
+that converts a database to incremental auto-vacuum (bounded by FULL_VACUUM_MAX_MB) and the
+first ANALYZE of a database (bounded by ANALYSIS_LIMIT rows per index).
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.models.database import TENANT_ENGINES, current_tenant, engine_for, open_session
+from app.services.cold_storage import ColdStorage, compact_lock
+from app.utils.concurrency import run_db
+from app.utils.http_cache import prune_data_versions
+from app.utils.jobs import JOBS
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between the end of one pass and the start of the next
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "3600"))
+# Quiet time (no request in flight) required before a step starts
+MAINTENANCE_IDLE_SECONDS = float(os.getenv("MAINTENANCE_IDLE_SECONDS", "30"))
+# Longest a single step may hold a database
+MAINTENANCE_BUDGET_SECONDS = float(os.getenv("MAINTENANCE_BUDGET_SECONDS", "2"))
+# Databases still without auto_vacuum are converted with one full VACUUM only up to this size
+FULL_VACUUM_MAX_MB = float(os.getenv("FULL_VACUUM_MAX_MB", "64"))
+MAINTENANCE_TICK_SECONDS = 5.0
+# Monitoring requests that do not count as user traffic
+PASSIVE_PATHS = ("/api/health", "/api/metrics", "/api/maintenance")
+ORPHAN_BATCH = 5000
+VACUUM_PAGES_PER_STEP = 2000
+# Rows ANALYZE samples per index, so statistics stay cheap to gather on large tables
+ANALYSIS_LIMIT = 1000
+
+# Index rows whose memory (or chat file) no longer exists, deleted ORPHAN_BATCH at a time
+ORPHAN_DELETES = {
+    "chat_memory_bands": """
+        DELETE FROM chat_memory_bands WHERE id IN (
+            SELECT b.id FROM chat_memory_bands b LEFT JOIN chat_memories m ON m.id = b.memory_id
+            WHERE m.id IS NULL LIMIT :limit)""",
+    "facts": """
+        DELETE FROM facts WHERE id IN (
+            SELECT f.id FROM facts f LEFT JOIN chat_memories m ON m.id = f.memory_id
+            WHERE m.id IS NULL LIMIT :limit)""",
+    "chat_memory_refs": """
+        DELETE FROM chat_memory_refs WHERE id IN (
+            SELECT r.id FROM chat_memory_refs r
+            LEFT JOIN chat_memories m ON m.id = r.memory_id
+            LEFT JOIN chat_files f ON f.id = r.chat_file_id
+            WHERE m.id IS NULL OR f.id IS NULL LIMIT :limit)""",
+}
+
+class ActivityTracker:
+    """
+    Requests in flight and when the last one finished, to tell when the server is idle
+    """
+    def __init__(self):
+        self._active = 0
+        self._last_finished = time.monotonic()
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self._active += 1
+
+    def finished(self):
+        with self._lock:
+            self._active -= 1
+            self._last_finished = time.monotonic()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def idle_for(self) -> float:
+        with self._lock:
+            return 0.0 if self._active else time.monotonic() - self._last_finished
+
+    def tracked(self, func):
+        """
+        `func` counted as activity while it runs, for background tasks and jobs
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.started()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.finished()
+        return wrapper
+
+ACTIVITY = ActivityTracker()
+
+class ActivityMiddleware:
+    """
+    Count a request as activity until its last body chunk is sent, so streamed responses keep
+    maintenance waiting until the stream ends. Requests to PASSIVE_PATHS are not counted.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(PASSIVE_PATHS):
+            await self.app(scope, receive, send)
+            return
+        finished = False
+
+        async def send_tracked(message):
+            nonlocal finished
+            try:
+                await send(message)
+            finally:
+                if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                    finished = True
+                    ACTIVITY.finished()
+
+        ACTIVITY.started()
+        try:
+            await self.app(scope, receive, send_tracked)
+        finally:
+            # Failed before (or while) sending the body
+            if not finished:
+                finished = True
+                ACTIVITY.finished()
+
+def compact_indexes(deadline: float) -> Tuple[bool, Dict]:
+    """
+    Delete orphaned band, fact and reference rows, one committed batch at a time
+    """
+    deleted = dict.fromkeys(ORPHAN_DELETES, 0)
+    db = open_session()
+    try:
+        for table, statement in ORPHAN_DELETES.items():
+            while True:
+                if time.monotonic() >= deadline:
+                    return False, deleted
+                count = db.execute(text(statement), {"limit": ORPHAN_BATCH}).rowcount
+                db.commit()
+                deleted[table] += count
+                if count < ORPHAN_BATCH:
+                    break
+        return True, deleted
+    finally:
+        db.close()
+
+def compact_cold_storage(deadline: float) -> Tuple[bool, Dict]:
+    """
+    Cold storage compaction, skipped while a POST /api/memories/compact pass runs on the database
+    """
+    lock = compact_lock(current_tenant.get())
+    if not lock.acquire(blocking=False):
+        return True, {"skipped": "a compaction pass is already running"}
+    try:
+        db = open_session()
+        try:
+            stats = ColdStorage(db).compact(deadline=deadline)
+        finally:
+            db.close()
+    finally:
+        lock.release()
+    return stats.pop("complete"), stats
+
+def vacuum(deadline: float) -> Tuple[bool, Dict]:
+    """
+    Return free pages to the filesystem with incremental vacuum. A database created before
+    auto_vacuum was enabled is converted with one full VACUUM if it is small enough; that VACUUM
+    cannot be split and ignores the deadline.
+    """
+    # VACUUM and incremental_vacuum cannot run inside a transaction
+    with engine_for(current_tenant.get()).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        result = {"mode": {0: "none", 1: "full", 2: "incremental"}.get(mode, mode), "free_pages": free_pages, "freed_pages": 0}
+        if mode == 0:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            size_mb = conn.exec_driver_sql("PRAGMA page_count").scalar() * page_size / 1e6
+            if size_mb > FULL_VACUUM_MAX_MB:
+                result["skipped"] = f"auto_vacuum is off and the database is {size_mb:.0f} MB; run VACUUM offline"
+                return True, result
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+            result.update(mode="incremental", converted=True, freed_pages=free_pages)
+            return True, result
+        while free_pages and time.monotonic() < deadline:
+            # Drivers that report the pragma's per-page rows only free the pages as they are read
+            pragma = conn.exec_driver_sql(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})")
+            if pragma.returns_rows:
+                pragma.fetchall()
+            remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            result["freed_pages"] += free_pages - remaining
+            free_pages = remaining
+        return not free_pages, result
+
+def optimize(deadline: float) -> Tuple[bool, Dict]:
+    """
+    Keep query planner statistics current: ANALYZE the first time, PRAGMA optimize after. Neither
+    can be interrupted at the deadline; analysis_limit keeps them short on large tables.
+    """
+    with engine_for(current_tenant.get()).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        analyzed = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).first() is not None
+        conn.exec_driver_sql("PRAGMA optimize" if analyzed else "ANALYZE")
+    return True, {"statement": "PRAGMA optimize" if analyzed else "ANALYZE"}
+
+# Run in this order on each database
+MAINTENANCE_TASKS = {
+    "compact_indexes": compact_indexes,
+    "cold_storage": compact_cold_storage,
+    "vacuum": vacuum,
+    "optimize": optimize,
+}
+
+def prune_caches() -> Dict:
+    """
+    Drop expired jobs and the cached data versions of profile databases that were closed
+    """
+    return {
+        "jobs": JOBS.prune(),
+        "data_versions": prune_data_versions(set(TENANT_ENGINES.open_tenants())),
+    }
+
+def database_name(tenant: Optional[str]) -> str:
+    return "default" if tenant is None else f"profile:{tenant}"
+
+class MaintenanceScheduler:
+    """
+    Runs maintenance passes step by step while the server is idle; status() reports progress
+    """
+    def __init__(
+        self,
+        interval: float = MAINTENANCE_INTERVAL,
+        idle_seconds: float = MAINTENANCE_IDLE_SECONDS,
+        budget: float = MAINTENANCE_BUDGET_SECONDS
+    ):
+        self.interval = interval
+        self.idle_seconds = idle_seconds
+        self.budget = budget
+        self._pending: List[Tuple[Optional[str], str]] = []
+        self._next_pass = time.monotonic() + interval
+        self._running: Optional[str] = None
+        self._pass_started_at: Optional[str] = None
+        self._last_pass: Dict = {}
+        self._tasks: Dict[str, Dict] = {}
+
+    def request_pass(self):
+        """
+        Start a pass at the next idle moment instead of waiting for the interval
+        """
+        self._next_pass = time.monotonic()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(MAINTENANCE_TICK_SECONDS)
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"⚠️ Maintenance failed: {e}")
+
+    async def tick(self):
+        if not self._pending and time.monotonic() >= self._next_pass:
+            databases = [None] + TENANT_ENGINES.open_tenants()
+            self._pending = [(tenant, task) for tenant in databases for task in MAINTENANCE_TASKS]
+            self._pass_started_at = datetime.utcnow().isoformat()
+        while self._pending and ACTIVITY.idle_for() >= self.idle_seconds:
+            tenant, task = self._pending[0]
+            if tenant is not None and tenant not in TENANT_ENGINES.open_tenants():
+                # Closed since the pass started; it is covered again once it is used
+                self._pending.pop(0)
+                continue
+            self._running = f"{task}@{database_name(tenant)}"
+            try:
+                done = await run_db(self._run_step, tenant, task)
+            finally:
+                self._running = None
+            if done:
+                self._pending.pop(0)
+        if self._pass_started_at and not self._pending:
+            self._last_pass = {
+                "started_at": self._pass_started_at,
+                "finished_at": datetime.utcnow().isoformat(),
+                "caches": prune_caches(),
+            }
+            self._pass_started_at = None
+            self._next_pass = time.monotonic() + self.interval
+
+    def _run_step(self, tenant: Optional[str], task: str) -> bool:
+        """
+        One time-boxed step of `task` on one database; returns whether the task is finished.
+        A failing task is recorded and skipped for the rest of the pass.
+        """
+        token = current_tenant.set(tenant)
+        start = time.monotonic()
+        record = self._tasks.setdefault(f"{task}@{database_name(tenant)}", {"steps": 0})
+        try:
+            done, result = MAINTENANCE_TASKS[task](start + self.budget)
+            record.update(result=result, error=None)
+        except Exception as e:
+            traceback.print_exc()
+            done = True
+            record.update(error=str(e))
+        finally:
+            current_tenant.reset(token)
+        record.update(
+            steps=record["steps"] + 1,
+            complete=done,
+            last_run_at=datetime.utcnow().isoformat(),
+            seconds=round(time.monotonic() - start, 3),
+        )
+        return done
+
+    def status(self) -> Dict:
+        return {
+            "enabled": MAINTENANCE_ENABLED,
+            "idle_for_seconds": round(ACTIVITY.idle_for(), 1),
+            "active_requests": ACTIVITY.active,
+            "idle_seconds_required": self.idle_seconds,
+            "budget_seconds": self.budget,
+            "running": self._running,
+            "pass_started_at": self._pass_started_at,
+            "pending": [f"{task}@{database_name(tenant)}" for tenant, task in self._pending],
+            "next_pass_in_seconds": None if self._pending else round(max(self._next_pass - time.monotonic(), 0), 1),
+            "last_pass": self._last_pass,
+            "tasks": self._tasks,
+        }
+
+MAINTENANCE = MaintenanceScheduler()
@@ -1,18 +1,79 @@
-from typing import List, Dict
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, List, Dict
 import json
-import numpy as np
+import os
+from sqlalchemy import bindparam, func, insert, update
 from sqlalchemy.orm import Session
-from app.models.database import ChatMemory, PartnerNote, ChatFile, Person
-from app.utils.chat_processor import ChatProcessor
-import google.generativeai as genai
+from app.models.database import ChatMemory, PartnerNote, ChatFile, Person, MemoryBand, MemoryReference, Fact
+from app.utils.chat_processor import ChatProcessor, fact_text
+from app.services.cold_storage import ColdStorage
+from app.services.llm_batcher import LLMBatcher
+from app.services.llm_provider import LLMProvider, get_llm_provider, parse_json_response
+from app.services.profile_service import format_profile, load_profile
+from app.utils.dedup import (
+    DEDUP_THRESHOLD, band_keys, estimated_similarity, minhash_signatures,
+    signature_from_bytes, signature_to_bytes
+)
+from app.utils.fact_extractor import (
+    FACT_EXTRACTION_INSTRUCTIONS, extract_facts, normalize_fact, question_fact_types, question_label
+)
+from app.utils.metrics import timed_stage
+from app.utils.uploads import SpooledUpload, extract_transcripts
 from datetime import datetime
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Ask the LLM for facts the rule-based extractors miss, in batches of chunks
+LLM_FACT_EXTRACTION = os.getenv("LLM_FACT_EXTRACTION", "false").lower() in ("1", "true", "yes")
+
+# Bound parameters per IN (...) query, well under SQLite's variable limit
+LOOKUP_BATCH_SIZE = 500
+# With profile summaries or indexed facts available, recommendations need only a few raw chunks
+PROFILE_CONTEXT_PEOPLE = 3
+COMPACT_CONTEXT_MEMORIES = 2
+FULL_CONTEXT_MEMORIES = 5
+FACT_CONTEXT_LIMIT = 8
+
+NOTE_COLUMNS = [
+    PartnerNote.id, PartnerNote.title, PartnerNote.content, PartnerNote.category,
+    PartnerNote.created_at, PartnerNote.updated_at
+]
+MEMORY_COLUMNS = [
+    ChatMemory.id, ChatMemory.chat_file_id, ChatMemory.person_id, ChatMemory.text, ChatMemory.timestamp,
+    ChatMemory.compressed_text, ChatMemory.text_dict_id
+]
+
+def id_batches(ids: List) -> List[List]:
+    """
+    Split values for an IN (...) filter into lists of at most LOOKUP_BATCH_SIZE
+    """
+    return [ids[i:i + LOOKUP_BATCH_SIZE] for i in range(0, len(ids), LOOKUP_BATCH_SIZE)]
+
+def parsed_senders(processed_data: Dict) -> List[str]:
+    """
+    Senders of the parsed messages in order of appearance; none when no message header was recognised
+    """
+    return list(processed_data['messages']['sender'].unique())
+
+def deleted_flags(ids: List[int], existing) -> List[bool]:
+    """
+    Per requested id whether it deleted a row: repeats of an id report False, the row is gone by then
+    """
+    seen = set()
+    flags = []
+    for item_id in ids:
+        flags.append(item_id in existing and item_id not in seen)
+        seen.add(item_id)
+    return flags
+
 class MemoryService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, llm: LLMProvider = None):
         self.db = db
         self.chat_processor = ChatProcessor()
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.llm = llm or get_llm_provider()
     
+    @timed_stage("extract_people_with_llm")
     def extract_people_with_llm(self, chat_text: str) -> list:
         """
         Use Gemini LLM to extract a list of real participant names from the chat transcript.
@@ -24,85 +85,284 @@ class MemoryService:
             "Do not return any explanation or text, only the JSON array.\n\n"
             f"Chat transcript:\n{chat_text[:12000]}"
         )
+        raw = None
         try:
-            response = self.model.generate_content(prompt)
-            raw = response.text.strip()
+            raw = self.llm.generate(prompt, task="extract_people").strip()
             print(f"[LLM People Extraction] Raw response: {raw}")
-            # Remove code block markers if present
-            if raw.startswith('```json'):
-                raw = raw[len('```json'):].strip()
-            if raw.startswith('```'):
-                raw = raw[len('```'):].strip()
-            if raw.endswith('```'):
-                raw = raw[:-3].strip()
-            import json as pyjson
-            names = pyjson.loads(raw)
-            if isinstance(names, list) and all(isinstance(n, str) for n in names):
+            names = parse_json_response(raw, list)
+            if all(isinstance(n, str) for n in names):
                 return names
         except Exception as e:
-            print(f"⚠️ LLM people extraction failed: {e}. Raw response: {getattr(response, 'text', None)}")
+            print(f"⚠️ LLM people extraction failed: {e}. Raw response: {raw}")
         return None
 
-    def process_and_store_chat(self, text: str, filename: str = None, file_size: int = None) -> Dict:
+    @timed_stage("extract_facts_with_llm")
+    def extract_facts_with_llm(self, chunks: List[Dict]):
+        """
+        Add LLM-extracted facts to each chunk's rule-based ones, batching many chunks per request.
+        Chunks whose batch keeps failing simply keep their rule-based facts.
+        """
+        batcher = LLMBatcher("extract_facts", FACT_EXTRACTION_INSTRUCTIONS, llm=self.llm)
+        for chunk, llm_facts in zip(chunks, batcher.run([fact_text(chunk) for chunk in chunks])):
+            if not isinstance(llm_facts, list):
+                continue
+            facts = chunk.setdefault('facts', [])
+            known = {(f['fact_type'], f['label'], f['value'].lower(), f['sender']) for f in facts}
+            for fact in filter(None, (normalize_fact(f, chunk['sender']) for f in llm_facts)):
+                key = (fact['fact_type'], fact['label'], fact['value'].lower(), fact['sender'])
+                if key not in known:
+                    known.add(key)
+                    facts.append(fact)
+
+    def process_and_store_chat_file(self, path: str, filename: str = None, file_size: int = None, content_hash: str = None) -> Dict:
+        """
+        Process a chat export spooled to disk and store its memories
+        """
+        text = self.chat_processor.read_export(path)
+        return self.process_and_store_chat(text, filename=filename, file_size=file_size, content_hash=content_hash)
+
+    def process_and_store_archive(self, path: str, filename: str = None) -> Dict:
+        """
+        Process every text transcript in a ZIP export, skipping media attachments.
+        Each transcript is stored as its own chat file.
+        """
+        archive = SpooledUpload(path, filename or "unknown_archive.zip", os.path.getsize(path), None, is_archive=True)
+        transcripts, summary = extract_transcripts(archive)
+        files = []
+        try:
+            for transcript in transcripts:
+                files.append(self.process_and_store_chat_file(
+                    transcript.path,
+                    filename=transcript.filename,
+                    file_size=transcript.size,
+                    content_hash=transcript.content_hash
+                ))
+        finally:
+            for transcript in transcripts:
+                transcript.cleanup()
+        return {"archive": summary, "files": files}
+
+    def process_and_store_chat(self, text: str, filename: str = None, file_size: int = None, content_hash: str = None) -> Dict:
         """
         Process chat history and store memories in the database, linking each message to a Person
         """
         # Use LLM to extract people
         llm_people = self.extract_people_with_llm(text)
+        processed_data = self.chat_processor.process_chat(text)
+        if LLM_FACT_EXTRACTION:
+            self.extract_facts_with_llm(processed_data['chunks'])
         if not llm_people:
-            print("No people extracted by LLM. Skipping people creation.")
-            participants = []
+            print("No people extracted by LLM. Falling back to parsed message senders.")
+            participants = parsed_senders(processed_data)
         else:
             participants = llm_people
-        processed_data = self.chat_processor.process_chat(text)
-        participant_map = {}  # name -> Person object
+        with timed_stage("db_write"):
+            metadata = self.store_processed_chat(processed_data, participants, filename, file_size, content_hash)
+        return metadata
 
-        # Create or update Person entries for each participant
-        for name in participants:
-            person = self.db.query(Person).filter(Person.name == name).first()
-            if not person:
-                person = Person(name=name, message_count=0)
-                self.db.add(person)
-                self.db.commit()
-                self.db.refresh(person)
-            participant_map[name] = person
+    def store_processed_chat(self, processed_data: Dict, participants: List[str], filename: str = None, file_size: int = None, content_hash: str = None, commit: bool = True) -> Dict:
+        """
+        Write people, the chat file record and its memories for an already processed chat.
+        Memories are inserted in one bulk statement; with commit=False the caller owns the
+        transaction, so bulk imports can group many files per commit.
+        """
+        participant_map = self.upsert_people(processed_data['messages'], participants, commit=False)
 
         # Create chat file record
         chat_file = ChatFile(
             filename=filename or "unknown_file.txt",
             file_size=file_size,
+            content_hash=content_hash,
+            attachment_count=processed_data['metadata'].get('attachments'),
             total_messages=processed_data['metadata']['total_messages'],
             participants=json.dumps(participants),
             date_range_start=datetime.fromisoformat(processed_data['metadata']['date_range']['start']) if processed_data['metadata']['date_range']['start'] else None,
             date_range_end=datetime.fromisoformat(processed_data['metadata']['date_range']['end']) if processed_data['metadata']['date_range']['end'] else None
         )
         self.db.add(chat_file)
-        self.db.commit()
-        self.db.refresh(chat_file)
+        self.db.flush()
 
-        # Store chunks as memories linked to the chat file and person
+        # Store chunks as memories linked to the chat file and the person who wrote most of each chunk
         default_person_id = participant_map[participants[0]].id if participants else None
-        for chunk in processed_data['chunks']:
-            memory = ChatMemory(
-                chat_file_id=chat_file.id,
-                person_id=default_person_id,
-                text=chunk,
-                timestamp=datetime.utcnow(),  # TODO: Extract actual timestamp from chunk
-                embedding=None,  # TODO: Generate and store embedding
-                relevance_score=None
-            )
-            self.db.add(memory)
-            # Increment message count for the person
-            if default_person_id:
-                participant_map[participants[0]].message_count += 1
-        self.db.commit()
+        memory_rows = [
+            {
+                "chat_file_id": chat_file.id,
+                "person_id": participant_map[chunk['sender']].id if chunk['sender'] in participant_map else default_person_id,
+                "text": chunk['text'],
+                "timestamp": chunk['timestamp'] or datetime.utcnow(),
+                "embedding": None,  # TODO: Generate and store embedding
+                "relevance_score": None
+            }
+            for chunk in processed_data['chunks']
+        ]
+        duplicates = self.store_memories(memory_rows) if memory_rows else 0
+        self.store_facts(memory_rows, processed_data['chunks'], participant_map)
+        if commit:
+            self.db.commit()
 
         # Add chat file info to metadata
         processed_data['metadata']['chat_file_id'] = chat_file.id
+        processed_data['metadata']['duplicate_chunks'] = duplicates
         processed_data['metadata']['uploaded_at'] = chat_file.uploaded_at.isoformat()
 
         return processed_data['metadata']
     
+    @timed_stage("dedup")
+    def store_memories(self, memory_rows: List[Dict]) -> int:
+        """
+        Bulk insert memories, collapsing near-duplicate chunks onto one canonical memory.
+        Duplicates of memories already stored are recorded as references (per the row's chat file)
+        so deleting either file keeps the other's context; duplicates within the batch only bump ref_count.
+        Stored rows get their new "id", collapsed rows the "duplicate_of" memory id;
+        returns the number of chunks that were collapsed.
+        """
+        signatures = minhash_signatures([row["text"] for row in memory_rows])
+        keys = band_keys(signatures)
+
+        # Existing memories sharing an LSH bucket with any new chunk
+        candidates = defaultdict(list)
+        all_keys = list(set(keys.ravel().tolist()))
+        for i in range(0, len(all_keys), LOOKUP_BATCH_SIZE):
+            for bucket, memory_id in self.db.query(MemoryBand.bucket, MemoryBand.memory_id)\
+                    .filter(MemoryBand.bucket.in_(all_keys[i:i + LOOKUP_BATCH_SIZE])):
+                candidates[bucket].append(memory_id)
+        candidate_ids = list({memory_id for ids in candidates.values() for memory_id in ids})
+        existing = {}
+        for i in range(0, len(candidate_ids), LOOKUP_BATCH_SIZE):
+            for memory_id, minhash in self.db.query(ChatMemory.id, ChatMemory.minhash)\
+                    .filter(ChatMemory.id.in_(candidate_ids[i:i + LOOKUP_BATCH_SIZE])):
+                existing[memory_id] = signature_from_bytes(minhash)
+
+        canonical = []  # indexes into memory_rows
+        new_buckets = defaultdict(list)  # bucket -> canonical indexes from this file
+        references = Counter()  # (existing memory id, chat file id) -> duplicate chunks
+        in_batch = {}  # duplicate row index -> canonical row index
+        for i, row in enumerate(memory_rows):
+            match = None
+            for bucket in keys[i].tolist():
+                match = next((m for m in candidates.get(bucket, ())
+                              if estimated_similarity(signatures[i], existing[m]) >= DEDUP_THRESHOLD), None)
+                if match is not None:
+                    # Only chunks of a chat file are counted: deleting that file releases the reference
+                    if row["chat_file_id"] is not None:
+                        references[(match, row["chat_file_id"])] += 1
+                    row["duplicate_of"] = match
+                    break
+                match = next((j for j in new_buckets.get(bucket, ())
+                              if estimated_similarity(signatures[i], signatures[j]) >= DEDUP_THRESHOLD), None)
+                if match is not None:
+                    memory_rows[match]["ref_count"] += 1
+                    in_batch[i] = match
+                    break
+            if match is None:
+                row["minhash"] = signature_to_bytes(signatures[i])
+                row["ref_count"] = 1
+                canonical.append(i)
+                for bucket in keys[i].tolist():
+                    new_buckets[bucket].append(i)
+
+        rows = [memory_rows[i] for i in canonical]
+        if rows:
+            memory_ids = self.db.scalars(
+                insert(ChatMemory).returning(ChatMemory.id, sort_by_parameter_order=True), rows
+            ).all()
+            for row, memory_id in zip(rows, memory_ids):
+                row["id"] = memory_id
+            self.db.execute(insert(MemoryBand), [
+                {"memory_id": memory_id, "bucket": bucket}
+                for memory_id, i in zip(memory_ids, canonical)
+                for bucket in keys[i].tolist()
+            ])
+        for i, j in in_batch.items():
+            memory_rows[i]["duplicate_of"] = memory_rows[j]["id"]
+        if references:
+            memories = ChatMemory.__table__
+            self.db.execute(
+                memories.update()
+                .where(memories.c.id == bindparam("memory_id"))
+                .values(ref_count=func.coalesce(memories.c.ref_count, 1) + bindparam("occurrences")),
+                [{"memory_id": m, "occurrences": n} for (m, _), n in references.items()]
+            )
+            self.db.execute(insert(MemoryReference), [
+                {"memory_id": m, "chat_file_id": chat_file_id, "occurrences": n}
+                for (m, chat_file_id), n in references.items()
+            ])
+        return len(memory_rows) - len(rows)
+
+    def store_facts(self, memory_rows: List[Dict], chunks: List[Dict], participant_map: Dict[str, Person]):
+        """
+        Index the facts extracted from each stored chunk, one row per distinct fact and person
+        in the file, linked to the memory of its first mention. Collapsed duplicate chunks add nothing.
+        """
+        facts = {}
+        for row, chunk in zip(memory_rows, chunks):
+            if "id" not in row:
+                continue
+            for fact in chunk.get('facts', ()):
+                sender = participant_map.get(fact['sender'])
+                person_id = sender.id if sender else row["person_id"]
+                key = (person_id, fact['fact_type'], fact['label'], fact['value'].lower())
+                if key in facts:
+                    facts[key]["mention_count"] += 1
+                    facts[key]["mentioned_at"] = row["timestamp"]
+                    continue
+                facts[key] = {
+                    "memory_id": row["id"],
+                    "person_id": person_id,
+                    "fact_type": fact['fact_type'],
+                    "label": fact['label'],
+                    "value": fact['value'],
+                    "value_key": fact['value'].lower(),
+                    "mention_count": 1,
+                    "mentioned_at": row["timestamp"]
+                }
+        if facts:
+            self.db.execute(insert(Fact), list(facts.values()))
+
+    def upsert_people(self, messages: 'pd.DataFrame', names: List[str] = None, commit: bool = True) -> Dict[str, Person]:
+        """
+        Create or update one Person per sender using per-sender aggregates of the parsed messages.
+        Extra names (e.g. from the LLM) are created without counts if they never sent a message.
+        Returns a map of name -> Person.
+        """
+        import pandas as pd
+
+        sender_stats = messages.groupby('sender')['timestamp'].agg(
+            message_count='size',
+            first_message_date='min',
+            last_message_date='max'
+        )
+        all_names = list(dict.fromkeys(list(names or []) + list(sender_stats.index)))
+        if not all_names:
+            return {}
+
+        existing = self.db.query(Person).filter(Person.name.in_(all_names)).all()
+        participant_map = {person.name: person for person in existing}
+
+        for name in all_names:
+            person = participant_map.get(name)
+            if not person:
+                person = Person(name=name, message_count=0)
+                self.db.add(person)
+                participant_map[name] = person
+            if name not in sender_stats.index:
+                continue
+
+            stats = sender_stats.loc[name]
+            person.message_count = (person.message_count or 0) + int(stats['message_count'])
+            first = None if pd.isna(stats['first_message_date']) else stats['first_message_date'].to_pydatetime()
+            last = None if pd.isna(stats['last_message_date']) else stats['last_message_date'].to_pydatetime()
+            if first and (not person.first_message_date or first < person.first_message_date):
+                person.first_message_date = first
+            if last and (not person.last_message_date or last > person.last_message_date):
+                person.last_message_date = last
+
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+        return participant_map
+
     def get_all_chat_files(self) -> List[ChatFile]:
         """
         Get all uploaded chat files
@@ -113,12 +373,50 @@ class MemoryService:
     
     def delete_chat_file(self, chat_file_id: int) -> bool:
         """
-        Delete a chat file and all its associated memories
+        Delete a chat file and all its associated memories.
+        Memories that other files also contain are handed over to one of those files instead.
         """
-        # First delete all memories associated with this chat file
+        # Drop this file's references to memories owned by other files
+        references = self.db.query(MemoryReference).filter(MemoryReference.chat_file_id == chat_file_id).all()
+        if references:
+            memories = ChatMemory.__table__
+            self.db.execute(
+                memories.update()
+                .where(memories.c.id == bindparam("memory_id"))
+                .values(ref_count=memories.c.ref_count - bindparam("occurrences")),
+                [{"memory_id": ref.memory_id, "occurrences": ref.occurrences} for ref in references]
+            )
+            self.db.query(MemoryReference)\
+                .filter(MemoryReference.chat_file_id == chat_file_id)\
+                .delete(synchronize_session=False)
+
+        # Hand memories that other files reference over to the earliest of those files
+        shared = defaultdict(list)
+        for ref in self.db.query(MemoryReference)\
+                .join(ChatMemory, ChatMemory.id == MemoryReference.memory_id)\
+                .filter(ChatMemory.chat_file_id == chat_file_id)\
+                .order_by(MemoryReference.id):
+            shared[ref.memory_id].append(ref)
+        if shared:
+            self.db.execute(update(ChatMemory), [
+                {"id": memory_id, "chat_file_id": refs[0].chat_file_id, "ref_count": sum(r.occurrences for r in refs)}
+                for memory_id, refs in shared.items()
+            ])
+            for refs in shared.values():
+                self.db.delete(refs[0])
+            self.db.flush()
+
+        # Delete the memories only this file contained, and rebuild the profiles summarized from them
+        owned = self.db.query(ChatMemory.id).filter(ChatMemory.chat_file_id == chat_file_id)
+        self.db.query(Person)\
+            .filter(Person.id.in_(
+                self.db.query(ChatMemory.person_id).filter(ChatMemory.chat_file_id == chat_file_id).scalar_subquery()
+            ))\
+            .update({Person.profile_notes: None, Person.profile_memory_id: None}, synchronize_session=False)
+        self._delete_memory_index(owned)
         self.db.query(ChatMemory)\
             .filter(ChatMemory.chat_file_id == chat_file_id)\
-            .delete()
+            .delete(synchronize_session=False)
         
         # Then delete the chat file record
         chat_file = self.db.query(ChatFile).filter(ChatFile.id == chat_file_id).first()
@@ -128,6 +426,20 @@ class MemoryService:
             return True
         return False
     
+    def _delete_memory_index(self, memory_ids):
+        """
+        Remove the LSH bands, duplicate references and facts of the memories selected by `memory_ids`
+        """
+        self.db.query(MemoryBand)\
+            .filter(MemoryBand.memory_id.in_(memory_ids.scalar_subquery()))\
+            .delete(synchronize_session=False)
+        self.db.query(MemoryReference)\
+            .filter(MemoryReference.memory_id.in_(memory_ids.scalar_subquery()))\
+            .delete(synchronize_session=False)
+        self.db.query(Fact)\
+            .filter(Fact.memory_id.in_(memory_ids.scalar_subquery()))\
+            .delete(synchronize_session=False)
+
     def get_chat_file_stats(self) -> Dict:
         """
         Get statistics about uploaded chat files
@@ -135,10 +447,12 @@ class MemoryService:
         total_files = self.db.query(ChatFile).count()
         total_memories = self.db.query(ChatMemory).count()
         total_notes = self.db.query(PartnerNote).count()
+        duplicate_chunks = self.db.query(func.coalesce(func.sum(ChatMemory.ref_count - 1), 0)).scalar()
         
         return {
             "total_chat_files": total_files,
             "total_memories": total_memories,
+            "duplicate_chunks": int(duplicate_chunks),
             "total_notes": total_notes
         }
     
@@ -192,17 +506,264 @@ class MemoryService:
             return True
         return False
     
+    def add_notes(self, notes: List[Dict]) -> List[Dict]:
+        """
+        Add many notes with one INSERT and one commit; returns the stored notes in input order
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "title": note["title"],
+                "content": note["content"],
+                "category": note.get("category"),
+                "created_at": now,
+                "updated_at": now
+            }
+            for note in notes
+        ]
+        note_ids = self.db.scalars(
+            insert(PartnerNote).returning(PartnerNote.id, sort_by_parameter_order=True), rows
+        ).all()
+        self.db.commit()
+        return [{"id": note_id, **row} for note_id, row in zip(note_ids, rows)]
+
+    def update_notes(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Apply many partial note updates (same rules as update_note) with one bulk UPDATE and one commit.
+        Returns the updated note per item, or None where the note does not exist.
+        """
+        notes = self._rows_by_id(NOTE_COLUMNS, [item["id"] for item in updates])
+        now = datetime.utcnow()
+        results = []
+        changed = {}
+        for item in updates:
+            note = notes.get(item["id"])
+            if note:
+                for field in ("title", "content", "category"):
+                    if item.get(field):
+                        note[field] = item[field]
+                note["updated_at"] = now
+                changed[note["id"]] = note
+            results.append(dict(note) if note else None)
+        if changed:
+            self.db.execute(update(PartnerNote), [
+                {key: note[key] for key in ("id", "title", "content", "category", "updated_at")}
+                for note in changed.values()
+            ])
+        self.db.commit()
+        return results
+
+    def delete_notes(self, note_ids: List[int]) -> List[bool]:
+        """
+        Delete many notes in one transaction; returns per id whether it deleted the note
+        """
+        existing = list(self._rows_by_id([PartnerNote.id], note_ids))
+        for batch in id_batches(existing):
+            self.db.query(PartnerNote)\
+                .filter(PartnerNote.id.in_(batch))\
+                .delete(synchronize_session=False)
+        self.db.commit()
+        return deleted_flags(note_ids, existing)
+
+    def get_memories(self, chat_file_id: int = None, person_id: int = None, limit: int = 100, offset: int = 0) -> List[ChatMemory]:
+        """
+        Stored memories, newest first, optionally filtered by chat file and person
+        """
+        query = self.db.query(ChatMemory)
+        if chat_file_id is not None:
+            query = query.filter(ChatMemory.chat_file_id == chat_file_id)
+        if person_id is not None:
+            query = query.filter(ChatMemory.person_id == person_id)
+        memories = query.order_by(ChatMemory.timestamp.desc(), ChatMemory.id.desc())\
+            .offset(offset)\
+            .limit(limit)\
+            .all()
+        return ColdStorage(self.db).hydrate(memories)
+
+    def add_memories(self, memories: List[Dict]) -> List[Dict]:
+        """
+        Store many memories in one transaction, deduplicated and indexed (LSH bands, facts) in one
+        pass, exactly like the chunks of an uploaded chat. Items naming an unknown person or chat
+        file are skipped. Returns per item {"status": "created" | "duplicate" | "invalid", "id", "detail"};
+        a duplicate's id is the existing memory it was collapsed onto.
+        """
+        people = self._rows_by_id([Person.id], [m["person_id"] for m in memories if m.get("person_id") is not None])
+        files = self._rows_by_id([ChatFile.id], [m["chat_file_id"] for m in memories if m.get("chat_file_id") is not None])
+        results = [None] * len(memories)
+        positions, rows, chunks = [], [], []
+        for i, memory in enumerate(memories):
+            error = self._memory_reference_error(memory, people, files)
+            if error:
+                results[i] = {"status": "invalid", "id": None, "detail": error}
+                continue
+            positions.append(i)
+            rows.append({
+                "chat_file_id": memory.get("chat_file_id"),
+                "person_id": memory.get("person_id"),
+                "text": memory["text"],
+                "timestamp": memory.get("timestamp") or datetime.utcnow(),
+                "embedding": None,
+                "relevance_score": None
+            })
+            chunks.append({"facts": extract_facts(memory["text"])})
+
+        if rows:
+            self.store_memories(rows)
+            self.store_facts(rows, chunks, self._fact_senders(chunks))
+        self.db.commit()
+
+        for i, row in zip(positions, rows):
+            if "id" in row:
+                results[i] = {"status": "created", "id": row["id"], "detail": None}
+            else:
+                results[i] = {"status": "duplicate", "id": row["duplicate_of"], "detail": None}
+        return results
+
+    def update_memories(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Apply many partial memory updates (text, timestamp, person) in one transaction.
+        Memories whose text changed get their MinHash, LSH bands and facts rebuilt in one pass,
+        and profiles summarized from changed text are reset so they are rebuilt.
+        Returns per item {"status": "updated" | "not_found" | "invalid", "id", "detail"}.
+        """
+        memories = self._rows_by_id(MEMORY_COLUMNS, [item["id"] for item in updates])
+        cold = [memory for memory in memories.values() if memory["text_dict_id"] is not None]
+        texts = ColdStorage(self.db).texts([(m["text"], m["compressed_text"], m["text_dict_id"]) for m in cold])
+        for memory, text in zip(cold, texts):
+            memory["text"] = text
+        people = self._rows_by_id([Person.id], [u["person_id"] for u in updates if u.get("person_id") is not None])
+        results = []
+        changed = {}
+        reindex = set()
+        affected_people = set()
+        for item in updates:
+            memory = memories.get(item["id"])
+            if not memory:
+                results.append({"status": "not_found", "id": item["id"], "detail": "Memory not found"})
+                continue
+            error = self._memory_reference_error(item, people, None)
+            if error:
+                results.append({"status": "invalid", "id": item["id"], "detail": error})
+                continue
+            if item.get("text") and item["text"] != memory["text"]:
+                memory["text"] = item["text"]
+                reindex.add(memory["id"])
+                affected_people.add(memory["person_id"])
+            if item.get("person_id") is not None and item["person_id"] != memory["person_id"]:
+                affected_people.update((memory["person_id"], item["person_id"]))
+                memory["person_id"] = item["person_id"]
+            if item.get("timestamp"):
+                memory["timestamp"] = item["timestamp"]
+            changed[memory["id"]] = memory
+            results.append({"status": "updated", "id": memory["id"], "detail": None})
+
+        # Rewritten text goes back to the hot tier; other memories keep their stored (maybe compressed) text
+        rewritten = [
+            {**{key: memory[key] for key in ("id", "text", "timestamp", "person_id")}, "compressed_text": None, "text_dict_id": None}
+            for memory in changed.values() if memory["id"] in reindex
+        ]
+        retagged = [
+            {key: memory[key] for key in ("id", "timestamp", "person_id")}
+            for memory in changed.values() if memory["id"] not in reindex
+        ]
+        if rewritten:
+            self.db.execute(update(ChatMemory), rewritten)
+        if retagged:
+            self.db.execute(update(ChatMemory), retagged)
+        if reindex:
+            self._reindex_memories([changed[memory_id] for memory_id in reindex])
+        self._reset_profiles(affected_people)
+        self.db.commit()
+        return results
+
+    def delete_memories(self, memory_ids: List[int]) -> List[bool]:
+        """
+        Delete many memories with their LSH bands, references and facts in one transaction,
+        resetting the profiles summarized from them; returns per id whether it deleted the memory
+        """
+        existing = self._rows_by_id([ChatMemory.id, ChatMemory.person_id], memory_ids)
+        for batch in id_batches(list(existing)):
+            self._delete_memory_index(self.db.query(ChatMemory.id).filter(ChatMemory.id.in_(batch)))
+            self.db.query(ChatMemory)\
+                .filter(ChatMemory.id.in_(batch))\
+                .delete(synchronize_session=False)
+        self._reset_profiles({memory["person_id"] for memory in existing.values()})
+        self.db.commit()
+        return deleted_flags(memory_ids, existing)
+
+    def _reindex_memories(self, rows: List[Dict]):
+        """
+        Replace the MinHash signature, LSH bands and facts of memories whose text changed
+        """
+        signatures = minhash_signatures([row["text"] for row in rows])
+        keys = band_keys(signatures)
+        for batch in id_batches([row["id"] for row in rows]):
+            self.db.query(MemoryBand).filter(MemoryBand.memory_id.in_(batch)).delete(synchronize_session=False)
+            self.db.query(Fact).filter(Fact.memory_id.in_(batch)).delete(synchronize_session=False)
+        self.db.execute(update(ChatMemory), [
+            {"id": row["id"], "minhash": signature_to_bytes(signature)} for row, signature in zip(rows, signatures)
+        ])
+        self.db.execute(insert(MemoryBand), [
+            {"memory_id": row["id"], "bucket": bucket}
+            for row, row_keys in zip(rows, keys.tolist())
+            for bucket in row_keys
+        ])
+        chunks = [{"facts": extract_facts(row["text"])} for row in rows]
+        self.store_facts(rows, chunks, self._fact_senders(chunks))
+
+    def _fact_senders(self, chunks: List[Dict]) -> Dict[str, Person]:
+        """
+        People named as the sender of any fact in `chunks`, by name
+        """
+        senders = list({fact["sender"] for chunk in chunks for fact in chunk["facts"] if fact["sender"]})
+        people = {}
+        for batch in id_batches(senders):
+            people.update((person.name, person) for person in self.db.query(Person).filter(Person.name.in_(batch)))
+        return people
+
+    @staticmethod
+    def _memory_reference_error(item: Dict, people: Dict, files: Dict = None) -> str:
+        if item.get("person_id") is not None and item["person_id"] not in people:
+            return "Person not found"
+        if files is not None and item.get("chat_file_id") is not None and item["chat_file_id"] not in files:
+            return "Chat file not found"
+        return None
+
+    def _reset_profiles(self, person_ids):
+        """
+        Drop the profile summaries of `person_ids` so the next refresh rebuilds them from scratch
+        """
+        person_ids = [person_id for person_id in person_ids if person_id is not None]
+        for batch in id_batches(person_ids):
+            self.db.query(Person)\
+                .filter(Person.id.in_(batch))\
+                .update({Person.profile_notes: None, Person.profile_memory_id: None}, synchronize_session=False)
+
+    def _rows_by_id(self, columns: List, ids: List[int]) -> Dict[int, Dict]:
+        """
+        Rows (as dicts of `columns`, the first being the primary key) whose id is in `ids`, keyed by id
+        """
+        found = {}
+        for batch in id_batches(list(set(ids))):
+            for row in self.db.query(*columns).filter(columns[0].in_(batch)):
+                found[row[0]] = row._asdict()
+        return found
+
+    @timed_stage("retrieval")
     def find_relevant_memories(self, query: str, limit: int = 5) -> List[ChatMemory]:
         """
         Find the most relevant memories for a given query
         TODO: Implement proper semantic search using embeddings
         For now, return the most recent memories
         """
-        return self.db.query(ChatMemory)\
+        memories = self.db.query(ChatMemory)\
             .order_by(ChatMemory.created_at.desc())\
             .limit(limit)\
             .all()
+        # Only the winners are decompressed
+        return ColdStorage(self.db).hydrate(memories)
     
+    @timed_stage("retrieval")
     def find_relevant_notes(self, query: str, limit: int = 3) -> List[PartnerNote]:
         """
         Find relevant notes based on query
@@ -214,18 +775,140 @@ class MemoryService:
             .limit(limit)\
             .all()
     
-    def generate_recommendation(self, query: str, memories: List[ChatMemory] = None, notes: List[PartnerNote] = None) -> Dict:
+    @timed_stage("retrieval")
+    def find_relevant_facts(self, query: str, limit: int = FACT_CONTEXT_LIMIT) -> List[Dict]:
+        """
+        Indexed lookup of the facts that answer a fact-style question ("when is her birthday?",
+        "what restaurant did they mention?"); empty for other questions
+        """
+        fact_types = question_fact_types(query)
+        if not fact_types:
+            return []
+        return self.get_facts(fact_types=fact_types, label=question_label(query), limit=limit)
+
+    def get_facts(self, fact_types: List[str] = None, label: str = None, person_id: int = None, limit: int = 100) -> List[Dict]:
+        """
+        Facts aggregated across chat files, most mentioned (then most recent) first
+        """
+        mentions = func.sum(Fact.mention_count).label("mentions")
+        last_mentioned = func.max(Fact.mentioned_at).label("last_mentioned")
+        query = self.db.query(
+            Fact.fact_type, Fact.label, func.min(Fact.value).label("value"), Person.name, mentions, last_mentioned
+        ).outerjoin(Person, Person.id == Fact.person_id)
+        if fact_types:
+            query = query.filter(Fact.fact_type.in_(fact_types))
+        if label:
+            query = query.filter(Fact.label == label)
+        if person_id is not None:
+            query = query.filter(Fact.person_id == person_id)
+        rows = query.group_by(Fact.fact_type, Fact.label, Fact.value_key, Person.name)\
+            .order_by(mentions.desc(), last_mentioned.desc())\
+            .limit(limit)\
+            .all()
+        return [
+            {
+                "type": row.fact_type,
+                "label": row.label,
+                "value": row.value,
+                "person": row.name,
+                "mentions": int(row.mentions),
+                "last_mentioned": row.last_mentioned.isoformat() if row.last_mentioned else None
+            }
+            for row in rows
+        ]
+
+    @timed_stage("retrieval")
+    def get_profile_summaries(self, limit: int = PROFILE_CONTEXT_PEOPLE) -> Dict[str, str]:
         """
-        Generate a personalized recommendation using the Gemini model
+        Summarized profiles of the most active people, as name -> one-line profile
         """
+        people = self.db.query(Person)\
+            .filter(Person.profile_notes.isnot(None))\
+            .order_by(Person.message_count.desc())\
+            .limit(limit)\
+            .all()
+        summaries = {person.name: format_profile(load_profile(person.profile_notes)) for person in people}
+        return {name: summary for name, summary in summaries.items() if summary}
+
+    @timed_stage("batch_retrieval")
+    def retrieve_contexts(self, questions: List[str]) -> List[Dict]:
+        """
+        Recommendation context for many questions with shared lookups: profiles, notes and recent
+        memories do not depend on the question and are read once, and questions that map to the same
+        fact types and label share one fact query. Returns per question the keyword arguments of
+        generate_recommendation (memories, notes, profiles, facts).
+        """
+        profiles = self.get_profile_summaries()
+        memories = self.find_relevant_memories(None, limit=FULL_CONTEXT_MEMORIES)
+        notes = self.find_relevant_notes(None)
+        facts_by_key = {}
+        contexts = []
+        for question in questions:
+            key = (tuple(question_fact_types(question)), question_label(question))
+            if key not in facts_by_key:
+                facts_by_key[key] = self.get_facts(fact_types=list(key[0]), label=key[1], limit=FACT_CONTEXT_LIMIT) if key[0] else []
+            facts = facts_by_key[key]
+            contexts.append({
+                "memories": memories[:COMPACT_CONTEXT_MEMORIES if profiles or facts else FULL_CONTEXT_MEMORIES],
+                "notes": notes,
+                "profiles": profiles,
+                "facts": facts
+            })
+        return contexts
+
+    def generate_recommendation(self, query: str, memories: List[ChatMemory] = None, notes: List[PartnerNote] = None, profiles: Dict[str, str] = None, facts: List[Dict] = None) -> Dict:
+        """
+        Generate a personalized recommendation using the configured LLM provider.
+        Precomputed profile summaries and indexed facts stand in for most of the raw chat chunks when available.
+        """
+        if profiles is None:
+            profiles = self.get_profile_summaries()
+        if facts is None:
+            facts = self.find_relevant_facts(query)
         if memories is None:
-            memories = self.find_relevant_memories(query)
+            memories = self.find_relevant_memories(query, limit=COMPACT_CONTEXT_MEMORIES if profiles or facts else FULL_CONTEXT_MEMORIES)
         if notes is None:
             notes = self.find_relevant_notes(query)
         
-        # Prepare context from memories and notes
+        with timed_stage("prompt_build"):
+            prompt = self._build_recommendation_prompt(query, memories, notes, profiles, facts)
+        
+        # Generate response
+        with timed_stage("llm_generate"):
+            recommendation = self.llm.generate(prompt, task="recommendation")
+        
+        return {
+            "recommendation": recommendation,
+            "context_used": {
+                "profiles": profiles,
+                "facts": facts,
+                "chat_memories": [memory.text for memory in memories],
+                "partner_notes": [f"{note.title}: {note.content}" for note in notes]
+            }
+        }
+
+    def _build_recommendation_prompt(self, query: str, memories: List[ChatMemory], notes: List[PartnerNote], profiles: Dict[str, str] = None, facts: List[Dict] = None) -> str:
+        """
+        Build the Gemini prompt from the profile summaries, indexed facts, retrieved memories and notes
+        """
+        # Prepare context from profiles, facts, memories and notes
         context_parts = []
         
+        if profiles:
+            context_parts.append("Profile Summaries:")
+            for name, summary in profiles.items():
+                context_parts.append(f"- {name}: {summary}")
+            context_parts.append("")
+        
+        if facts:
+            context_parts.append("Known Facts:")
+            for fact in facts:
+                subject = f"{fact['label']} " if fact['label'] else ""
+                context_parts.append(
+                    f"- {fact['person'] or 'Someone'} mentioned {fact['type']} {subject}{fact['value']} ({fact['mentions']}x)"
+                )
+            context_parts.append("")
+        
         if memories:
             context_parts.append("Chat History Context:")
             for memory in memories:
@@ -249,18 +932,27 @@ class MemoryService:
         Please provide a thoughtful, personalized recommendation that takes into account the specific details from both the chat history and personal notes.
         Focus on being specific and personal, referencing actual details from the conversations and notes.
         """
-        
-        # Generate response
-        response = self.model.generate_content(prompt)
-        
-        return {
-            "recommendation": response.text,
-            "context_used": {
-                "chat_memories": [memory.text for memory in memories],
-                "partner_notes": [f"{note.title}: {note.content}" for note in notes]
-            }
-        }
+        return prompt
     
+    def delete_person(self, person_id: int) -> bool:
+        """
+        Delete a person and all their associated chat memories
+        """
+        self._delete_memory_index(self.db.query(ChatMemory.id).filter(ChatMemory.person_id == person_id))
+        self.db.query(Fact)\
+            .filter(Fact.person_id == person_id)\
+            .delete(synchronize_session=False)
+        self.db.query(ChatMemory)\
+            .filter(ChatMemory.person_id == person_id)\
+            .delete(synchronize_session=False)
+
+        person = self.db.query(Person).filter(Person.id == person_id).first()
+        if person:
+            self.db.delete(person)
+            self.db.commit()
+            return True
+        return False
+
     def get_all_people(self) -> List[Dict]:
         """
         Get all people/profiles with at least 1 message (for debugging and small chats)
@@ -274,7 +966,9 @@ class MemoryService:
                 "first_message_date": person.first_message_date.isoformat() if person.first_message_date else None,
                 "last_message_date": person.last_message_date.isoformat() if person.last_message_date else None,
                 "message_count": person.message_count,
-                "profile_notes": person.profile_notes
+                "profile_notes": format_profile(load_profile(person.profile_notes)) or None,
+                "profile": load_profile(person.profile_notes),
+                "profile_updated_at": person.profile_updated_at.isoformat() if person.profile_updated_at else None
             }
             for person in people
         ] 
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Per-person profile summaries (interests, preferences, dates, dislikes) kept in Person.profile_notes.
+
+Profiles are refreshed incrementally: each pass only folds in the chat memories added since
+the person's last summary (tracked by Person.profile_memory_id), so recommendation prompts
+can use a short profile instead of many raw chunks.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.database import ChatMemory, Person, current_tenant, open_session
+from app.services.cold_storage import ColdStorage
+from app.services.llm_provider import get_llm_provider, parse_json_response
+from app.utils.metrics import timed_stage
+
+PROFILE_FIELDS = ("interests", "preferences", "dates", "dislikes")
+PROFILE_MAX_ITEMS = 12
+PROFILE_REFRESH_CHUNKS = int(os.getenv("PROFILE_REFRESH_CHUNKS", "200"))
+PROFILE_PROMPT_CHARS = 12000
+
+def empty_profile() -> Dict[str, List[str]]:
+    return {field: [] for field in PROFILE_FIELDS}
+
+def load_profile(profile_notes: str) -> Dict[str, List[str]]:
+    """
+    Parse a stored profile, treating missing or non-JSON notes as an empty profile
+    """
+    try:
+        stored = json.loads(profile_notes) if profile_notes else {}
+    except ValueError:
+        stored = {}
+    return normalize_profile(stored if isinstance(stored, dict) else {})
+
+def normalize_profile(profile: Dict) -> Dict[str, List[str]]:
+    """
+    Keep the known fields as de-duplicated lists of short strings, capped at PROFILE_MAX_ITEMS
+    """
+    normalized = empty_profile()
+    for field in PROFILE_FIELDS:
+        values = profile.get(field) or []
+        if isinstance(values, str):
+            values = [values]
+        seen = set()
+        for value in values:
+            value = str(value).strip()
+            if value and value.lower() not in seen:
+                seen.add(value.lower())
+                normalized[field].append(value)
+        normalized[field] = normalized[field][:PROFILE_MAX_ITEMS]
+    return normalized
+
+def format_profile(profile: Dict[str, List[str]]) -> str:
+    """
+    One-line rendering of a profile for prompts and the frontend
+    """
+    return "; ".join(
+        f"{field.capitalize()}: {', '.join(profile[field])}" for field in PROFILE_FIELDS if profile.get(field)
+    )
+
+class ProfileService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.llm = get_llm_provider()
+
+    def stale_people(self) -> List[Person]:
+        """
+        People with chat memories newer than their last profile summary
+        """
+        latest = self.db.query(ChatMemory.person_id, func.max(ChatMemory.id).label("latest_id"))\
+            .filter(ChatMemory.person_id.isnot(None))\
+            .group_by(ChatMemory.person_id)\
+            .subquery()
+        return self.db.query(Person)\
+            .join(latest, latest.c.person_id == Person.id)\
+            .filter(latest.c.latest_id > func.coalesce(Person.profile_memory_id, 0))\
+            .all()
+
+    @timed_stage("profile_refresh")
+    def refresh_profile(self, person: Person) -> bool:
+        """
+        Fold the person's memories added since the last summary into their profile,
+        committing after each LLM call so progress survives a later failure
+        """
+        profile = load_profile(person.profile_notes)
+        updated = False
+        while True:
+            memories = self.db.query(ChatMemory.id, ChatMemory.text, ChatMemory.compressed_text, ChatMemory.text_dict_id)\
+                .filter(ChatMemory.person_id == person.id, ChatMemory.id > (person.profile_memory_id or 0))\
+                .order_by(ChatMemory.id.asc())\
+                .limit(PROFILE_REFRESH_CHUNKS)\
+                .all()
+            if not memories:
+                return updated
+            texts = ColdStorage(self.db).texts([(m.text, m.compressed_text, m.text_dict_id) for m in memories])
+
+            # Stay within the prompt budget, but always make progress by at least one chunk
+            batch, size = [], 0
+            for memory, text in zip(memories, texts):
+                if batch and size + len(text) > PROFILE_PROMPT_CHARS:
+                    break
+                batch.append((memory.id, text))
+                size += len(text)
+
+            raw = self.llm.generate(self._build_profile_prompt(person.name, profile, [text for _, text in batch]), task="profile_summary")
+            profile = normalize_profile(parse_json_response(raw, dict))
+            person.profile_notes = json.dumps(profile)
+            person.profile_memory_id = batch[-1][0]
+            person.profile_updated_at = datetime.utcnow()
+            self.db.commit()
+            updated = True
+
+    def refresh_profiles(self) -> int:
+        """
+        Refresh every stale profile; returns the number of people updated
+        """
+        refreshed = 0
+        for person in self.stale_people():
+            try:
+                if self.refresh_profile(person):
+                    refreshed += 1
+            except Exception as e:
+                self.db.rollback()
+                print(f"⚠️ Profile refresh failed for {person.name}: {e}")
+        return refreshed
+
+    def _build_profile_prompt(self, name: str, profile: Dict[str, List[str]], texts: List[str]) -> str:
+        chunks = "\n".join(f"- {text}" for text in texts)
+        return (
+            f"You maintain a compact profile of {name} built from their chat messages. "
+            f"Update the profile with anything new in the messages below: interests, preferences, "
+            f"dates mentioned (birthdays, anniversaries, plans) and dislikes. Keep existing entries "
+            f"unless the new messages contradict them, and keep each entry to a few words. "
+            f"Return only a JSON object with the keys {list(PROFILE_FIELDS)}, each a list of strings.\n\n"
+            f"Current profile JSON: {json.dumps(profile)}\n\n"
+            f"New messages:\n{chunks}"
+        )
+
+# (lock, requested) per profile database, so each database has at most one refresh pass running
+_refresh_states: Dict[Optional[str], Tuple[threading.Lock, threading.Event]] = {}
+_refresh_states_lock = threading.Lock()
+
+def _refresh_state(tenant: Optional[str]) -> Tuple[threading.Lock, threading.Event]:
+    with _refresh_states_lock:
+        state = _refresh_states.get(tenant)
+        if state is None:
+            state = _refresh_states[tenant] = (threading.Lock(), threading.Event())
+        return state
+
+def refresh_stale_profiles() -> int:
+    """
+    Background entry point: refresh stale profiles of the current database in a session of its own.
+    Requests arriving while a pass is running are folded into that pass instead of running concurrently.
+    """
+    refresh_lock, refresh_requested = _refresh_state(current_tenant.get())
+    refresh_requested.set()
+    refreshed = 0
+    while refresh_requested.is_set():
+        if not refresh_lock.acquire(blocking=False):
+            # The running pass checks the request again after releasing the lock
+            break
+        try:
+            while refresh_requested.is_set():
+                refresh_requested.clear()
+                db = open_session()
+                try:
+                    refreshed += ProfileService(db).refresh_profiles()
+                finally:
+                    db.close()
+        finally:
+            refresh_lock.release()
+        # A request made after the last check above but before the release could not get the
+        # lock and left its work to this pass; the outer loop picks it up
+    if refreshed:
+        print(f"✅ Refreshed {refreshed} profile summaries")
+    return refreshed
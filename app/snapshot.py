@@ -0,0 +1,257 @@
+"""
+Export and restore the whole memory store as a columnar snapshot: one Parquet file per table
+(chat files, people, memories with their embeddings and MinHash signatures, duplicate references,
+facts, notes) plus a snapshot.json manifest.
+
+Tables are read and written in row groups, so memory stays bounded by SNAPSHOT_ROW_GROUP rows
+whatever the database size. Export first copies the database with the SQLite backup API in one
+step and reads the copy, so the snapshot is consistent while the server keeps writing; writers
+only wait for the page copy. Restore bulk-loads every table in one transaction with the
+secondary indexes dropped, then rebuilds the LSH band index and the indexes.
+
+Usage:
+    python -m app.snapshot export ~/backups/partner-2024-06
+    python -m app.snapshot import ~/backups/partner-2024-06 --replace
+    python -m app.snapshot export ~/backups/alice --profile alice
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import BigInteger, DateTime, Float, Integer, LargeBinary, String, create_engine, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database import (
+    ChatFile, ChatMemory, Fact, MemoryBand, MemoryReference, PartnerNote, Person, SessionLocal,
+    TextDictionary, TENANT_ID_RE, current_tenant, init_db, open_session
+)
+from app.services.cold_storage import ColdStorage
+from app.utils.dedup import band_keys, minhash_signatures, signature_from_bytes, signature_to_bytes
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MANIFEST = "snapshot.json"
+SNAPSHOT_ROW_GROUP = int(os.getenv("SNAPSHOT_ROW_GROUP", "10000"))
+SNAPSHOT_COMPRESSION = os.getenv("SNAPSHOT_COMPRESSION", "zstd")
+
+# (model, columns left out). Cold memories are exported decompressed, so the snapshot needs no
+# dictionaries; LSH bands are derived from the MinHash signatures and rebuilt on restore.
+SNAPSHOT_TABLES = [
+    (ChatFile, ()),
+    (Person, ()),
+    (ChatMemory, ("compressed_text", "text_dict_id")),
+    (MemoryReference, ()),
+    (Fact, ()),
+    (PartnerNote, ()),
+]
+# Emptied by a replacing restore along with the snapshot tables
+DERIVED_TABLES = [MemoryBand, TextDictionary]
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(f"Snapshots need pyarrow (pip install pyarrow): {e}")
+    return pa, pq
+
+def arrow_schema(columns: List):
+    """
+    Arrow schema for SQLAlchemy columns
+    """
+    pa, _ = _pyarrow()
+    fields = []
+    for column in columns:
+        if isinstance(column.type, (Integer, BigInteger)):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, LargeBinary):
+            arrow_type = pa.binary()
+        elif isinstance(column.type, String):
+            arrow_type = pa.string()
+        else:
+            raise TypeError(f"No snapshot type for {column.table.name}.{column.name} ({column.type})")
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable or column.primary_key))
+    return pa.schema(fields)
+
+def row_groups(db: Session, table, columns: List):
+    """
+    Rows of `table` as dicts, SNAPSHOT_ROW_GROUP at a time in primary key order
+    """
+    last_id = None
+    while True:
+        query = select(*columns).order_by(table.c.id).limit(SNAPSHOT_ROW_GROUP)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = [dict(row) for row in db.execute(query).mappings()]
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield rows
+
+def copy_database(db: Session, path: str):
+    """
+    Copy the session's database to `path` with the SQLite backup API. The copy is taken in one
+    step under a read lock, so it is a consistent image even while other connections write.
+    """
+    source = db.connection().connection.dbapi_connection
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+
+def export_snapshot(db: Session, directory: str) -> Dict[str, int]:
+    """
+    Write every snapshot table of the session's database to `directory`; returns rows per table
+    """
+    _pyarrow()  # fail before copying the database
+    os.makedirs(directory, exist_ok=True)
+    # Row groups are read by separate queries, which would each see the writes committed so far;
+    # reading a copy keeps the tables consistent with each other
+    with tempfile.TemporaryDirectory(dir=directory, prefix=".export-") as tmp:
+        copy_path = os.path.join(tmp, "copy.db")
+        copy_database(db, copy_path)
+        copy_engine = create_engine(f"sqlite:///{copy_path}")
+        copy_db = SessionLocal(bind=copy_engine)
+        try:
+            counts = _export_tables(copy_db, directory)
+        finally:
+            copy_db.close()
+            copy_engine.dispose()
+
+    manifest = {"format": SNAPSHOT_FORMAT, "created_at": datetime.utcnow().isoformat(), "tables": counts}
+    with open(os.path.join(directory, SNAPSHOT_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return counts
+
+def _export_tables(db: Session, directory: str) -> Dict[str, int]:
+    pa, pq = _pyarrow()
+    cold_storage = ColdStorage(db)
+    counts = {}
+    for model, excluded in SNAPSHOT_TABLES:
+        table = model.__table__
+        columns = [column for column in table.columns if column.name not in excluded]
+        schema = arrow_schema(columns)
+        # Cold memories are read with their compressed text and decompressed one row group at a time
+        read_columns = list(table.columns) if model is ChatMemory else columns
+        counts[table.name] = 0
+        with pq.ParquetWriter(os.path.join(directory, f"{table.name}.parquet"), schema, compression=SNAPSHOT_COMPRESSION) as writer:
+            for rows in row_groups(db, table, read_columns):
+                if model is ChatMemory:
+                    texts = cold_storage.texts([(row["text"], row["compressed_text"], row["text_dict_id"]) for row in rows])
+                    for row, text in zip(rows, texts):
+                        row["text"] = text
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                counts[table.name] += len(rows)
+    return counts
+
+def rebuild_memory_bands(db: Session) -> int:
+    """
+    Recreate the LSH band index from the stored MinHash signatures (computing signatures for
+    memories without one); returns the number of memories indexed
+    """
+    table = ChatMemory.__table__
+    indexed = 0
+    for rows in row_groups(db, table, [table.c.id, table.c.text, table.c.minhash]):
+        missing = [row for row in rows if row["minhash"] is None]
+        for row, signature in zip(missing, minhash_signatures([row["text"] for row in missing])):
+            row["minhash"] = signature_to_bytes(signature)
+        if missing:
+            db.execute(update(ChatMemory), [{"id": row["id"], "minhash": row["minhash"]} for row in missing])
+        keys = band_keys(np.stack([signature_from_bytes(row["minhash"]) for row in rows]))
+        db.execute(insert(MemoryBand), [
+            {"memory_id": row["id"], "bucket": bucket}
+            for row, row_keys in zip(rows, keys.tolist())
+            for bucket in row_keys
+        ])
+        indexed += len(rows)
+    return indexed
+
+def import_snapshot(db: Session, directory: str, replace: bool = False) -> Dict[str, int]:
+    """
+    Restore a snapshot into the session's database in one transaction. The database must be
+    empty unless `replace`, which deletes its current data first. Row ids are kept, so all
+    references between tables stay valid.
+    """
+    _, pq = _pyarrow()
+    with open(os.path.join(directory, SNAPSHOT_MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')}")
+
+    tables = [model.__table__ for model, _ in SNAPSHOT_TABLES] + [model.__table__ for model in DERIVED_TABLES]
+    if not replace and any(db.execute(select(table.c.id).limit(1)).first() for table in tables):
+        raise ValueError("The database already has data; restore with replace (--replace) to overwrite it")
+
+    counts = {}
+    conn = db.connection()
+    indexes = [index for table in tables for index in table.indexes]
+    try:
+        for table in tables:
+            db.execute(table.delete())
+        # Loading into unindexed tables and indexing once is much faster than updating every index per row
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+        for model, _ in SNAPSHOT_TABLES:
+            table = model.__table__
+            parquet = pq.ParquetFile(os.path.join(directory, f"{table.name}.parquet"))
+            # Columns the snapshot has but this schema does not (a newer version) are skipped
+            names = [name for name in parquet.schema_arrow.names if name in table.c]
+            counts[table.name] = 0
+            for batch in parquet.iter_batches(batch_size=SNAPSHOT_ROW_GROUP, columns=names):
+                rows = batch.to_pylist()
+                if rows:
+                    db.execute(table.insert(), rows)
+                    counts[table.name] += len(rows)
+        counts[MemoryBand.__tablename__] = rebuild_memory_bands(db)
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore a Perfect Partner snapshot")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("directory", help="snapshot directory")
+    parser.add_argument("--replace", action="store_true", help="import: overwrite a database that has data")
+    parser.add_argument("--profile", default=None, help="use this profile's database (as X-Profile-Id)")
+    args = parser.parse_args()
+
+    if args.profile:
+        if not TENANT_ID_RE.fullmatch(args.profile):
+            print("Profile ids are 1-64 letters, digits, '-' or '_'")
+            sys.exit(1)
+        current_tenant.set(args.profile)
+
+    init_db()
+    db = open_session()
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            counts = export_snapshot(db, args.directory)
+        else:
+            counts = import_snapshot(db, args.directory, replace=args.replace)
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+    verb = "Exported" if args.command == "export" else "Restored"
+    print(f"✅ {verb} {summary} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
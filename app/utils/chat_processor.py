@@ -1,43 +1,244 @@
+import mmap
+import os
 import re
-from typing import List, Dict
-import pandas as pd
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Tuple
 from datetime import datetime
 
+from app.utils.fact_extractor import extract_facts
+from app.utils.metrics import timed_stage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# One message header per line: "[1/15/23, 10:30:15 AM] Alice: ...",
+# "1/15/23, 10:30 AM - Alice: ...", 24-hour ones like "15/01/2023, 22:30 - Alice: ..." or
+# "15.01.23, 22:30 - Alice: ...", or "2023-01-15 10:30:15 Alice: ..."
+# iOS exports put a left-to-right mark (U+200E) before the header of attachment messages
+MESSAGE_HEADER_PATTERN = (
+    r'\u200e?(?:\[?(?P<us>\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?\s[AP]M)\]?'
+    r'|\[?(?P<h24>\d{1,2}[/.]\d{1,2}[/.]\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?)\]?'
+    r'|(?P<iso>\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}))'
+    r'(?:\s-)?\s(?P<sender>[^:\n]{1,80}?):\s?'
+)
+MESSAGE_LINE_PATTERN = r'^' + MESSAGE_HEADER_PATTERN + r'(?P<text>.*)$'
+
+# iMessage text exports put the timestamp (optionally with a read receipt) and the sender on
+# lines of their own above the body, with a blank line between messages:
+#   Jan 15, 2023  10:30:15 AM
+#   Alice
+#   Dinner at 8?
+IMESSAGE_HEADER_RE = re.compile(
+    r'^(?P<date>[A-Z][a-z]{2} \d{1,2}, \d{4}) +(?P<time>\d{1,2}:\d{2}:\d{2}\s[AP]M)(?: \([^)\n]*\))?\n'
+    r'(?P<sender>[^:\n]{1,80})\n',
+    re.MULTILINE
+)
+IMESSAGE_TIMESTAMP_FORMAT = '%b %d, %Y %I:%M:%S %p'
+
+# Message bodies that only stand in for an attachment (WhatsApp iOS and Android, iMessage exports)
+MEDIA_PLACEHOLDER_PATTERN = (
+    r'\u200e?(?:<attached: [^>\n]+>|<Media omitted>'
+    r'|(?:image|video|audio|sticker|GIF|Contact card) omitted|(?:[^\n]* )?document omitted'
+    r'|[^\n]+ \(file attached\)|[^\n]*/Library/Messages/Attachments/[^\n]+)[ \t]*'
+)
+MEDIA_LINE_RE = re.compile(r'^' + MESSAGE_HEADER_PATTERN + MEDIA_PLACEHOLDER_PATTERN + r'(?:\n|$)', re.MULTILINE)
+US_TIMESTAMP_FORMATS = [
+    '%m/%d/%y, %I:%M:%S %p',
+    '%m/%d/%y, %I:%M %p',
+    '%m/%d/%Y, %I:%M:%S %p',
+    '%m/%d/%Y, %I:%M %p',
+]
+# 24-hour exports come from day-first locales; month first is only used when the dates prove it
+H24_TIMESTAMP_FORMATS = [
+    '%d/%m/%y, %H:%M:%S',
+    '%d/%m/%y, %H:%M',
+    '%d/%m/%Y, %H:%M:%S',
+    '%d/%m/%Y, %H:%M',
+]
+H24_MONTH_FIRST_FORMATS = [fmt.replace('%d/%m', '%m/%d') for fmt in H24_TIMESTAMP_FORMATS]
+ISO_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+TIMESTAMP_PATTERNS = [
+    r'\[\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?\s[AP]M\]',  # WhatsApp style
+    r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?\s[AP]M',       # Alternative format
+    r'\d{1,2}[/.]\d{1,2}[/.]\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?',       # 24-hour format
+    r'\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}',                            # ISO format
+]
+
+# System messages removed by clean_text, per export language
+SYSTEM_MESSAGES = {
+    'en': [
+        "Messages and calls are end-to-end encrypted",
+        "You changed the group description",
+        "You changed the group icon",
+        "You added",
+        "You removed",
+        "You left",
+        "You joined",
+    ],
+    'es': [
+        "Los mensajes y las llamadas están cifrados de extremo a extremo",
+        "Cambiaste la descripción del grupo",
+        "Cambiaste el ícono del grupo",
+        "Añadiste",
+        "Eliminaste",
+        "Saliste",
+        "Te uniste",
+    ],
+    'pt': [
+        "As mensagens e as chamadas são protegidas com a criptografia de ponta a ponta",
+        "Você mudou a descrição do grupo",
+        "Você mudou a imagem do grupo",
+        "Você adicionou",
+        "Você removeu",
+        "Você saiu",
+        "Você entrou",
+    ],
+    'fr': [
+        "Les messages et les appels sont chiffrés de bout en bout",
+        "Vous avez modifié la description du groupe",
+        "Vous avez modifié l’icône de ce groupe",
+        "Vous avez ajouté",
+        "Vous avez retiré",
+        "Vous êtes parti",
+        "Vous avez rejoint",
+    ],
+    'de': [
+        "Nachrichten und Anrufe sind Ende-zu-Ende-verschlüsselt",
+        "Du hast die Gruppenbeschreibung geändert",
+        "Du hast das Gruppenbild geändert",
+        "Du hast die Gruppe verlassen",
+        "Du bist beigetreten",
+    ],
+}
+DEFAULT_LOCALES = tuple(os.getenv("CHAT_LOCALES", "en").split(','))
+
+def _phrase_trie_pattern(phrases: List[str]) -> str:
+    """
+    Build a regex from a character trie of the phrases, so shared prefixes are matched once
+    (Aho-Corasick style) instead of retrying every phrase at each position
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ''
+        optional = '' in node
+        if len(alternatives) == 1 and not optional:
+            return alternatives[0]
+        group = '(?:' + '|'.join(alternatives) + ')'
+        return group + '?' if optional else group
+
+    return build(trie)
+
+@lru_cache(maxsize=None)
+def compile_cleaner(locales: Tuple[str, ...] = DEFAULT_LOCALES) -> 're.Pattern':
+    """
+    One combined pattern matching every timestamp format and every system message of the
+    given locales, so clean_text removes them all in a single scan
+    """
+    phrases = [phrase for locale in locales for phrase in SYSTEM_MESSAGES.get(locale.strip(), [])]
+    removable = TIMESTAMP_PATTERNS + ([_phrase_trie_pattern(phrases)] if phrases else [])
+    return re.compile('|'.join(removable))
+
+# Compiled once at import for the configured locales
+DEFAULT_CLEANER = compile_cleaner(DEFAULT_LOCALES)
+
+# Conversation chunking defaults
+CHUNK_MAX_TOKENS = 256
+CHUNK_GAP_MINUTES = 60
+CHUNK_OVERLAP_MESSAGES = 1
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English chat text)
+    """
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text at spaces into pieces of at most `max_chars`; longer words are cut
+    """
+    pieces, current = [], ''
+    for word in text.split(' '):
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+def fact_text(chunk: Dict) -> str:
+    """
+    The chunk's own lines, without the overlap lines repeated from the previous chunk, so facts
+    in the overlap are not extracted (and counted) twice
+    """
+    overlap = chunk.get('overlap_messages') or 0
+    return '\n'.join(chunk['text'].split('\n')[overlap:]) if overlap else chunk['text']
+
 class ChatProcessor:
-    def __init__(self):
-        self.timestamp_patterns = [
-            r'\[\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?\s[AP]M\]',  # WhatsApp style
-            r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?::\d{2})?\s[AP]M',       # Alternative format
-            r'\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}',                            # ISO format
-        ]
+    def __init__(
+        self,
+        max_chunk_tokens: int = CHUNK_MAX_TOKENS,
+        gap_minutes: int = CHUNK_GAP_MINUTES,
+        overlap_messages: int = CHUNK_OVERLAP_MESSAGES,
+        locales: Tuple[str, ...] = DEFAULT_LOCALES
+    ):
+        self.max_chunk_tokens = max_chunk_tokens
+        self.gap_minutes = gap_minutes
+        self.overlap_messages = overlap_messages
+        self.timestamp_patterns = TIMESTAMP_PATTERNS
+        self.cleaner = compile_cleaner(tuple(locales))
         
+    def read_export(self, path: str) -> str:
+        """
+        Decode an export file straight from a memory map, without an intermediate bytes copy
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8')
+
+    def normalize_export(self, text: str) -> str:
+        """
+        Rewrite iMessage message headers as one-line ISO headers ("2023-01-15 10:30:15 Alice: "),
+        so every export is parsed line by line. Other formats are returned unchanged.
+        """
+        def iso_header(match: 're.Match') -> str:
+            timestamp = datetime.strptime(f"{match['date']} {' '.join(match['time'].split())}", IMESSAGE_TIMESTAMP_FORMAT)
+            return f"{timestamp:{ISO_TIMESTAMP_FORMAT}} {match['sender'].strip()}: "
+
+        return IMESSAGE_HEADER_RE.sub(iso_header, text)
+
+    def strip_media_lines(self, text: str) -> Tuple[str, int]:
+        """
+        Drop messages that are only attachment placeholders ("image omitted", "<attached: ...>").
+        Returns the remaining text and the number of attachments found.
+        """
+        return MEDIA_LINE_RE.subn('', text)
+
     def clean_text(self, text: str) -> str:
         """
-        Remove system messages, timestamps, and clean up the text
+        Remove system messages, timestamps, and clean up the text in a single pass
         """
-        # Remove timestamps
-        for pattern in self.timestamp_patterns:
-            text = re.sub(pattern, '', text)
-        
-        # Remove system messages (e.g., "Messages and calls are end-to-end encrypted")
-        system_messages = [
-            "Messages and calls are end-to-end encrypted",
-            "You changed the group description",
-            "You changed the group icon",
-            "You added",
-            "You removed",
-            "You left",
-            "You joined",
-        ]
-        
-        for message in system_messages:
-            text = text.replace(message, '')
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        return text
+        # str.split() collapses whitespace exactly like re.sub(r'\s+', ' ') + strip(), in C
+        return ' '.join(self.cleaner.sub('', text).split())
     
     def split_into_chunks(self, text: str, max_chunk_size: int = 1000) -> List[str]:
         """
@@ -70,7 +271,142 @@ class ChatProcessor:
         
         return chunks
     
-    def extract_metadata(self, text: str) -> Dict:
+    def chunk_messages(self, messages: 'pd.DataFrame') -> List[Dict]:
+        """
+        Group parsed messages into conversation chunks. A new chunk starts at every time gap of
+        more than `gap_minutes`, and before the token budget would be exceeded; that break is
+        moved back to the last sender shift when the turn it cuts off is short. Consecutive
+        chunks of one conversation share their last `overlap_messages` lines. A message longer
+        than the budget is split into budget-sized pieces, each starting with its sender.
+        Each chunk is a dict with text, timestamp (of its first message), end_timestamp,
+        sender (who wrote most of it), message_count and overlap_messages (leading lines
+        repeated from the previous chunk).
+        """
+        import pandas as pd
+
+        if messages.empty:
+            return []
+        cleaned = messages['text'].map(self.clean_text)
+        keep = cleaned != ''
+        messages = messages[keep]
+        if messages.empty:
+            return []
+        budget = self.max_chunk_tokens
+        message_lines = (messages['sender'] + ': ' + cleaned[keep]).tolist()
+        message_senders = messages['sender'].tolist()
+        message_session = (messages['timestamp'].diff() > pd.Timedelta(minutes=self.gap_minutes)).tolist()
+        message_shift = (messages['sender'] != messages['sender'].shift()).tolist()
+        message_timestamps = messages['timestamp'].tolist()
+
+        # One line per message, or per piece of a message over the budget
+        lines, sources, first_piece = [], [], []
+        for m, line in enumerate(message_lines):
+            if estimate_tokens(line) <= budget:
+                lines.append(line)
+                sources.append(m)
+                first_piece.append(True)
+                continue
+            prefix = message_senders[m] + ': '
+            max_chars = max(budget * CHARS_PER_TOKEN - len(prefix), CHARS_PER_TOKEN)
+            for n, piece in enumerate(split_text(line[len(prefix):], max_chars)):
+                lines.append(prefix + piece)
+                sources.append(m)
+                first_piece.append(n == 0)
+        tokens = [estimate_tokens(line) for line in lines]
+        new_session = [first and message_session[m] for m, first in zip(sources, first_piece)]
+        sender_shift = [first and message_shift[m] for m, first in zip(sources, first_piece)]
+        timestamps = [message_timestamps[m] for m in sources]
+        senders = [message_senders[m] for m in sources]
+
+        chunks = []
+
+        def emit(indexes: List[int], overlap: int):
+            sender_tokens = {}
+            for i in indexes:
+                sender_tokens[senders[i]] = sender_tokens.get(senders[i], 0) + tokens[i]
+            start, end = timestamps[indexes[0]], timestamps[indexes[-1]]
+            chunks.append({
+                'text': '\n'.join(lines[i] for i in indexes),
+                'timestamp': None if pd.isna(start) else start.to_pydatetime(),
+                'end_timestamp': None if pd.isna(end) else end.to_pydatetime(),
+                'sender': max(sender_tokens, key=sender_tokens.get),
+                'message_count': len({sources[i] for i in indexes}),
+                'overlap_messages': overlap,
+            })
+
+        current = []  # indexes into lines
+        current_tokens = 0
+        current_overlap = 0  # leading lines of current already emitted in the previous chunk
+        for i in range(len(lines)):
+            if current and new_session[i]:
+                emit(current, current_overlap)
+                current, current_tokens, current_overlap = [], 0, 0
+            elif current and current_tokens + tokens[i] > budget:
+                split = len(current)
+                if not sender_shift[i]:
+                    # Move the unfinished turn to the next chunk if it is short
+                    for k in range(len(current) - 1, 0, -1):
+                        if sender_shift[current[k]]:
+                            if sum(tokens[j] for j in current[k:]) + tokens[i] <= budget // 2:
+                                split = k
+                            break
+                head, tail = current[:split], current[split:]
+                emit(head, current_overlap)
+                overlap = head[-self.overlap_messages:] if self.overlap_messages else []
+                current = overlap + tail
+                current_overlap = len(overlap)
+                current_tokens = sum(tokens[j] for j in current)
+                if current_tokens + tokens[i] > budget:
+                    current, current_overlap = tail, 0
+                    current_tokens = sum(tokens[j] for j in current)
+            current.append(i)
+            current_tokens += tokens[i]
+
+        if current:
+            emit(current, current_overlap)
+        return chunks
+
+    def parse_messages(self, text: str) -> 'pd.DataFrame':
+        """
+        Parse the export into one row per message with timestamp, sender and text.
+        Lines without a message header are continuations of the previous message.
+        """
+        # pandas is imported on first use so importing the app does not pay for it
+        import pandas as pd
+
+        lines = pd.Series(text.splitlines(), dtype=object)
+        parts = lines.str.extract(MESSAGE_LINE_PATTERN)
+        is_header = parts['sender'].notna()
+        if not is_header.any():
+            return pd.DataFrame({
+                'timestamp': pd.Series(dtype='datetime64[ns]'),
+                'sender': pd.Series(dtype=object),
+                'text': pd.Series(dtype=object),
+            })
+
+        # Number messages by header and attach continuation lines to their header
+        message_id = is_header.cumsum()
+        body = parts['text'].where(is_header, lines)
+        keep = message_id > 0
+        headers = parts[is_header]
+
+        us = headers['us'].str.replace(r'\s+', ' ', regex=True)
+        timestamps = pd.to_datetime(headers['iso'], format=ISO_TIMESTAMP_FORMAT, errors='coerce')
+        for fmt in US_TIMESTAMP_FORMATS:
+            timestamps = timestamps.fillna(pd.to_datetime(us, format=fmt, errors='coerce'))
+        h24 = headers['h24'].str.replace(r'\s+', ' ', regex=True).str.replace('.', '/', regex=False)
+        month_first = (h24.str.extract(r'^\d{1,2}/(\d{1,2})/', expand=False).astype(float) > 12).any()
+        for fmt in H24_MONTH_FIRST_FORMATS if month_first else H24_TIMESTAMP_FORMATS:
+            timestamps = timestamps.fillna(pd.to_datetime(h24, format=fmt, errors='coerce'))
+
+        texts = body[keep].groupby(message_id[keep]).agg('\n'.join)
+        return pd.DataFrame({
+            'timestamp': timestamps.to_numpy(),
+            'sender': headers['sender'].str.strip().to_numpy(),
+            'text': texts.to_numpy(),
+        })
+
+    def extract_metadata(self, text: str, parsed_messages: 'pd.DataFrame' = None) -> Dict:
         """
         Extract metadata from chat messages
         """
@@ -110,17 +446,46 @@ class ChatProcessor:
                 metadata['participants'].add(participant)
         
         metadata['participants'] = list(metadata['participants'])
+
+        # Parsed message headers are more reliable than the line heuristics above
+        if parsed_messages is not None and not parsed_messages.empty:
+            metadata['total_messages'] = len(parsed_messages)
+            metadata['participants'] = list(parsed_messages['sender'].unique())
+            timestamps = parsed_messages['timestamp'].dropna()
+            if not timestamps.empty:
+                metadata['date_range']['start'] = timestamps.min().to_pydatetime()
+                metadata['date_range']['end'] = timestamps.max().to_pydatetime()
+
+        for key in ('start', 'end'):
+            if metadata['date_range'][key]:
+                metadata['date_range'][key] = metadata['date_range'][key].isoformat()
         return metadata
     
+    @timed_stage("process_chat")
     def process_chat(self, text: str) -> Dict:
         """
         Process the entire chat history
         """
-        cleaned_text = self.clean_text(text)
-        chunks = self.split_into_chunks(cleaned_text)
-        metadata = self.extract_metadata(text)
+        text, attachments = self.strip_media_lines(self.normalize_export(text))
+        messages = self.parse_messages(text)
+        if messages.empty:
+            # Unrecognised export format: fall back to budget-sized pieces of the cleaned text
+            # (cleaning joins the lines, so they are cut at spaces, not at blank lines)
+            chunks = [
+                {'text': chunk, 'timestamp': None, 'end_timestamp': None, 'sender': None, 'message_count': None,
+                 'overlap_messages': 0}
+                for chunk in split_text(self.clean_text(text), self.max_chunk_tokens * CHARS_PER_TOKEN)
+            ]
+        else:
+            chunks = self.chunk_messages(messages)
+        with timed_stage("fact_extraction"):
+            for chunk in chunks:
+                chunk['facts'] = extract_facts(fact_text(chunk))
+        metadata = self.extract_metadata(text, messages)
+        metadata['attachments'] = attachments
         
         return {
             'chunks': chunks,
+            'messages': messages,
             'metadata': metadata
         } 
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Bounded thread pools for blocking database and LLM work, so async routes never block the event loop
+"""
+import os
+from functools import partial
+
+import anyio
+
+DB_WORKER_THREADS = int(os.getenv("DB_WORKER_THREADS", "16"))
+LLM_WORKER_THREADS = int(os.getenv("LLM_WORKER_THREADS", "8"))
+
+# Limiters are created lazily because they must be bound to the running event loop
+_limiters = {}
+
+def _get_limiter(name: str, total_tokens: int) -> anyio.CapacityLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = anyio.CapacityLimiter(total_tokens)
+        _limiters[name] = limiter
+    return limiter
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a short blocking database call in the database thread pool
+    """
+    limiter = _get_limiter("db", DB_WORKER_THREADS)
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=limiter)
+
+async def run_llm(func, *args, **kwargs):
+    """
+    Run a slow blocking call (LLM round trips, chat ingestion) in its own thread pool,
+    so in-flight generations cannot starve the database pool used by other endpoints
+    """
+    limiter = _get_limiter("llm", LLM_WORKER_THREADS)
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=limiter)
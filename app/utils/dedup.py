@@ -0,0 +1,78 @@
+"""
+MinHash signatures and LSH banding for near-duplicate chunk detection.
+
+Each chunk is reduced to word 3-gram shingles, hashed under NUM_PERM universal hash
+functions, and the per-function minima form its signature. Signatures are cut into
+LSH_BANDS bands; chunks sharing any band bucket are candidates, and candidates whose
+estimated Jaccard similarity reaches DEDUP_THRESHOLD are treated as duplicates.
+"""
+import os
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+SIGNATURE_BLOCK = 256  # chunks hashed per vectorized block, bounds the temporary matrix
+
+# Universal hashing (a*x + b) mod p with a Mersenne prime small enough that a*x fits in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_BAND_MULTIPLIER = np.uint64(0x100000001B3)
+
+WORD_RE = re.compile(r'\w+')
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """
+    CRC32 hashes of the distinct word 3-grams of `text` (the whole text if it is shorter)
+    """
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """
+    MinHash signatures of `texts` as a (len(texts), NUM_PERM) uint32 array
+    """
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_BLOCK):
+        shingles = [shingle_hashes(t) for t in texts[start:start + SIGNATURE_BLOCK]]
+        offsets = np.cumsum([0] + [len(s) for s in shingles[:-1]])
+        flat = np.concatenate(shingles) % _PRIME
+        values = (_A[:, None] * flat[None, :] + _B[:, None]) % _PRIME
+        signatures[start:start + len(shingles)] = np.minimum.reduceat(values, offsets, axis=1).T
+    return signatures
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """
+    One 64-bit bucket key per LSH band, as a (n, LSH_BANDS) int64 array.
+    The band index is folded into the key so a single indexed column holds every band.
+    """
+    bands = signatures.reshape(len(signatures), LSH_BANDS, LSH_ROWS).astype(np.uint64)
+    keys = np.broadcast_to(np.arange(LSH_BANDS, dtype=np.uint64), bands.shape[:2]).copy()
+    with np.errstate(over='ignore'):
+        for row in range(LSH_ROWS):
+            keys = keys * _BAND_MULTIPLIER + bands[:, :, row]
+    return keys.view(np.int64)
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estimated Jaccard similarity of two signatures
+    """
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u4').tobytes()
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<u4')
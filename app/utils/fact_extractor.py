@@ -0,0 +1,125 @@
+"""
+Rule-based extraction of typed facts (dates, places, products, likes, dislikes) from chat chunks,
+and mapping of fact-style questions onto the fact types that answer them
+"""
+import re
+from typing import Dict, List, Optional
+
+FACT_TYPES = ("date", "place", "product", "like", "dislike")
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_PHRASE = r"[^.,!?;:\n]{2,60}"
+
+FACT_PATTERNS = [
+    ("date", re.compile(
+        r"\b(?P<label>birthday|bday|anniversary)\b[^.!?\n]{0,30}?\b(?:on|is|=)\s+"
+        r"(?P<value>\d{1,2}/\d{1,2}(?:/\d{2,4})?|" + _MONTH + r"\s+\d{1,2}(?:st|nd|rd|th)?|\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r")",
+        re.IGNORECASE
+    )),
+    # Places are proper nouns, so only the verb is matched case-insensitively
+    ("place", re.compile(
+        r"\b(?i:went to|trip to|go to|been to|visit|visited|dinner at|lunch at|brunch at|drinks at|pizza at|sushi at)\s+"
+        r"(?P<value>(?:the\s+)?[A-Z][\w'’&-]*(?:\s+[A-Z][\w'’&-]*){0,3})"
+    )),
+    ("product", re.compile(
+        r"\b(?:been wanting|wish I had|get me|buy me|bought|gift(?:ed)? me)\s+(?P<value>(?:a|an|the|some)\s+" + _PHRASE + r")",
+        re.IGNORECASE
+    )),
+    ("like", re.compile(
+        r"\b(?:really love|love|loves|enjoy|enjoys|obsessed with|favou?rite(?: \w+)? is)\s+(?P<value>" + _PHRASE + r")",
+        re.IGNORECASE
+    )),
+    ("dislike", re.compile(
+        r"\b(?:not a fan of|hate|hates|don't like|do not like|can't stand|allergic to)\s+(?P<value>" + _PHRASE + r")",
+        re.IGNORECASE
+    )),
+]
+
+# Per-item instructions for LLM fact extraction, answered in extract_facts() output form
+FACT_EXTRACTION_INSTRUCTIONS = (
+    f"Each item is an excerpt of a chat transcript (lines of \"Sender: message\"). List the facts it "
+    f"mentions about the people chatting, as a JSON array of objects with the keys \"type\" (one of "
+    f"{', '.join(FACT_TYPES)}), \"label\" (e.g. \"birthday\" for dates, otherwise null), \"value\" "
+    f"(a few words) and \"sender\" (who said it). Use an empty array if there are none."
+)
+
+# Trailing clauses that are not part of the fact ("a fountain pen for ages" -> "a fountain pen")
+VALUE_STOP_RE = re.compile(r"\s+(?:for|this|next|last|on|when|because|but|with you|so|too|haha)\b.*$", re.IGNORECASE)
+VALUE_TRIM_RE = re.compile(r"^[\W_]+|[\W_]+$")
+# "love you", "hate it" and similar carry no fact
+NON_FACT_VALUES = {
+    "you", "u", "ya", "it", "that", "this", "him", "her", "them", "me", "us", "to", "when", "how", "the way",
+}
+MAX_VALUE_WORDS = 6
+MAX_SENDER_LENGTH = 60
+
+QUESTION_FACT_TYPES = [
+    (re.compile(r"\b(?:birthday|bday|anniversary|when)\b", re.IGNORECASE), ("date",)),
+    (re.compile(r"\b(?:restaurant|where|place|trip|travel|visit|dinner|eat)\b", re.IGNORECASE), ("place", "like")),
+    (re.compile(r"\b(?:gift|present|buy|get (?:her|him|them))\b", re.IGNORECASE), ("product", "like")),
+    (re.compile(r"\b(?:like|likes|love|loves|favou?rite|enjoy|into)\b", re.IGNORECASE), ("like",)),
+    (re.compile(r"\b(?:hate|dislike|avoid|not a fan|allerg\w*)\b", re.IGNORECASE), ("dislike",)),
+]
+QUESTION_LABEL_RE = re.compile(r"\b(birthday|anniversary)\b", re.IGNORECASE)
+
+def _clean_value(value: str) -> Optional[str]:
+    value = VALUE_TRIM_RE.sub('', VALUE_STOP_RE.sub('', value.strip()))
+    words = value.split()
+    if not words or len(words) > MAX_VALUE_WORDS or value.lower() in NON_FACT_VALUES or words[0].lower() in NON_FACT_VALUES:
+        return None
+    return value
+
+def extract_facts(text: str) -> List[Dict]:
+    """
+    Facts mentioned in a chunk, one per distinct (type, label, value, sender).
+    Chunk lines look like "Sender: message"; the sender is None when a line has no prefix.
+    """
+    facts = {}
+    for line in text.splitlines():
+        sender, separator, message = line.partition(': ')
+        if not separator or len(sender) > MAX_SENDER_LENGTH:
+            sender, message = None, line
+        for fact_type, pattern in FACT_PATTERNS:
+            for match in pattern.finditer(message):
+                value = _clean_value(match.group('value'))
+                if not value:
+                    continue
+                label = match.group('label').lower() if 'label' in pattern.groupindex else None
+                if label == 'bday':
+                    label = 'birthday'
+                key = (fact_type, label, value.lower(), sender)
+                if key not in facts:
+                    facts[key] = {"fact_type": fact_type, "label": label, "value": value, "sender": sender}
+    return list(facts.values())
+
+def normalize_fact(fact: Dict, default_sender: str = None) -> Optional[Dict]:
+    """
+    Validate a fact returned by the LLM ({"type", "label", "value", "sender"}) into extractor form
+    """
+    if not isinstance(fact, dict):
+        return None
+    fact_type = str(fact.get("type") or fact.get("fact_type") or "").lower()
+    value = str(fact.get("value") or "").strip()[:255]
+    if fact_type not in FACT_TYPES or not value:
+        return None
+    label = fact.get("label")
+    return {
+        "fact_type": fact_type,
+        "label": str(label).lower()[:64] if label else None,
+        "value": value,
+        "sender": fact.get("sender") or default_sender,
+    }
+
+def question_fact_types(question: str) -> List[str]:
+    """
+    Fact types that can answer `question`, most specific first; empty if it is not fact-style
+    """
+    types = []
+    for pattern, fact_types in QUESTION_FACT_TYPES:
+        if pattern.search(question):
+            types.extend(t for t in fact_types if t not in types)
+    return types
+
+def question_label(question: str) -> Optional[str]:
+    match = QUESTION_LABEL_RE.search(question)
+    return match.group(1).lower() if match else None
@@ -0,0 +1,124 @@
+"""
+Conditional GET support for read endpoints: ETag / Last-Modified derived from the data version
+of the request's database, with 304 Not Modified answers when the client's copy is current
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event
+
+from app.models.database import SessionLocal, current_tenant, get_data_version, open_session
+from app.utils.concurrency import run_db
+
+# How long a version read from the database is trusted before re-checking (writes made by this
+# process invalidate it immediately; other processes, e.g. bulk imports, are seen within this window)
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "1.0"))
+
+class DataVersionCache:
+    """
+    Process-wide cache of one database's data version so unchanged reads cost no database round trip
+    """
+    def __init__(self, ttl: float = DATA_VERSION_TTL):
+        self.ttl = ttl
+        self._value = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def cached(self):
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._checked_at < self.ttl:
+                return self._value
+        return None
+
+    def refresh(self):
+        with self._lock:
+            generation = self._generation
+        db = open_session()
+        try:
+            value = get_data_version(db)
+        finally:
+            db.close()
+        with self._lock:
+            # A commit during the read may have made `value` stale; don't cache it then
+            if generation == self._generation:
+                self._value = value
+                self._checked_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+_data_versions: Dict[Optional[str], DataVersionCache] = {}
+_data_versions_lock = threading.Lock()
+
+def data_version_cache(tenant: Optional[str]) -> DataVersionCache:
+    """
+    Data version cache of a profile's database (None: the default database)
+    """
+    with _data_versions_lock:
+        cache = _data_versions.get(tenant)
+        if cache is None:
+            cache = _data_versions[tenant] = DataVersionCache()
+        return cache
+
+def prune_data_versions(open_tenants) -> int:
+    """
+    Drop the caches of profile databases that are no longer open; returns how many were dropped
+    """
+    with _data_versions_lock:
+        stale = [tenant for tenant in _data_versions if tenant is not None and tenant not in open_tenants]
+        for tenant in stale:
+            del _data_versions[tenant]
+        return len(stale)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_data_version(session):
+    if session.info.pop("data_version_bumped", False):
+        data_version_cache(session.info.get("tenant")).invalidate()
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _not_modified_since(if_modified_since: str, updated_at: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return updated_at.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+async def conditional_get(request: Request, response: Response):
+    """
+    Dependency for read endpoints: raise 304 when If-None-Match (or, without it, If-Modified-Since)
+    shows the client already has the current data; otherwise tag the response with ETag and Last-Modified
+    """
+    tenant = current_tenant.get()
+    cache = data_version_cache(tenant)
+    version, updated_at = cache.cached() or await run_db(cache.refresh)
+    # Versions of different profile databases overlap, so the profile is part of the tag
+    etag = f'"{version}"' if tenant is None else f'"{tenant}-{version}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "no-cache",
+        "Vary": "X-Profile-Id",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (if_none_match and _etag_matches(if_none_match, etag)) or \
+            (not if_none_match and if_modified_since and _not_modified_since(if_modified_since, updated_at)):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
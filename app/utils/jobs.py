@@ -0,0 +1,84 @@
+"""
+In-memory registry of background jobs (e.g. chat ingestion started with ?background=true),
+polled by clients through /api/jobs/{job_id}
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+# How long finished jobs stay pollable before they are pruned
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+class JobRegistry:
+    """
+    Thread-safe store of job records; finished jobs older than the TTL are dropped on access
+    """
+    def __init__(self, ttl: int = JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, kind: str) -> Dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._prune()
+            self._jobs[job["id"]] = job
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def start(self, job_id: str):
+        self._update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+
+    def succeed(self, job_id: str, result):
+        self._finish(job_id, status="succeeded", result=result)
+
+    def fail(self, job_id: str, error: str, status_code: int = 500):
+        self._finish(job_id, status="failed", error={"status_code": status_code, "detail": error})
+
+    def _finish(self, job_id: str, **fields):
+        self._update(job_id, finished_at=datetime.utcnow().isoformat(), **fields)
+        with self._lock:
+            self._finished_at[job_id] = time.monotonic()
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def prune(self) -> int:
+        """
+        Drop expired jobs now (maintenance); returns how many were dropped
+        """
+        with self._lock:
+            return self._prune()
+
+    def _prune(self) -> int:
+        cutoff = time.monotonic() - self.ttl
+        expired = [job_id for job_id, finished in self._finished_at.items() if finished < cutoff]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            del self._finished_at[job_id]
+        return len(expired)
+
+JOBS = JobRegistry()
@@ -0,0 +1,100 @@
+"""
+Lightweight latency histograms for endpoints and internal stages, rendered in Prometheus text format
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request list of (stage, seconds), set by the HTTP middleware
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram keyed by a tuple of label values
+    """
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[labels] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (bucket_counts, total, count) in items:
+            label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            prefix = f"{label_str}," if label_str else ""
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_str}}} {total}")
+            lines.append(f"{self.name}_count{{{label_str}}} {count}")
+        return lines
+
+REQUEST_LATENCY = Histogram(
+    "perfect_partner_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("method", "route", "status"),
+)
+STAGE_LATENCY = Histogram(
+    "perfect_partner_stage_duration_seconds",
+    "Latency of internal pipeline stages (LLM, parsing, DB, retrieval)",
+    ("stage",),
+)
+
+@contextmanager
+def timed_stage(stage: str):
+    """
+    Time a block (or, used as a decorator, a function) as an internal pipeline stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe((stage,), elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """
+    Start collecting stage timings for the current request and return the shared list
+    """
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """
+    Format stage timings as a Server-Timing header value (durations in milliseconds)
+    """
+    parts = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+def render_metrics() -> str:
+    lines = REQUEST_LATENCY.render() + STAGE_LATENCY.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,37 @@
+"""
+Routing of requests to per-profile databases: the X-Profile-Id header selects the profile
+whose SQLite file every session opened while handling the request (including its background
+tasks and jobs) is bound to
+"""
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.models.database import TENANT_ID_RE, current_tenant
+
+TENANT_HEADER = "X-Profile-Id"
+
+class TenantMiddleware:
+    """
+    Set the current profile from the X-Profile-Id header for the rest of the request.
+    Requests without it use the default database; malformed ids are rejected with 400.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tenant = Headers(scope=scope).get(TENANT_HEADER)
+        if tenant is not None and not TENANT_ID_RE.fullmatch(tenant):
+            response = JSONResponse(
+                {"detail": f"{TENANT_HEADER} must be 1-64 letters, digits, '-' or '_'"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+        token = current_tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
@@ -0,0 +1,192 @@
+"""
+Spool uploaded chat exports to disk in fixed-size blocks instead of holding them in memory,
+and pull text transcripts out of "export with media" ZIP archives without extracting media
+"""
+import codecs
+import hashlib
+import os
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, List, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.concurrency import run_llm
+
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+ZIP_MAGIC = b'PK\x03\x04'
+TRANSCRIPT_EXTENSIONS = ('.txt',)
+
+class UploadTooLarge(Exception):
+    """
+    Raised when an upload exceeds the configured size cap
+    """
+
+class SpooledUpload:
+    """
+    An upload written to a temporary file, with its size and SHA-256 content hash.
+    Use as a context manager to remove the temporary file afterwards.
+    """
+    def __init__(self, path: str, filename: str, size: int, content_hash: str, is_archive: bool = False):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.content_hash = content_hash
+        self.is_archive = is_archive
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+class UploadLimitMiddleware:
+    """
+    Reject multipart bodies larger than MAX_UPLOAD_BYTES before they are received. Starlette
+    parses (and buffers) the whole multipart body before a route runs, so spool_upload's own
+    check only fires once the upload has been stored. A declared Content-Length over the limit
+    is rejected up front; chunked bodies are counted as they arrive.
+    """
+    def __init__(self, app: ASGIApp, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+        self.detail = f"Upload exceeds the {max_bytes} byte limit"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        if headers is None or not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        length = headers.get("content-length")
+        if length and length.isdigit() and int(length) > self.limit:
+            response = JSONResponse({"detail": self.detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    # Raised inside request.form(); FastAPI passes HTTPExceptions through body parsing
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def spool_file(
+    source: BinaryIO,
+    filename: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    block_size: int = UPLOAD_BLOCK_SIZE
+) -> SpooledUpload:
+    """
+    Copy a file object to a temp file block by block, hashing it and validating UTF-8 as it goes.
+    ZIP archives are detected from their first bytes and spooled without UTF-8 validation.
+    Raises UploadTooLarge past `max_bytes` and UnicodeDecodeError for non UTF-8 text.
+    """
+    hasher = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    size = 0
+    is_archive = None
+    fd, path = tempfile.mkstemp(prefix="perfect_partner_upload_")
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = source.read(block_size)
+                if not block:
+                    break
+                if is_archive is None:
+                    is_archive = block.startswith(ZIP_MAGIC)
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                hasher.update(block)
+                if not is_archive:
+                    decoder.decode(block)
+                out.write(block)
+            decoder.decode(b'', final=True)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, filename, size, hasher.hexdigest(), is_archive=bool(is_archive))
+
+async def spool_upload(
+    upload: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    block_size: int = UPLOAD_BLOCK_SIZE
+) -> SpooledUpload:
+    """
+    Spool an upload with spool_file in a worker thread: reading, hashing, UTF-8 validation and
+    writing are all blocking, so none of it runs on the event loop
+    """
+    return await run_llm(spool_file, upload.file, upload.filename, max_bytes, block_size)
+
+def _is_metadata_entry(info: zipfile.ZipInfo) -> bool:
+    """
+    Directories and macOS resource-fork entries carry no chat content or media
+    """
+    name = info.filename
+    return info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.')
+
+def extract_transcripts(
+    archive: SpooledUpload,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    block_size: int = UPLOAD_BLOCK_SIZE
+) -> Tuple[List[SpooledUpload], Dict]:
+    """
+    Stream the text transcripts out of a ZIP archive into their own temp files, skipping media.
+    Returns the spooled transcripts and a summary of the archive's media entries.
+    The caller owns (and must clean up) the returned transcripts.
+    """
+    transcripts = []
+    summary = {"filename": archive.filename, "transcripts": 0, "media_files": 0, "media_bytes": 0}
+    try:
+        with zipfile.ZipFile(archive.path) as zf:
+            for info in zf.infolist():
+                if _is_metadata_entry(info):
+                    continue
+                if not info.filename.lower().endswith(TRANSCRIPT_EXTENSIONS):
+                    summary["media_files"] += 1
+                    summary["media_bytes"] += info.file_size
+                    continue
+
+                hasher = hashlib.sha256()
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                size = 0
+                fd, path = tempfile.mkstemp(prefix="perfect_partner_transcript_", suffix=".txt")
+                transcripts.append(SpooledUpload(path, f"{archive.filename}/{info.filename}", 0, None))
+                with os.fdopen(fd, 'wb') as out, zf.open(info) as member:
+                    while True:
+                        block = member.read(block_size)
+                        if not block:
+                            break
+                        size += len(block)
+                        if size > max_bytes:
+                            raise UploadTooLarge(f"Transcript {info.filename} exceeds the {max_bytes} byte limit")
+                        hasher.update(block)
+                        decoder.decode(block)
+                        out.write(block)
+                    decoder.decode(b'', final=True)
+                transcripts[-1].size = size
+                transcripts[-1].content_hash = hasher.hexdigest()
+    except BaseException:
+        for transcript in transcripts:
+            transcript.cleanup()
+        raise
+    summary["transcripts"] = len(transcripts)
+    return transcripts, summary
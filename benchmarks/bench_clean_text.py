@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: single-pass compiled ChatProcessor.clean_text against the previous
+multi-pass implementation (three timestamp re.sub passes, one str.replace per system
+message, one whitespace pass), on a whole export and on individual messages.
+
+Usage:
+    python -m benchmarks.bench_clean_text --messages 50000
+"""
+import argparse
+import json
+import re
+import timeit
+
+from app.utils.chat_processor import ChatProcessor, TIMESTAMP_PATTERNS
+from benchmarks.synthetic_chats import generate_chat_export
+
+LEGACY_SYSTEM_MESSAGES = [
+    "Messages and calls are end-to-end encrypted",
+    "You changed the group description",
+    "You changed the group icon",
+    "You added",
+    "You removed",
+    "You left",
+    "You joined",
+]
+
+def legacy_clean_text(text: str) -> str:
+    for pattern in TIMESTAMP_PATTERNS:
+        text = re.sub(pattern, '', text)
+    for message in LEGACY_SYSTEM_MESSAGES:
+        text = text.replace(message, '')
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def best_of(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    processor = ChatProcessor()
+    text = generate_chat_export("whatsapp", args.messages, 3, 90, seed=3)
+    lines = text.splitlines()
+
+    # The compiled cleaner keeps the legacy semantics
+    assert processor.clean_text(text) == legacy_clean_text(text)
+
+    results = {
+        "messages": args.messages,
+        "bytes": len(text.encode("utf-8")),
+        "whole_text": {
+            "legacy_s": best_of(lambda: legacy_clean_text(text), args.repeats),
+            "compiled_s": best_of(lambda: processor.clean_text(text), args.repeats),
+        },
+        "per_message": {
+            "legacy_s": best_of(lambda: [legacy_clean_text(line) for line in lines], args.repeats),
+            "compiled_s": best_of(lambda: [processor.clean_text(line) for line in lines], args.repeats),
+        },
+    }
+    for scenario in ("whole_text", "per_message"):
+        timings = results[scenario]
+        timings["speedup"] = round(timings["legacy_s"] / timings["compiled_s"], 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
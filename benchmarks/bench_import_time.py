@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark: how long `import app.main` takes in a fresh interpreter and which
+modules dominate it (from `python -X importtime`). Heavy optional libraries are only
+imported on first use, so the check fails if any of them shows up at import time again
+or the median exceeds --max-seconds.
+
+Usage:
+    python -m benchmarks.bench_import_time --runs 5 --max-seconds 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Imported lazily by the app; importing them on startup is a regression
+DEFERRED_MODULES = ["google.generativeai", "pandas"]
+
+def import_profile(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    """
+    (module, self_us, cumulative_us) for every module imported by `import <module>`
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application import time")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if the median is slower")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env.setdefault("LLM_PROVIDER", "fake")
+        profiles = [import_profile(args.module, env) for _ in range(args.runs)]
+
+    totals = [next(cumulative for name, _, cumulative in rows if name == args.module) / 1e6 for rows in profiles]
+    median_run = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+    imported = {name for name, _, _ in median_run}
+    deferred = [module for module in DEFERRED_MODULES if module in imported]
+    results = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_s": round(statistics.median(totals), 3),
+        "min_s": round(min(totals), 3),
+        "modules_imported": len(imported),
+        "slowest_self_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us, _ in sorted(median_run, key=lambda row: row[1], reverse=True)[:args.top]
+        },
+        "deferred_modules_imported": deferred,
+    }
+    print(json.dumps(results, indent=2))
+
+    if deferred:
+        print(f"❌ Imported on startup but should be lazy: {', '.join(deferred)}")
+        sys.exit(1)
+    if args.max_seconds is not None and results["median_s"] > args.max_seconds:
+        print(f"❌ Median import time {results['median_s']}s exceeds {args.max_seconds}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
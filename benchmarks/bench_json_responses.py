@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: encoding a large list payload (memories, the biggest list the API returns)
+with FastAPI's default path (jsonable_encoder + JSONResponse) against json_response (orjson,
+no jsonable_encoder pass), and the wire size with gzip at the configured level.
+
+Usage:
+    python -m benchmarks.bench_json_responses --rows 5000
+"""
+import argparse
+import gzip
+import json
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.utils.chat_processor import ChatProcessor
+from app.utils.responses import GZIP_LEVEL, json_response
+from benchmarks.synthetic_chats import generate_chat_export
+
+def best_of(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON response encoding and compression")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    text = generate_chat_export("whatsapp", args.rows * 10, 2, 365, seed=5)
+    chunks = ChatProcessor().process_chat(text)['chunks']
+    start = datetime(2023, 1, 1)
+    payload = [
+        {
+            "id": i,
+            "chat_file_id": 1,
+            "person_id": i % 2 + 1,
+            "text": chunks[i % len(chunks)]['text'],
+            "timestamp": start + timedelta(minutes=i),
+            "ref_count": 1,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(args.rows)
+    ]
+
+    default_body = JSONResponse(jsonable_encoder(payload)).body
+    fast_body = json_response(payload).body
+    assert json.loads(default_body) == json.loads(fast_body)
+
+    results = {
+        "rows": args.rows,
+        "default_s": best_of(lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeats),
+        "orjson_s": best_of(lambda: json_response(payload).body, args.repeats),
+        "bytes": len(fast_body),
+        "gzip_bytes": len(gzip.compress(fast_body, compresslevel=GZIP_LEVEL)),
+        "gzip_s": best_of(lambda: gzip.compress(fast_body, compresslevel=GZIP_LEVEL), args.repeats),
+    }
+    results["speedup"] = round(results["default_s"] / results["orjson_s"], 1)
+    results["compression_ratio"] = round(results["bytes"] / results["gzip_bytes"], 1)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: chunks per second for ingestion-time LLM fact extraction with one call per chunk
+against the LLMBatcher (numbered batches, concurrent requests, retries of failed items),
+using the fake LLM with a fixed round-trip latency to stand in for one API key.
+
+Usage:
+    python -m benchmarks.bench_llm_batcher --messages 5000 --latency-ms 400 --batch-size 20 --concurrency 4
+"""
+import argparse
+import json
+
+from app.services.llm_batcher import LLMBatcher
+from app.services.llm_provider import FakeLLMProvider
+from app.utils.chat_processor import ChatProcessor
+from app.utils.fact_extractor import FACT_EXTRACTION_INSTRUCTIONS
+from benchmarks.synthetic_chats import generate_chat_export
+
+def run(chunks, llm, batch_size: int, concurrency: int) -> dict:
+    batcher = LLMBatcher(
+        "extract_facts", FACT_EXTRACTION_INSTRUCTIONS, llm=llm, batch_size=batch_size, concurrency=concurrency
+    )
+    results = batcher.run(chunks)
+    return {**batcher.stats, "answered": sum(result is not None for result in results)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched LLM enrichment")
+    parser.add_argument("--messages", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=400, help="fake LLM round trip")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of calls that fail")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sequential-chunks", type=int, default=20, help="chunks timed for the one-call-per-chunk baseline")
+    args = parser.parse_args()
+
+    text = generate_chat_export("whatsapp", args.messages, 2, 90, seed=9)
+    chunks = [chunk['text'] for chunk in ChatProcessor().process_chat(text)['chunks']]
+    llm = FakeLLMProvider(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=1)
+
+    results = {
+        "chunks": len(chunks),
+        "llm_latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        # The baseline is linear in the number of chunks, so a sample is enough
+        "one_call_per_chunk": run(chunks[:args.sequential_chunks], llm, batch_size=1, concurrency=1),
+        "batched": run(chunks, llm, batch_size=args.batch_size, concurrency=args.concurrency),
+    }
+    results["speedup"] = round(
+        results["batched"]["chunks_per_s"] / max(results["one_call_per_chunk"]["chunks_per_s"], 1e-9), 1
+    )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: write throughput of concurrent writers sharing the default database against the same
+writers each using their own profile database (X-Profile-Id sharding). Every writer commits
+batches of notes through MemoryService.add_notes; shared writers queue on one SQLite lock.
+
+Usage:
+    python -m benchmarks.bench_tenants --writers 8 --commits 50 --batch-size 100
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+def run_writers(writers: int, commits: int, batch_size: int, shared: bool) -> dict:
+    from app.models.database import current_tenant, init_db, open_session
+    from app.services.memory_service import MemoryService
+
+    init_db()
+
+    def write(writer: int) -> int:
+        tenant: Optional[str] = None if shared else f"writer-{writer}"
+        current_tenant.set(tenant)
+        db = open_session()
+        errors = 0
+        try:
+            service = MemoryService(db)
+            for commit in range(commits):
+                notes = [
+                    {"title": f"w{writer} c{commit} n{i}", "content": "likes hiking and sushi", "category": "bench"}
+                    for i in range(batch_size)
+                ]
+                try:
+                    service.add_notes(notes)
+                except Exception:
+                    db.rollback()
+                    errors += 1
+        finally:
+            db.close()
+        return errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        errors = sum(pool.map(write, range(writers)))
+    elapsed = time.perf_counter() - start
+    written = (writers * commits - errors) * batch_size
+    return {
+        "seconds": round(elapsed, 3),
+        "commits_per_s": round((writers * commits - errors) / elapsed, 1),
+        "notes_per_s": round(written / elapsed),
+        "failed_commits": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared vs per-profile database writes")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=50, help="commits per writer")
+    parser.add_argument("--batch-size", type=int, default=100, help="notes per commit")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Configure a throwaway database before the app modules read their settings
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'shared.db')}"
+        os.environ["TENANT_DB_DIR"] = os.path.join(tmp, "profiles")
+        os.environ["TENANT_ENGINE_CACHE_SIZE"] = str(max(args.writers, 1))
+        if "app.models.database" in sys.modules:
+            sys.exit("Run as a fresh process: python -m benchmarks.bench_tenants")
+
+        results = {
+            "writers": args.writers,
+            "commits_per_writer": args.commits,
+            "batch_size": args.batch_size,
+            "shared": run_writers(args.writers, args.commits, args.batch_size, shared=True),
+            "per_profile": run_writers(args.writers, args.commits, args.batch_size, shared=False),
+        }
+    results["speedup"] = round(results["per_profile"]["notes_per_s"] / max(results["shared"]["notes_per_s"], 1), 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
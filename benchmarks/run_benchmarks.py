@@ -0,0 +1,356 @@
+"""
+End-to-end benchmark harness for the ingestion pipeline, retrieval and the HTTP API.
+
+Runs against a throwaway SQLite database and, unless LLM_PROVIDER is already set,
+the offline fake LLM so results are reproducible without network access.
+Results are written as JSON so they can be compared across versions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --messages 20000 --concurrency 16 -o bench.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_chats import FORMATS, generate_chat_export
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(q * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+def summarize(samples: List[float]) -> Dict:
+    """
+    Latency summary in milliseconds
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+def time_repeated(func: Callable, repeats: int) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def git_version() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+# ---------------------------------------------------------------------------
+# In-process scenarios
+# ---------------------------------------------------------------------------
+
+def bench_process_chat(exports: Dict[str, str], repeats: int) -> Dict:
+    from app.utils.chat_processor import ChatProcessor
+
+    processor = ChatProcessor()
+    results = {}
+    for fmt, text in exports.items():
+        samples = time_repeated(lambda: processor.process_chat(text), repeats)
+        size_mb = len(text.encode("utf-8")) / 1e6
+        messages = text.count("\n")
+        best = min(samples)
+        results[fmt] = {
+            **summarize(samples),
+            "size_mb": round(size_mb, 3),
+            "mb_per_s": round(size_mb / best, 3),
+            "lines_per_s": round(messages / best, 1),
+        }
+    return results
+
+def bench_process_and_store(exports: Dict[str, str], repeats: int) -> Dict:
+    from app.models.database import SessionLocal, init_db
+    from app.services.memory_service import MemoryService
+
+    init_db()
+    results = {}
+    for fmt, text in exports.items():
+        samples = []
+        for i in range(repeats):
+            db = SessionLocal()
+            try:
+                service = MemoryService(db)
+                start = time.perf_counter()
+                service.process_and_store_chat(text=text, filename=f"bench_{fmt}_{i}.txt", file_size=len(text))
+                samples.append(time.perf_counter() - start)
+            finally:
+                db.close()
+        size_mb = len(text.encode("utf-8")) / 1e6
+        results[fmt] = {**summarize(samples), "mb_per_s": round(size_mb / min(samples), 3)}
+    return results
+
+def bench_retrieval(repeats: int) -> Dict:
+    from app.models.database import SessionLocal, init_db
+    from app.services.memory_service import MemoryService
+
+    init_db()
+    queries = ["What should I get her for her birthday?", "Where should we go for dinner?", "Date night ideas"]
+    db = SessionLocal()
+    try:
+        service = MemoryService(db)
+        memory_samples = time_repeated(
+            lambda: [service.find_relevant_memories(q) for q in queries], repeats
+        )
+        note_samples = time_repeated(
+            lambda: [service.find_relevant_notes(q) for q in queries], repeats
+        )
+    finally:
+        db.close()
+    per_query = len(queries)
+    return {
+        "find_relevant_memories": summarize([s / per_query for s in memory_samples]),
+        "find_relevant_notes": summarize([s / per_query for s in note_samples]),
+    }
+
+# ---------------------------------------------------------------------------
+# HTTP scenarios
+# ---------------------------------------------------------------------------
+
+class ServerThread:
+    """
+    Run the FastAPI app under uvicorn in a background thread on a free port
+    """
+    def __init__(self):
+        import uvicorn
+        from app.main import app
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+# Errors of a kept-alive connection the server already closed; the request is retried on a new one
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+class HttpClient:
+    """
+    Keep-alive HTTP client with one connection per thread
+    """
+    def __init__(self, port: int):
+        self.port = port
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method: str, path: str, body: bytes = None, headers: Dict = None) -> int:
+        while True:
+            conn = self._connection()
+            # A connection left idle past the server's keep-alive timeout fails on first use
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                self._local.conn = None
+                if not (reused and isinstance(e, STALE_CONNECTION_ERRORS)):
+                    raise
+
+    def get(self, path: str) -> int:
+        return self.request("GET", path)
+
+    def post_json(self, path: str, payload: Dict) -> int:
+        return self.request("POST", path, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+    def upload(self, path: str, filename: str, content: bytes) -> int:
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: text/plain\r\n\r\n"
+        ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+        return self.request("POST", path, body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+def run_concurrently(func: Callable[[int], int], total: int, concurrency: int) -> Dict:
+    samples = []
+    errors = 0
+    lock = threading.Lock()
+
+    def task(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            status = func(i)
+            ok = status < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            samples.append(elapsed)
+            if not ok:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(total)))
+    wall = time.perf_counter() - wall_start
+    return {**summarize(samples), "errors": errors, "throughput_rps": round(total / wall, 2)}
+
+def bench_http(client: HttpClient, upload_text: str, requests_per_endpoint: int, concurrency: int) -> Dict:
+    results = {}
+    upload_bytes = upload_text.encode("utf-8")
+    uploads = max(1, requests_per_endpoint // 10)
+    results["POST /api/upload-chat"] = run_concurrently(
+        lambda i: client.upload("/api/upload-chat", f"bench_http_{i}.txt", upload_bytes), uploads, concurrency
+    )
+    client.post_json("/api/notes", {"title": "Favourite flowers", "content": "Peonies", "category": "preferences"})
+
+    for path in ["/api/health", "/api/notes", "/api/people", "/api/stats", "/api/chat-files"]:
+        results[f"GET {path}"] = run_concurrently(lambda i, p=path: client.get(p), requests_per_endpoint, concurrency)
+    results["POST /api/get-recommendation"] = run_concurrently(
+        lambda i: client.post_json("/api/get-recommendation", {"question": f"Gift idea #{i}?"}),
+        requests_per_endpoint,
+        concurrency,
+    )
+    return results
+
+def bench_mixed_load(client: HttpClient, probes: int, concurrency: int) -> Dict:
+    """
+    Health-check and note-listing latency while recommendations are in flight, against an idle baseline
+    """
+    def probe() -> Dict[str, List[float]]:
+        samples = {"/api/health": [], "/api/notes": []}
+        for _ in range(probes):
+            for path in samples:
+                start = time.perf_counter()
+                client.get(path)
+                samples[path].append(time.perf_counter() - start)
+        return samples
+
+    idle = probe()
+
+    stop = threading.Event()
+    def generate_load():
+        while not stop.is_set():
+            try:
+                client.post_json("/api/get-recommendation", {"question": "Date night ideas?"})
+            except Exception:
+                pass
+
+    workers = [threading.Thread(target=generate_load, daemon=True) for _ in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.5)
+    try:
+        loaded = probe()
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=60)
+
+    return {
+        path: {"idle": summarize(idle[path]), "with_recommendations_in_flight": summarize(loaded[path])}
+        for path in idle
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Perfect Partner benchmarks and report JSON")
+    parser.add_argument("--messages", type=int, default=5000, help="messages per synthetic export")
+    parser.add_argument("--participants", type=int, default=2)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per endpoint")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="fake LLM round trip")
+    parser.add_argument("--scenarios", default="process_chat,process_and_store_chat,retrieval,http,mixed_load")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # The throwaway database is removed with the directory when the run ends
+    with tempfile.TemporaryDirectory(prefix="perfect_partner_bench_") as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        os.environ.setdefault("LLM_PROVIDER", "fake")
+        os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+
+        scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+        exports = {
+            fmt: generate_chat_export(fmt, args.messages, args.participants, args.days, seed=7)
+            for fmt in FORMATS
+        }
+
+        report = {
+            "version": git_version(),
+            "run_at": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {
+                **vars(args),
+                "llm_provider": os.environ["LLM_PROVIDER"],
+                "export_bytes": {fmt: len(text.encode("utf-8")) for fmt, text in exports.items()},
+            },
+            "scenarios": {},
+        }
+
+        def run(name, func):
+            if name in scenarios:
+                print(f"Running {name}...", file=sys.stderr)
+                report["scenarios"][name] = func()
+
+        run("process_chat", lambda: bench_process_chat(exports, args.repeats))
+        run("process_and_store_chat", lambda: bench_process_and_store(exports, max(1, args.repeats // 2)))
+        run("retrieval", lambda: bench_retrieval(args.repeats * 20))
+        if "http" in scenarios or "mixed_load" in scenarios:
+            with ServerThread() as server:
+                client = HttpClient(server.port)
+                upload_text = generate_chat_export("whatsapp", max(100, args.messages // 10), args.participants, 30, seed=11)
+                run("http", lambda: bench_http(client, upload_text, args.requests, args.concurrency))
+                run("mixed_load", lambda: bench_mixed_load(client, max(20, args.requests // 5), args.concurrency))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Wrote benchmark report to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
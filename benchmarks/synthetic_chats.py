@@ -0,0 +1,157 @@
+"""
+Synthetic chat-export generator producing realistic WhatsApp (iOS and Android), iMessage and ISO-format transcripts
+
+Usage:
+    python -m benchmarks.synthetic_chats --format whatsapp --messages 50000 --participants 2 --days 365 -o chat.txt
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+# "whatsapp" is the iOS layout ("[1/15/23, 10:30:15 AM] Alice: ..."), "whatsapp_android" the
+# Android one ("1/15/23, 10:30 AM - Alice: ..."); "imessage" puts the timestamp and the sender
+# on lines of their own above the body, with a blank line between messages
+FORMATS = ("whatsapp", "whatsapp_android", "imessage", "iso")
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Priya", "Diego", "Mei", "Jonas", "Amara", "Luca", "Sofia", "Kenji",
+    "Noah", "Fatima", "Oliver", "Zara", "Mateo", "Hana", "Ethan", "Leila", "Ravi", "Chloe",
+]
+
+TOPICS = {
+    "food": ["sushi", "tacos", "ramen", "that new Thai place", "pasta", "dim sum", "pizza at Luigi's"],
+    "activity": ["hiking", "the pottery class", "a movie night", "the farmers market", "climbing", "a concert"],
+    "gift": ["a vinyl record", "a good fountain pen", "a cookbook", "noise-cancelling headphones", "a plant"],
+    "place": ["Lisbon", "the coast", "Kyoto", "the cabin", "Barcelona", "the botanical garden"],
+}
+
+TEMPLATES = [
+    "I really love {food}",
+    "We should try {food} this weekend",
+    "Do you want to go {activity} on Saturday?",
+    "I've been wanting {gift} for ages",
+    "Remember when we went to {place}? Best trip ever",
+    "Can we plan a trip to {place} next year?",
+    "Honestly I'm not a fan of {food}",
+    "Running late, be there in 10",
+    "Good morning! ☀️",
+    "Haha that's hilarious 😂",
+    "Did you see the game last night?",
+    "Miss you ❤️",
+    "Thanks for dinner yesterday, it was amazing",
+    "Can you pick up milk on the way home?",
+    "My birthday is coming up on {date} 🎂",
+    "How was work today?",
+    "Ok sounds good",
+    "What time works for you?",
+]
+
+MEDIA_PLACEHOLDERS = ["image omitted", "video omitted", "audio omitted", "sticker omitted", "GIF omitted"]
+
+def _format_timestamp(ts: datetime, fmt: str) -> str:
+    hour12 = ts.hour % 12 or 12
+    am_pm = "AM" if ts.hour < 12 else "PM"
+    if fmt == "whatsapp":
+        return f"[{ts.month}/{ts.day}/{ts:%y}, {hour12}:{ts:%M:%S} {am_pm}]"
+    if fmt == "whatsapp_android":
+        return f"{ts.month}/{ts.day}/{ts:%y}, {hour12}:{ts:%M} {am_pm} -"
+    if fmt == "imessage":
+        return f"{ts:%b} {ts.day}, {ts.year}  {hour12}:{ts:%M:%S} {am_pm}"
+    return f"{ts:%Y-%m-%d %H:%M:%S}"
+
+def _message_text(rng: random.Random, media_rate: float, multiline_rate: float, fmt: str) -> str:
+    if rng.random() < media_rate:
+        if fmt == "imessage":
+            # iMessage exports show the attachment's path instead of a placeholder
+            return f"/Users/me/Library/Messages/Attachments/{rng.randrange(256):02x}/IMG_{rng.randrange(10000):04d}.jpeg"
+        return rng.choice(MEDIA_PLACEHOLDERS)
+    text = rng.choice(TEMPLATES).format(
+        food=rng.choice(TOPICS["food"]),
+        activity=rng.choice(TOPICS["activity"]),
+        gift=rng.choice(TOPICS["gift"]),
+        place=rng.choice(TOPICS["place"]),
+        date=f"{rng.randint(1, 12)}/{rng.randint(1, 28)}",
+    )
+    if rng.random() < multiline_rate:
+        text += "\n" + rng.choice(TEMPLATES).format(
+            food=rng.choice(TOPICS["food"]),
+            activity=rng.choice(TOPICS["activity"]),
+            gift=rng.choice(TOPICS["gift"]),
+            place=rng.choice(TOPICS["place"]),
+            date=f"{rng.randint(1, 12)}/{rng.randint(1, 28)}",
+        )
+    return text
+
+def _timestamps(rng: random.Random, n_messages: int, start: datetime, days: int) -> List[datetime]:
+    """
+    Bursty conversation timeline: sessions spread over the span, quick replies within a session
+    """
+    span_seconds = max(days, 1) * 86400
+    n_sessions = max(1, n_messages // 25)
+    session_starts = sorted(rng.uniform(0, span_seconds) for _ in range(n_sessions))
+    timestamps = []
+    for i, session_start in enumerate(session_starts):
+        remaining_sessions = n_sessions - i
+        count = (n_messages - len(timestamps)) // remaining_sessions
+        offset = session_start
+        for _ in range(count):
+            offset += rng.expovariate(1 / 45)
+            timestamps.append(start + timedelta(seconds=min(offset, span_seconds)))
+    timestamps.sort()
+    return timestamps
+
+def generate_chat_export(
+    fmt: str = "whatsapp",
+    n_messages: int = 1000,
+    n_participants: int = 2,
+    days: int = 90,
+    start: datetime = None,
+    seed: int = 0,
+    media_rate: float = 0.02,
+    multiline_rate: float = 0.05,
+) -> str:
+    """
+    Generate a chat export transcript in one of FORMATS
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+    rng = random.Random(seed)
+    start = start or datetime(2023, 1, 1, 9, 0, 0)
+    participants = FIRST_NAMES[:n_participants] if n_participants <= len(FIRST_NAMES) else [
+        f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {i // len(FIRST_NAMES)}" for i in range(n_participants)
+    ]
+
+    lines = []
+    timestamps = _timestamps(rng, n_messages, start, days)
+    if fmt == "whatsapp" and timestamps:
+        lines.append(f"{_format_timestamp(timestamps[0], fmt)} {participants[0]}: Messages and calls are end-to-end encrypted")
+    sender = rng.choice(participants)
+    for ts in timestamps:
+        # Replies usually alternate, with occasional runs by the same sender
+        if rng.random() < 0.6:
+            sender = rng.choice([p for p in participants if p != sender] or participants)
+        text = _message_text(rng, media_rate, multiline_rate, fmt)
+        if fmt == "imessage":
+            lines.append(f"{_format_timestamp(ts, fmt)}\n{sender}\n{text}\n")
+        else:
+            lines.append(f"{_format_timestamp(ts, fmt)} {sender}: {text}")
+    return "\n".join(lines) + "\n"
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic chat export")
+    parser.add_argument("--format", choices=FORMATS, default="whatsapp")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--participants", type=int, default=2)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    text = generate_chat_export(args.format, args.messages, args.participants, args.days, seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(text)
+    print(f"Wrote {args.messages} messages ({len(text.encode('utf-8')) / 1e6:.2f} MB) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Data layer for the Streamlit frontend: one pooled keep-alive HTTP session, cached reads with
+ETag revalidation, targeted cache invalidation after mutations, and concurrent panel loading
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib3.util.retry import Retry
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000").rstrip("/")
+CACHE_TTL_SECONDS = int(os.getenv("FRONTEND_CACHE_TTL", "30"))
+READ_TIMEOUT = 10
+UPLOAD_TIMEOUT = 300
+RECOMMENDATION_TIMEOUT = 60
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session; idempotent GETs are retried on connection errors and 502/503/504
+    """
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def _etag_store() -> Dict[str, Tuple[str, Any]]:
+    return {}
+
+def url(path: str) -> str:
+    return f"{API_BASE_URL}{path}"
+
+def get_json(path: str) -> Any:
+    """
+    GET a JSON resource, revalidating the last copy with If-None-Match so unchanged data comes back as a bodiless 304
+    """
+    store = _etag_store()
+    cached = store.get(path)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = get_session().get(url(path), headers=headers, timeout=READ_TIMEOUT)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    data = response.json()
+    if response.headers.get("ETag"):
+        store[path] = (response.headers["ETag"], data)
+    return data
+
+@st.cache_data(ttl=5, show_spinner=False)
+def check_backend() -> bool:
+    try:
+        return get_session().get(url("/api/health"), timeout=2).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_people():
+    return get_json("/api/people")
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_stats():
+    return get_json("/api/stats")
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_chat_files():
+    return get_json("/api/chat-files")
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_notes():
+    return get_json("/api/notes")
+
+PANELS: Dict[str, Callable] = {
+    "people": fetch_people,
+    "stats": fetch_stats,
+    "chat_files": fetch_chat_files,
+    "notes": fetch_notes,
+}
+
+def fetch_dashboard() -> Dict[str, Tuple[Any, Exception]]:
+    """
+    Load every panel concurrently; returns panel name -> (data, error), with exactly one of them set
+    """
+    ctx = get_script_run_ctx()
+
+    def attach_context():
+        # Lets st.cache_data run in worker threads without "missing ScriptRunContext" warnings
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    def load(fetch: Callable):
+        try:
+            return fetch(), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=len(PANELS), initializer=attach_context) as pool:
+        futures = {name: pool.submit(load, fetch) for name, fetch in PANELS.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def invalidate(*fetchers: Callable):
+    """
+    Drop cached reads made stale by a mutation
+    """
+    for fetch in fetchers:
+        fetch.clear()
+
+def upload_chat(uploaded_file) -> requests.Response:
+    response = get_session().post(url("/api/upload-chat"), files={"file": uploaded_file}, timeout=UPLOAD_TIMEOUT)
+    if response.ok:
+        invalidate(fetch_people, fetch_stats, fetch_chat_files)
+    return response
+
+def delete_chat_file(file_id: int) -> requests.Response:
+    response = get_session().delete(url(f"/api/chat-files/{file_id}"), timeout=READ_TIMEOUT)
+    if response.ok:
+        invalidate(fetch_people, fetch_stats, fetch_chat_files)
+    return response
+
+def delete_person(person_id: int) -> requests.Response:
+    response = get_session().delete(url(f"/api/people/{person_id}"), timeout=READ_TIMEOUT)
+    if response.ok:
+        invalidate(fetch_people, fetch_stats)
+    return response
+
+def create_note(title: str, content: str, category: str = None) -> requests.Response:
+    response = get_session().post(
+        url("/api/notes"), json={"title": title, "content": content, "category": category}, timeout=READ_TIMEOUT
+    )
+    if response.ok:
+        invalidate(fetch_notes, fetch_stats)
+    return response
+
+def delete_note(note_id: int) -> requests.Response:
+    response = get_session().delete(url(f"/api/notes/{note_id}"), timeout=READ_TIMEOUT)
+    if response.ok:
+        invalidate(fetch_notes, fetch_stats)
+    return response
+
+def get_recommendation(question: str) -> requests.Response:
+    return get_session().post(
+        url("/api/get-recommendation"), json={"question": question}, timeout=RECOMMENDATION_TIMEOUT
+    )
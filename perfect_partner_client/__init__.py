@@ -0,0 +1,10 @@
+"""
+Python client for the Perfect Partner API, in sync (PerfectPartnerClient) and async
+(AsyncPerfectPartnerClient) variants with pooled connections, retries, background upload
+jobs and bulk note operations
+"""
+from perfect_partner_client._base import APIError, JobFailed
+from perfect_partner_client.async_client import AsyncPerfectPartnerClient
+from perfect_partner_client.client import PerfectPartnerClient
+
+__all__ = ["APIError", "AsyncPerfectPartnerClient", "JobFailed", "PerfectPartnerClient"]
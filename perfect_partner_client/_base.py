@@ -0,0 +1,114 @@
+"""
+Settings, errors and retry policy shared by the sync and async clients
+"""
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+DEFAULT_BASE_URL = os.getenv("PERFECT_PARTNER_API_URL", "http://localhost:8000")
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# Ingestion and generation run on the server while the request is open
+UPLOAD_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+RECOMMENDATION_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+BATCH_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 5.0
+# Items per request sent to the batch endpoints (the server accepts up to MAX_BATCH_ITEMS)
+DEFAULT_BATCH_SIZE = 1000
+JOB_POLL_INTERVAL = 0.5
+JOB_POLL_MAX_INTERVAL = 5.0
+JOB_TIMEOUT = 1800.0
+
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+JOB_DONE_STATUSES = {"succeeded", "failed"}
+# Selects the profile database a request is served from
+PROFILE_HEADER = "X-Profile-Id"
+
+class APIError(Exception):
+    """
+    The API answered with an error status; `detail` is the server's error message
+    """
+    def __init__(self, status_code: int, detail: Any, response: httpx.Response = None):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.response = response
+
+class JobFailed(APIError):
+    """
+    A background job finished with status "failed"
+    """
+    def __init__(self, job: Dict):
+        error = job.get("error") or {}
+        super().__init__(error.get("status_code", 500), error.get("detail", "Job failed"))
+        self.job = job
+
+def raise_for_status(response: httpx.Response):
+    if response.is_success:
+        return
+    try:
+        detail = response.json().get("detail", response.text)
+    except (ValueError, AttributeError):
+        detail = response.text or response.reason_phrase
+    raise APIError(response.status_code, detail, response)
+
+def should_retry(method: str, attempt: int, max_retries: int, response: httpx.Response = None, error: Exception = None) -> bool:
+    """
+    Connection failures are retried for every method (the request never reached the server);
+    timeouts and 502/503/504 only for idempotent methods
+    """
+    if attempt >= max_retries:
+        return False
+    if isinstance(error, httpx.ConnectError):
+        return True
+    if method not in IDEMPOTENT_METHODS:
+        return False
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+    return response is not None and response.status_code in RETRY_STATUSES
+
+def backoff_delay(attempt: int, response: httpx.Response = None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    # Full jitter keeps many clients from retrying in lockstep
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def next_poll_interval(interval: float) -> float:
+    return min(interval * 1.5, JOB_POLL_MAX_INTERVAL)
+
+def client_headers(headers: Optional[Dict[str, str]], profile_id: Optional[str]) -> Dict[str, str]:
+    headers = dict(headers or {})
+    if profile_id is not None:
+        headers[PROFILE_HEADER] = profile_id
+    return headers
+
+def upload_params(background: bool) -> Dict:
+    return {"background": "true"} if background else {}
+
+def note_payload(title: str, content: str, category: Optional[str] = None) -> Dict:
+    return {"title": title, "content": content, "category": category}
+
+def batches(items: Iterable, batch_size: int) -> List[List]:
+    items = list(items)
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+def json_items(items: Iterable[Dict]) -> List[Dict]:
+    """
+    Batch items as JSON-ready dicts (datetimes as ISO strings)
+    """
+    return [
+        {key: value.isoformat() if hasattr(value, "isoformat") else value for key, value in item.items()}
+        for item in items
+    ]
+
+def update_payload(title: Optional[str], content: Optional[str], category: Optional[str]) -> Dict:
+    return {key: value for key, value in (("title", title), ("content", content), ("category", category)) if value is not None}
+
+def query_params(**params) -> Dict:
+    return {key: value for key, value in params.items() if value is not None}
@@ -0,0 +1,238 @@
+"""
+Asynchronous Perfect Partner API client, mirroring PerfectPartnerClient on httpx.AsyncClient
+"""
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+import httpx
+
+from perfect_partner_client._base import (
+    DEFAULT_BASE_URL, DEFAULT_BATCH_SIZE, DEFAULT_LIMITS, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT,
+    BATCH_TIMEOUT, JOB_DONE_STATUSES, JOB_POLL_INTERVAL, JOB_TIMEOUT, RECOMMENDATION_TIMEOUT,
+    UPLOAD_TIMEOUT, JobFailed, backoff_delay, batches, client_headers, json_items, next_poll_interval, note_payload,
+    query_params, raise_for_status, should_retry, update_payload, upload_params
+)
+from perfect_partner_client.types import (
+    BatchResult, ChatFile, Fact, Health, Job, MaintenanceStatus, Memory, MemoryInput, MemoryUpdate, Message,
+    Note, NoteInput, NoteUpdate, Person, Recommendation, RecommendationItem, Stats, UploadResult
+)
+
+class AsyncPerfectPartnerClient:
+    """
+    Async client for every Perfect Partner API endpoint over one pooled connection pool.
+    Use as an async context manager or await aclose() when done.
+    With `profile_id` every request is served from that profile's own database.
+    """
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        headers: Dict[str, str] = None,
+        transport: httpx.AsyncBaseTransport = None,
+        profile_id: str = None
+    ):
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), timeout=timeout, limits=limits,
+            headers=client_headers(headers, profile_id), transport=transport
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, upload_path: str = None, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying per should_retry() with jittered exponential backoff.
+        With `upload_path` the file is streamed from disk as the multipart "file" field, reopened on each attempt.
+        """
+        attempt = 0
+        while True:
+            response = error = None
+            try:
+                if upload_path:
+                    with open(upload_path, "rb") as f:
+                        files = {"file": (os.path.basename(upload_path), f)}
+                        response = await self._client.request(method, path, files=files, **kwargs)
+                else:
+                    response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            if not should_retry(method, attempt, self.max_retries, response, error):
+                if error is not None:
+                    raise error
+                raise_for_status(response)
+                return response
+            await asyncio.sleep(backoff_delay(attempt, response))
+            attempt += 1
+
+    async def _json(self, method: str, path: str, **kwargs):
+        return (await self._request(method, path, **kwargs)).json()
+
+    async def health(self) -> Health:
+        return await self._json("GET", "/api/health")
+
+    async def metrics(self) -> str:
+        return (await self._request("GET", "/api/metrics")).text
+
+    async def start_upload(self, path: str) -> Job:
+        """
+        Stream a chat export (.txt or WhatsApp .zip) from disk for background ingestion; returns the job to poll
+        """
+        return await self._json(
+            "POST", "/api/upload-chat", upload_path=path, params=upload_params(True), timeout=UPLOAD_TIMEOUT
+        )
+
+    async def upload_chat(self, path: str, poll: bool = True, timeout: float = JOB_TIMEOUT) -> UploadResult:
+        """
+        Upload a chat export and return the ingestion result, by default through a polled background job
+        """
+        if not poll:
+            return await self._json("POST", "/api/upload-chat", upload_path=path, timeout=UPLOAD_TIMEOUT)
+        job = await self.start_upload(path)
+        return (await self.wait_for_job(job["id"], timeout=timeout))["result"]
+
+    async def get_job(self, job_id: str) -> Job:
+        return await self._json("GET", f"/api/jobs/{job_id}")
+
+    async def wait_for_job(self, job_id: str, timeout: float = JOB_TIMEOUT, poll_interval: float = JOB_POLL_INTERVAL) -> Job:
+        """
+        Poll a job with growing intervals until it finishes. Raises JobFailed if it failed
+        and TimeoutError if it is still running after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get_job(job_id)
+            if job["status"] in JOB_DONE_STATUSES:
+                if job["status"] == "failed":
+                    raise JobFailed(job)
+                return job
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout}s")
+            await asyncio.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
+            poll_interval = next_poll_interval(poll_interval)
+
+    async def list_chat_files(self) -> List[ChatFile]:
+        return await self._json("GET", "/api/chat-files")
+
+    async def delete_chat_file(self, file_id: int) -> Message:
+        return await self._json("DELETE", f"/api/chat-files/{file_id}")
+
+    async def get_stats(self) -> Stats:
+        return await self._json("GET", "/api/stats")
+
+    async def get_recommendation(self, question: str) -> Recommendation:
+        return await self._json(
+            "POST", "/api/get-recommendation", json={"question": question}, timeout=RECOMMENDATION_TIMEOUT
+        )
+
+    async def get_recommendations(self, questions: Iterable[str]) -> AsyncIterator[RecommendationItem]:
+        """
+        Recommendations for many questions from one batch request, yielded as the server finishes
+        each one (completion order; `index` points back into `questions`)
+        """
+        async with self._client.stream(
+            "POST", "/api/get-recommendations", json={"questions": list(questions)}, timeout=RECOMMENDATION_TIMEOUT
+        ) as response:
+            if not response.is_success:
+                await response.aread()
+                raise_for_status(response)
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def create_note(self, title: str, content: str, category: Optional[str] = None) -> Note:
+        return await self._json("POST", "/api/notes", json=note_payload(title, content, category))
+
+    async def list_notes(self) -> List[Note]:
+        return await self._json("GET", "/api/notes")
+
+    async def update_note(self, note_id: int, title: str = None, content: str = None, category: str = None) -> Note:
+        return await self._json("PUT", f"/api/notes/{note_id}", json=update_payload(title, content, category))
+
+    async def delete_note(self, note_id: int) -> Message:
+        return await self._json("DELETE", f"/api/notes/{note_id}")
+
+    async def _batch(self, method: str, path: str, key: str, items: Iterable[Dict]) -> List[BatchResult]:
+        """
+        Send `items` to a batch endpoint in requests of `batch_size` (each applied in one transaction
+        on the server) and return the per-item results in input order
+        """
+        results = []
+        for batch in batches(items, self.batch_size):
+            response = await self._json(method, path, json={key: batch}, timeout=BATCH_TIMEOUT)
+            results.extend(response["results"])
+        return results
+
+    async def create_notes(self, notes: Iterable[NoteInput]) -> List[Note]:
+        """
+        Create many notes through the batch endpoint; results follow the input order
+        """
+        payloads = [note_payload(note["title"], note["content"], note.get("category")) for note in notes]
+        return [result["note"] for result in await self._batch("POST", "/api/notes/batch", "notes", payloads)]
+
+    async def update_notes(self, updates: Iterable[NoteUpdate]) -> List[Optional[Note]]:
+        """
+        Update many notes through the batch endpoint; None where the note does not exist
+        """
+        return [result["note"] for result in await self._batch("PUT", "/api/notes/batch", "notes", updates)]
+
+    async def delete_notes(self, note_ids: Iterable[int]) -> List[bool]:
+        """
+        Delete many notes through the batch endpoint; each result is False if that note did not exist
+        """
+        results = await self._batch("POST", "/api/notes/batch-delete", "ids", note_ids)
+        return [result["status"] == "deleted" for result in results]
+
+    async def list_memories(self, chat_file_id: int = None, person_id: int = None, limit: int = 100, offset: int = 0) -> List[Memory]:
+        return await self._json("GET", "/api/memories", params=query_params(
+            chat_file_id=chat_file_id, person_id=person_id, limit=limit, offset=offset
+        ))
+
+    async def create_memories(self, memories: Iterable[MemoryInput]) -> List[BatchResult]:
+        """
+        Store many memories (deduplicated and indexed server-side); a duplicate's id is the memory it matched
+        """
+        return await self._batch("POST", "/api/memories/batch", "memories", json_items(memories))
+
+    async def update_memories(self, updates: Iterable[MemoryUpdate]) -> List[BatchResult]:
+        return await self._batch("PUT", "/api/memories/batch", "memories", json_items(updates))
+
+    async def delete_memories(self, memory_ids: Iterable[int]) -> List[bool]:
+        results = await self._batch("POST", "/api/memories/batch-delete", "ids", memory_ids)
+        return [result["status"] == "deleted" for result in results]
+
+    async def compact_memories(self) -> Message:
+        return await self._json("POST", "/api/memories/compact")
+
+    async def maintenance_status(self) -> MaintenanceStatus:
+        return await self._json("GET", "/api/maintenance")
+
+    async def run_maintenance(self) -> Message:
+        return await self._json("POST", "/api/maintenance/run")
+
+    async def list_facts(self, fact_type: str = None, person_id: int = None, limit: int = 100) -> List[Fact]:
+        return await self._json(
+            "GET", "/api/facts", params=query_params(fact_type=fact_type, person_id=person_id, limit=limit)
+        )
+
+    async def list_people(self) -> List[Person]:
+        return await self._json("GET", "/api/people")
+
+    async def refresh_profiles(self) -> Message:
+        return await self._json("POST", "/api/people/refresh-profiles")
+
+    async def delete_person(self, person_id: int) -> Message:
+        return await self._json("DELETE", f"/api/people/{person_id}")
@@ -0,0 +1,157 @@
+"""
+Typed shapes of the Perfect Partner API responses
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+class Health(TypedDict):
+    status: str
+
+class Message(TypedDict):
+    message: str
+
+class DateRange(TypedDict):
+    start: Optional[str]
+    end: Optional[str]
+
+class ChatFileMetadata(TypedDict, total=False):
+    chat_file_id: int
+    total_messages: int
+    participants: List[str]
+    date_range: DateRange
+    attachments: int
+    duplicate_chunks: int
+    uploaded_at: str
+
+class UploadResult(TypedDict, total=False):
+    message: str
+    metadata: ChatFileMetadata
+    files: List[ChatFileMetadata]
+    archive: Dict
+
+class JobError(TypedDict):
+    status_code: int
+    detail: str
+
+class Job(TypedDict):
+    id: str
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+    result: Optional[UploadResult]
+    error: Optional[JobError]
+
+class ChatFile(TypedDict):
+    id: int
+    filename: str
+    file_size: Optional[int]
+    total_messages: int
+    participants: List[str]
+    date_range_start: Optional[str]
+    date_range_end: Optional[str]
+    attachment_count: int
+    uploaded_at: str
+
+class Stats(TypedDict):
+    total_chat_files: int
+    total_memories: int
+    duplicate_chunks: int
+    total_notes: int
+
+class Note(TypedDict):
+    id: int
+    title: str
+    content: str
+    category: Optional[str]
+    created_at: str
+    updated_at: str
+
+class NoteInput(TypedDict, total=False):
+    title: str
+    content: str
+    category: Optional[str]
+
+class BatchResult(TypedDict, total=False):
+    index: int
+    status: str  # created | duplicate | updated | deleted | not_found | invalid
+    id: Optional[int]
+    detail: Optional[str]
+    note: Optional[Note]
+
+class NoteUpdate(TypedDict, total=False):
+    id: int
+    title: str
+    content: str
+    category: str
+
+class Memory(TypedDict):
+    id: int
+    chat_file_id: Optional[int]
+    person_id: Optional[int]
+    text: str
+    timestamp: Optional[str]
+    ref_count: int
+    created_at: Optional[str]
+
+class MemoryInput(TypedDict, total=False):
+    text: str
+    timestamp: Union[str, datetime]
+    person_id: int
+    chat_file_id: int
+
+class MemoryUpdate(TypedDict, total=False):
+    id: int
+    text: str
+    timestamp: Union[str, datetime]
+    person_id: int
+
+class Fact(TypedDict):
+    type: str
+    label: Optional[str]
+    value: str
+    person: Optional[str]
+    mentions: int
+    last_mentioned: Optional[str]
+
+class Person(TypedDict):
+    id: int
+    name: str
+    aliases: List[str]
+    first_message_date: Optional[str]
+    last_message_date: Optional[str]
+    message_count: int
+    profile_notes: Optional[str]
+    profile: Dict[str, List[str]]
+    profile_updated_at: Optional[str]
+
+class MaintenanceStatus(TypedDict):
+    enabled: bool
+    idle_for_seconds: float
+    active_requests: int
+    idle_seconds_required: float
+    budget_seconds: float
+    running: Optional[str]  # "<task>@<database>"
+    pass_started_at: Optional[str]
+    pending: List[str]
+    next_pass_in_seconds: Optional[float]
+    last_pass: Dict[str, Any]
+    tasks: Dict[str, Dict[str, Any]]
+
+class RecommendationContext(TypedDict):
+    profiles: Dict[str, str]
+    facts: List[Fact]
+    chat_memories: List[str]
+    partner_notes: List[str]
+
+class Recommendation(TypedDict):
+    recommendation: str
+    context_used: RecommendationContext
+
+class RecommendationItem(TypedDict, total=False):
+    index: int
+    question: str
+    status: str  # ok | not_found | error
+    result: Recommendation
+    detail: str
@@ -0,0 +1,66 @@
+"""
+Shared test setup: every app module reads its settings at import, so the throwaway databases and
+the offline LLM are configured here before anything from app is imported. Each test gets its own
+profile database, so tests never see each other's data.
+"""
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+
+import httpx
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="perfect-partner-tests-")
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'default.db')}"
+os.environ["TENANT_DB_DIR"] = os.path.join(TEST_DIR, "profiles")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY_MS"] = "0"
+os.environ["FAKE_LLM_JITTER_MS"] = "0"
+os.environ["FAKE_LLM_ERROR_RATE"] = "0"
+os.environ["MAINTENANCE_ENABLED"] = "false"
+
+from app.models.database import current_tenant, init_db, open_session  # noqa: E402
+
+init_db()
+
+@pytest.fixture
+def profile():
+    """
+    A fresh profile id, made current for the test
+    """
+    tenant = f"test-{uuid.uuid4().hex[:12]}"
+    token = current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        current_tenant.reset(token)
+
+@pytest.fixture
+def db(profile):
+    session = open_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    # One loop for every request: the worker thread limiters are bound to the loop that created them
+    with asyncio.Runner() as runner:
+        yield runner
+
+@pytest.fixture
+def http(event_loop_runner):
+    """
+    Send one request to an ASGI app in-process: http(app, "GET", "/api/health", headers=...)
+    """
+    async def send(app, method: str, url: str, **kwargs) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.request(method, url, **kwargs)
+
+    return lambda app, method, url, **kwargs: event_loop_runner.run(send(app, method, url, **kwargs))
@@ -0,0 +1,85 @@
+import pytest
+
+from app.main import app
+from app.models.database import ChatMemory, MemoryBand, PartnerNote, Person
+from app.services.memory_service import MemoryService
+
+@pytest.fixture
+def headers(profile):
+    return {"X-Profile-Id": profile}
+
+def statuses(response):
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["index"] for result in body["results"]] == list(range(len(body["results"])))
+    return [result["status"] for result in body["results"]]
+
+def create_notes(http, headers, count):
+    response = http(app, "POST", "/api/notes/batch", headers=headers, json={
+        "notes": [{"title": f"Note {i}", "content": f"Content {i}"} for i in range(count)]
+    })
+    assert statuses(response) == ["created"] * count
+    return [result["id"] for result in response.json()["results"]]
+
+def test_note_batches_report_every_item_in_request_order(http, headers, db):
+    ids = create_notes(http, headers, 3)
+
+    updated = http(app, "PUT", "/api/notes/batch", headers=headers, json={
+        "notes": [{"id": ids[2], "title": "Anniversary"}, {"id": 9999, "title": "Nope"}, {"id": ids[0], "content": "Peonies"}]
+    })
+    assert statuses(updated) == ["updated", "not_found", "updated"]
+    assert updated.json()["summary"] == {"updated": 2, "not_found": 1}
+    notes = {note.id: note for note in db.query(PartnerNote)}
+    assert (notes[ids[2]].title, notes[ids[0]].content, notes[ids[1]].title) == ("Anniversary", "Peonies", "Note 1")
+
+def test_repeated_ids_in_a_batch_delete_count_once(http, headers, db):
+    ids = create_notes(http, headers, 2)
+
+    deleted = http(app, "POST", "/api/notes/batch-delete", headers=headers, json={"ids": [ids[0], 9999, ids[0]]})
+    assert statuses(deleted) == ["deleted", "not_found", "not_found"]
+    assert deleted.json()["summary"] == {"deleted": 1, "not_found": 2}
+    assert [note.id for note in db.query(PartnerNote)] == [ids[1]]
+
+def test_memory_batches_dedupe_validate_and_delete_with_their_index(http, headers, db):
+    person = Person(name="Alice", message_count=0)
+    db.add(person)
+    db.commit()
+    text = "Alice: " + " ".join(f"we should book the cabin by the lake for week {i} of the summer" for i in range(8))
+
+    created = http(app, "POST", "/api/memories/batch", headers=headers, json={"memories": [
+        {"text": text, "person_id": person.id},
+        {"text": "Alice: I really love sushi", "person_id": 9999},
+        {"text": text, "person_id": person.id},
+    ]})
+    assert statuses(created) == ["created", "invalid", "duplicate"]
+    results = created.json()["results"]
+    assert results[2]["id"] == results[0]["id"]
+    memory_id = results[0]["id"]
+
+    updated = http(app, "PUT", "/api/memories/batch", headers=headers, json={"memories": [
+        {"id": memory_id, "text": "Alice: my birthday is on 3/14"}, {"id": 9999, "text": "Gone"},
+    ]})
+    assert statuses(updated) == ["updated", "not_found"]
+    db.expire_all()
+    assert db.get(ChatMemory, memory_id).text == "Alice: my birthday is on 3/14"
+
+    deleted = http(app, "POST", "/api/memories/batch-delete", headers=headers, json={"ids": [memory_id, memory_id]})
+    assert statuses(deleted) == ["deleted", "not_found"]
+    assert db.query(ChatMemory).count() == 0
+    assert db.query(MemoryBand).count() == 0
+
+def test_a_failing_batch_stores_nothing(http, headers, db, monkeypatch):
+    def store_facts(self, *args, **kwargs):
+        raise RuntimeError("fact index unavailable")
+
+    monkeypatch.setattr(MemoryService, "store_facts", store_facts)
+    response = http(app, "POST", "/api/memories/batch", headers=headers, json={"memories": [
+        {"text": "Alice: I really love sushi"}, {"text": "Bob: see you at eight"},
+    ]})
+    assert response.status_code == 500
+    assert db.query(ChatMemory).count() == 0
+    assert db.query(MemoryBand).count() == 0
+
+def test_empty_batches_are_rejected(http, headers):
+    response = http(app, "POST", "/api/notes/batch-delete", headers=headers, json={"ids": []})
+    assert response.status_code == 422
@@ -0,0 +1,48 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils.chat_processor import ChatProcessor
+from benchmarks.run_benchmarks import HttpClient
+from benchmarks.synthetic_chats import FORMATS, generate_chat_export
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_every_generated_format_is_parsed_message_by_message(fmt):
+    processed = ChatProcessor().process_chat(generate_chat_export(fmt, 500, 3, 30, seed=1, media_rate=0.05))
+    messages = processed["messages"]
+    # The iOS export starts with the encryption notice, sent as one more message
+    assert len(messages) + processed["metadata"]["attachments"] == 500 + (fmt == "whatsapp")
+    assert set(messages["sender"]) == {"Alice", "Bob", "Priya"}
+    assert messages["timestamp"].notna().all() and messages["timestamp"].is_monotonic_increasing
+
+class ClosingHandler(BaseHTTPRequestHandler):
+    """
+    Answers as if keeping the connection alive, then closes it, like an expired keep-alive timeout
+    """
+    protocol_version = "HTTP/1.1"
+    connections = []
+
+    def do_GET(self):
+        self.connections.append(self.client_address)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+def test_request_on_a_connection_the_server_closed_is_retried():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ClosingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = HttpClient(server.server_address[1])
+        assert client.get("/first") == 200
+        assert client.get("/second") == 200
+        assert len(ClosingHandler.connections) == 2
+        assert ClosingHandler.connections[0] != ClosingHandler.connections[1]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.bulk_import import ImportManifest, find_exports, run_import
+from app.models.database import ChatFile, ChatMemory
+from app.services import memory_service
+from app.services.memory_service import MemoryService
+from app.utils.chat_processor import ChatProcessor
+from benchmarks.synthetic_chats import generate_chat_export
+
+@pytest.fixture
+def exports(tmp_path):
+    directory = tmp_path / "exports"
+    (directory / "nested").mkdir(parents=True)
+    for seed, name in enumerate(["a.txt", "b.txt", "nested/c.txt"]):
+        (directory / name).write_text(generate_chat_export("whatsapp", 200, 2, 30, seed=seed))
+    (directory / "notes.md").write_text("not an export")
+    return directory
+
+@pytest.fixture(autouse=True)
+def no_llm(monkeypatch):
+    def get_llm_provider():
+        raise AssertionError("bulk import must not set up an LLM provider")
+
+    monkeypatch.setattr(memory_service, "get_llm_provider", get_llm_provider)
+
+def run(exports, manifest_path, batch_size=2):
+    return run_import(find_exports(str(exports)), ImportManifest(str(manifest_path)), workers=1, batch_size=batch_size)
+
+def test_import_stores_every_export_and_records_it(db, exports, tmp_path):
+    totals = run(exports, tmp_path / "manifest.json")
+
+    assert (totals["files"], totals["transcripts"], totals["skipped"], totals["failed"]) == (3, 3, 0, 0)
+    assert totals["bytes"] == sum(path.stat().st_size for path in exports.rglob("*.txt"))
+    assert totals["chunks"] == sum(
+        len(ChatProcessor().process_chat(path.read_text())["chunks"]) for path in exports.rglob("*.txt")
+    )
+    assert db.query(ChatMemory).count() > 0
+    assert sorted(f.filename for f in db.query(ChatFile)) == ["a.txt", "b.txt", "c.txt"]
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert len(manifest["hashes"]) == 3 and len(manifest["paths"]) == 3
+
+def test_rerun_resumes_from_the_manifest(db, exports, tmp_path):
+    run(exports, tmp_path / "manifest.json")
+
+    # Unchanged paths are skipped without being parsed
+    assert run(exports, tmp_path / "manifest.json")["skipped"] == 3
+    # A changed file is parsed again and stored only if its content is new
+    (exports / "a.txt").write_text(generate_chat_export("whatsapp", 200, 2, 30, seed=9))
+    totals = run(exports, tmp_path / "manifest.json")
+    assert (totals["files"], totals["transcripts"], totals["skipped"]) == (1, 1, 2)
+    # Without a manifest, content already in the database is still recognised
+    totals = run(exports, tmp_path / "other-manifest.json")
+    assert (totals["transcripts"], totals["skipped"]) == (0, 3)
+    assert db.query(ChatFile).count() == 4
+
+def test_failed_store_rolls_back_the_batch_and_its_totals(db, exports, tmp_path, monkeypatch):
+    store_processed_chat = MemoryService.store_processed_chat
+    calls = []
+
+    def failing_store(self, processed_data, *args, **kwargs):
+        calls.append(kwargs["filename"])
+        if len(calls) == 3:
+            raise RuntimeError("disk full")
+        return store_processed_chat(self, processed_data, *args, **kwargs)
+
+    monkeypatch.setattr(MemoryService, "store_processed_chat", failing_store)
+    totals = run(exports, tmp_path / "manifest.json", batch_size=10)
+
+    assert (totals["files"], totals["failed"], totals["transcripts"], totals["chunks"], totals["bytes"]) == (0, 3, 0, 0, 0)
+    assert db.query(ChatFile).count() == 0
+    assert json.loads((tmp_path / "manifest.json").read_text()) == {"hashes": {}, "paths": {}}
+
+    # Nothing was recorded, so the next run imports everything
+    monkeypatch.setattr(MemoryService, "store_processed_chat", store_processed_chat)
+    assert run(exports, tmp_path / "manifest.json")["transcripts"] == 3
+    assert db.query(ChatFile).count() == 3
@@ -0,0 +1,114 @@
+import re
+
+from app.utils.chat_processor import (
+    CHARS_PER_TOKEN, SYSTEM_MESSAGES, ChatProcessor, _phrase_trie_pattern, compile_cleaner, estimate_tokens
+)
+
+def test_ios_attachment_lines_with_a_left_to_right_mark_are_stripped():
+    text = (
+        "[1/15/23, 10:30:00 AM] Alice: Dinner at 8?\n"
+        "‎[1/15/23, 10:31:00 AM] Alice: ‎image omitted\n"
+        "‎[1/15/23, 10:31:05 AM] Bob: ‎<attached: 00000012-PHOTO.jpg>\n"
+        "[1/15/23, 10:32:00 AM] Bob: Sounds good\n"
+    )
+    remaining, attachments = ChatProcessor().strip_media_lines(text)
+    assert attachments == 2
+    assert remaining == "[1/15/23, 10:30:00 AM] Alice: Dinner at 8?\n[1/15/23, 10:32:00 AM] Bob: Sounds good\n"
+
+def test_header_after_a_left_to_right_mark_starts_a_new_message():
+    messages = ChatProcessor().parse_messages(
+        "[1/15/23, 10:30:00 AM] Alice: Look\n‎[1/15/23, 10:31:00 AM] Bob: ‎Nice photo\n"
+    )
+    assert messages["sender"].tolist() == ["Alice", "Bob"]
+
+def transcript(lines):
+    return "".join(f"[1/15/23, 10:{minute:02d}:00 AM] {line}\n" for minute, line in enumerate(lines))
+
+def test_facts_in_overlap_lines_are_extracted_once():
+    processor = ChatProcessor(max_chunk_tokens=30, overlap_messages=1)
+    processed = processor.process_chat(transcript([
+        "Alice: How was your day at the office today?",
+        "Bob: Long, but I really love sushi so dinner helps",
+        "Alice: Then let's get dinner at Nobu tonight",
+        "Bob: Perfect, see you at eight then",
+        "Alice: Great, I will book a table for two",
+    ]))
+    chunks = processed["chunks"]
+    assert any(chunk["overlap_messages"] for chunk in chunks)
+    assert sum("I really love sushi" in chunk["text"] for chunk in chunks) == 2
+    likes = [fact for chunk in chunks for fact in chunk["facts"] if fact["fact_type"] == "like"]
+    assert [fact["value"] for fact in likes] == ["sushi"]
+
+def test_message_longer_than_the_budget_is_split_into_pieces():
+    processor = ChatProcessor(max_chunk_tokens=20)
+    words = [f"word{i}" for i in range(60)]
+    chunks = processor.chunk_messages(processor.parse_messages(transcript([
+        "Alice: " + " ".join(words),
+        "Bob: ok",
+    ])))
+    lines = [line for chunk in chunks for line in chunk["text"].split("\n")[chunk["overlap_messages"]:]]
+    assert all(len(line) <= 20 * 4 for line in lines)
+    assert " ".join(line[len("Alice: "):] for line in lines[:-1]) == " ".join(words)
+    assert all(line.startswith("Alice: ") for line in lines[:-1]) and lines[-1] == "Bob: ok"
+
+def test_24_hour_day_first_export_is_parsed_into_bounded_chunks():
+    lines = [
+        f"{15 + i // 200:02d}/01/2023, {i // 60 % 24:02d}:{i % 60:02d} - {'Alice' if i % 3 else 'Bob'}: "
+        f"message {i} about the trip to Lisbon and the dinner we planned"
+        for i in range(400)
+    ]
+    processor = ChatProcessor()
+    processed = processor.process_chat("\n".join(lines))
+    assert len(processed["messages"]) == 400
+    assert set(processed["messages"]["sender"]) == {"Alice", "Bob"}
+    assert processed["metadata"]["date_range"] == {"start": "2023-01-15T00:00:00", "end": "2023-01-16T06:39:00"}
+    assert len(processed["chunks"]) > 1
+    assert all(estimate_tokens(chunk["text"]) <= processor.max_chunk_tokens for chunk in processed["chunks"])
+
+def test_unrecognised_format_is_cut_into_chunks_within_the_budget():
+    text = "\n".join(f"<{i}> alice | we should book the cabin by the lake for the summer" for i in range(300))
+    assert len(text) > 16000
+    processor = ChatProcessor()
+    processed = processor.process_chat(text)
+    assert processed["messages"].empty
+    chunks = processed["chunks"]
+    assert len(chunks) > 1
+    assert all(len(chunk["text"]) <= processor.max_chunk_tokens * CHARS_PER_TOKEN for chunk in chunks)
+    assert " ".join(chunk["text"] for chunk in chunks) == processor.clean_text(text)
+
+def test_imessage_export_is_parsed_and_attachments_skipped():
+    processed = ChatProcessor().process_chat(
+        "Jan 15, 2023  10:30:15 AM\nAlice\nDinner at 8?\n\n"
+        "Jan 15, 2023  10:31:02 AM (Read by them after 2 minutes)\nMe\nSure\nI'll book it\n\n"
+        "Jan 15, 2023  10:32:00 AM\nMe\n/Users/me/Library/Messages/Attachments/ab/12/IMG_0001.jpeg\n"
+    )
+    messages = processed["messages"]
+    assert messages["sender"].tolist() == ["Alice", "Me"]
+    assert messages["timestamp"].astype(str).tolist() == ["2023-01-15 10:30:15", "2023-01-15 10:31:02"]
+    assert processed["metadata"]["attachments"] == 1
+    assert [chunk["text"] for chunk in processed["chunks"]] == ["Alice: Dinner at 8?\nMe: Sure I'll book it"]
+
+def test_phrase_trie_matches_exactly_the_phrases():
+    phrases = [phrase for locale_phrases in SYSTEM_MESSAGES.values() for phrase in locale_phrases]
+    pattern = re.compile(_phrase_trie_pattern(phrases))
+    assert all(pattern.fullmatch(phrase) for phrase in phrases)
+    # Phrases sharing a prefix ("You added", "You left") do not match a mix or a truncation
+    assert not pattern.fullmatch("You ad")
+    assert not pattern.fullmatch("You addleft")
+    assert not pattern.fullmatch("Vous avez")
+
+def test_cleaner_removes_system_messages_of_every_configured_locale():
+    text = (
+        "[1/15/23, 10:30:00 AM] Los mensajes y las llamadas están cifrados de extremo a extremo\n"
+        "15.01.23, 10:31 Du hast die Gruppenbeschreibung geändert\n"
+        "2023-01-15 10:32:00 Vous avez ajouté Bob\n"
+        "2023-01-15 10:33:00 Ana: Você mudou a imagem do grupo?   Ficou   ótima\n"
+    )
+    processor = ChatProcessor(locales=("es", "pt", "fr", "de"))
+    assert processor.clean_text(text) == "Bob Ana: ? Ficou ótima"
+
+    # Only the configured locales are removed
+    english_only = ChatProcessor(locales=("en",)).clean_text(text)
+    assert "Du hast die Gruppenbeschreibung geändert" in english_only
+    assert "10:31" not in english_only
+    assert compile_cleaner(("en",)).sub("", "You left") == ""
@@ -0,0 +1,27 @@
+import httpx
+
+from app.main import app
+from perfect_partner_client import AsyncPerfectPartnerClient
+
+def test_bulk_helpers_split_into_batches_and_keep_input_order(event_loop_runner, profile):
+    requests = []
+
+    async def count_request(request):
+        requests.append(request.url.path)
+
+    async def run():
+        async with AsyncPerfectPartnerClient(
+            "http://testserver", transport=httpx.ASGITransport(app=app), profile_id=profile, batch_size=2
+        ) as client:
+            client._client.event_hooks["request"].append(count_request)
+            notes = await client.create_notes([{"title": f"Note {i}", "content": "..."} for i in range(5)])
+            deleted = await client.delete_notes([notes[4]["id"], 9999, notes[0]["id"], notes[4]["id"]])
+            remaining = await client.list_notes()
+            return notes, deleted, remaining
+
+    notes, deleted, remaining = event_loop_runner.run(run())
+    assert [note["title"] for note in notes] == [f"Note {i}" for i in range(5)]
+    assert deleted == [True, False, True, False]
+    assert sorted(note["title"] for note in remaining) == ["Note 1", "Note 2", "Note 3"]
+    assert requests.count("/api/notes/batch") == 3
+    assert requests.count("/api/notes/batch-delete") == 2
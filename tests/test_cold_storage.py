@@ -0,0 +1,64 @@
+from app.models.database import ChatMemory, open_session
+from app.services import cold_storage
+from app.services.cold_storage import ColdStorage
+from app.services.memory_service import MemoryService
+from benchmarks.synthetic_chats import generate_chat_export
+
+def store_chat(db, seed: int = 0, messages: int = 400):
+    return MemoryService(db).process_and_store_chat(
+        generate_chat_export("whatsapp", messages, 2, 30, seed=seed), filename=f"chat-{seed}.txt"
+    )
+
+def test_edit_committed_during_compaction_is_not_overwritten(db, monkeypatch):
+    store_chat(db)
+    edited_id = db.query(ChatMemory.id).order_by(ChatMemory.id).first()[0]
+    compress_text = cold_storage.compress_text
+    edits = []
+
+    def compress_text_with_concurrent_edit(text, zdict):
+        if not edits:
+            # Another connection rewrites the memory after compaction read it
+            writer = open_session()
+            try:
+                MemoryService(writer).update_memories([{"id": edited_id, "text": "We booked the cabin for June"}])
+            finally:
+                writer.close()
+            edits.append(edited_id)
+        return compress_text(text, zdict)
+
+    monkeypatch.setattr(cold_storage, "compress_text", compress_text_with_concurrent_edit)
+    total = db.query(ChatMemory).count()
+    stats = ColdStorage(db).compact(max_age_days=-1)
+
+    db.expire_all()
+    edited = db.get(ChatMemory, edited_id)
+    assert edits == [edited_id]
+    assert edited.text == "We booked the cabin for June"
+    assert edited.text_dict_id is None and edited.compressed_text is None
+    assert stats["compressed"] == db.query(ChatMemory).filter(ChatMemory.text_dict_id.isnot(None)).count()
+    assert stats["compressed"] == total - 1
+
+def test_compressed_memories_read_back_unchanged(db):
+    store_chat(db, seed=1)
+    originals = dict(db.query(ChatMemory.id, ChatMemory.text))
+    stats = ColdStorage(db).compact(max_age_days=-1)
+    assert stats["compressed"] == len(originals)
+
+    db.expire_all()
+    stored = db.query(ChatMemory).all()
+    assert all(memory.text == "" and memory.compressed_text for memory in stored)
+    service = MemoryService(db)
+    assert {memory.id: memory.text for memory in service.get_memories(limit=len(originals))} == originals
+    assert all(originals[memory.id] == memory.text for memory in service.find_relevant_memories("cabin"))
+
+    # Hydrated texts are not written back uncompressed
+    db.commit()
+    db.expire_all()
+    assert db.query(ChatMemory).filter(ChatMemory.text != "").count() == 0
+
+def test_compress_text_round_trips_with_and_without_a_dictionary():
+    text = "Alice: Happy anniversary ❤️ see you at 8 at Luigi's?\nBob: Can't wait!"
+    zdict = cold_storage.train_dictionary([text, text.upper(), text + " again"])
+    assert zdict
+    assert cold_storage.decompress_text(cold_storage.compress_text(text, zdict), zdict) == text
+    assert cold_storage.decompress_text(cold_storage.compress_text(text, b""), b"") == text
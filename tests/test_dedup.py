@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from app.models.database import ChatFile, ChatMemory, MemoryBand, MemoryReference
+from app.services.memory_service import MemoryService
+from benchmarks.synthetic_chats import generate_chat_export
+
+CHAT = generate_chat_export("whatsapp", 300, 2, 30, seed=7)
+
+def memory_row(text: str) -> dict:
+    return {"chat_file_id": None, "person_id": None, "text": text, "timestamp": datetime.utcnow(),
+            "embedding": None, "relevance_score": None}
+
+def ref_counts(db, chat_file_id: int) -> dict:
+    return dict(db.query(ChatMemory.id, ChatMemory.ref_count).filter(ChatMemory.chat_file_id == chat_file_id))
+
+def test_near_duplicates_in_one_batch_collapse_onto_the_first(db):
+    text = "Alice: " + " ".join(f"we should book the cabin by the lake for week {i} of the summer" for i in range(8))
+    rows = [memory_row(text), memory_row(text.replace("week 7", "week seven")), memory_row("Bob: see you at the station at six")]
+
+    assert MemoryService(db).store_memories(rows) == 1
+    db.commit()
+    assert rows[1]["duplicate_of"] == rows[0]["id"]
+    assert db.get(ChatMemory, rows[0]["id"]).ref_count == 2
+    assert db.get(ChatMemory, rows[2]["id"]).ref_count == 1
+    assert db.query(ChatMemory).count() == 2
+
+def test_reupload_is_referenced_and_survives_deleting_the_original(db):
+    service = MemoryService(db)
+    first = service.process_and_store_chat(CHAT, filename="first.txt")
+    memories = db.query(ChatMemory).count()
+    second = service.process_and_store_chat(CHAT, filename="second.txt")
+
+    # The second file stores no new memories, only references to the first file's ones
+    assert second["duplicate_chunks"] == memories
+    assert db.query(ChatMemory).count() == memories
+    assert set(ref_counts(db, first["chat_file_id"]).values()) == {2}
+    assert db.query(MemoryReference).filter(MemoryReference.chat_file_id == second["chat_file_id"]).count() == memories
+
+    # Deleting the original hands its memories to the copy
+    assert service.delete_chat_file(first["chat_file_id"])
+    db.expire_all()
+    assert db.query(ChatMemory).count() == memories
+    assert set(ref_counts(db, second["chat_file_id"]).values()) == {1}
+    assert db.query(MemoryReference).count() == 0
+
+    # Deleting the last file containing them removes the memories and their index
+    assert service.delete_chat_file(second["chat_file_id"])
+    assert db.query(ChatMemory).count() == 0
+    assert db.query(MemoryBand).count() == 0
+    assert db.query(ChatFile).count() == 0
+
+def test_deleting_the_copy_releases_its_references(db):
+    service = MemoryService(db)
+    first = service.process_and_store_chat(CHAT, filename="first.txt")
+    second = service.process_and_store_chat(CHAT, filename="second.txt")
+
+    assert service.delete_chat_file(second["chat_file_id"])
+    db.expire_all()
+    assert set(ref_counts(db, first["chat_file_id"]).values()) == {1}
+    assert db.query(MemoryReference).count() == 0
+    assert db.query(MemoryBand.memory_id).distinct().count() == db.query(ChatMemory).count()
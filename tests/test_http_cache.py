@@ -0,0 +1,37 @@
+import uuid
+
+from app.main import app
+
+def new_profile() -> dict:
+    return {"X-Profile-Id": f"test-{uuid.uuid4().hex[:12]}"}
+
+def test_unchanged_data_is_answered_with_304(http):
+    profile = new_profile()
+    first = http(app, "GET", "/api/notes", headers=profile)
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith(f'"{profile["X-Profile-Id"]}-')
+
+    again = http(app, "GET", "/api/notes", headers={**profile, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert again.content == b""
+
+    since = http(app, "GET", "/api/notes", headers={**profile, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+
+def test_a_write_changes_the_etag_of_its_profile_only(http):
+    writer, reader = new_profile(), new_profile()
+    writer_tag = http(app, "GET", "/api/notes", headers=writer).headers["ETag"]
+    reader_tag = http(app, "GET", "/api/notes", headers=reader).headers["ETag"]
+    # Both profiles start at the same data version; the tag must still tell them apart
+    assert writer_tag != reader_tag
+    assert http(app, "GET", "/api/notes", headers={**reader, "If-None-Match": writer_tag}).status_code == 200
+
+    created = http(app, "POST", "/api/notes", headers=writer, json={"title": "Anniversary", "content": "Dinner at eight"})
+    assert created.status_code == 200
+
+    changed = http(app, "GET", "/api/notes", headers={**writer, "If-None-Match": writer_tag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != writer_tag
+    assert [note["title"] for note in changed.json()] == ["Anniversary"]
+    assert http(app, "GET", "/api/notes", headers={**reader, "If-None-Match": reader_tag}).status_code == 304
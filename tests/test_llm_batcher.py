@@ -0,0 +1,66 @@
+import json
+import re
+import threading
+
+from app.services.llm_batcher import LLMBatcher
+from app.services.llm_provider import LLMError, LLMProvider
+
+ITEM_RE = re.compile(r'^### Item (\d+)\n(.*?)(?=\n\n### Item |\Z)', re.MULTILINE | re.DOTALL)
+
+class ScriptedLLM(LLMProvider):
+    """
+    Answers each item with its text upper-cased, except items listed in `skip` (left out of the
+    answer as many times as given) and batches containing an item in `fail` (the call raises)
+    """
+    def __init__(self, skip=None, fail=None):
+        self.skip = dict(skip or {})
+        self.fail = dict(fail or {})
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, task: str = "generate") -> str:
+        assert task == "batch:shout"
+        items = ITEM_RE.findall(prompt)
+        with self._lock:
+            self.batches.append([text for _, text in items])
+            for _, text in items:
+                if self.fail.get(text, 0) > 0:
+                    self.fail[text] -= 1
+                    raise LLMError("upstream timeout")
+            answers = []
+            for number, text in items:
+                if self.skip.get(text, 0) > 0:
+                    self.skip[text] -= 1
+                    continue
+                answers.append({"id": int(number), "result": text.upper()})
+        # Stray prose and malformed entries around the JSON are tolerated
+        return "Here you go:\n" + json.dumps(answers + [{"id": 99, "result": "out of range"}, "noise"])
+
+def run(llm, items, **kwargs):
+    batcher = LLMBatcher("shout", "Upper-case each item.", llm=llm, concurrency=1, **kwargs)
+    return batcher, batcher.run(items)
+
+def test_results_follow_the_input_order_across_batches():
+    items = [f"item {i}" for i in range(10)]
+    llm = ScriptedLLM()
+    batcher, results = run(llm, items, batch_size=4)
+    assert results == [item.upper() for item in items]
+    assert [len(batch) for batch in llm.batches] == [4, 4, 2]
+    assert batcher.stats["calls"] == 3 and batcher.stats["retried"] == 0 and batcher.stats["failed"] == 0
+
+def test_missing_items_are_retried_in_halved_batches():
+    items = [f"item {i}" for i in range(8)]
+    llm = ScriptedLLM(skip={"item 1": 1, "item 2": 1, "item 3": 1, "item 6": 2})
+    batcher, results = run(llm, items, batch_size=8)
+    assert results == [item.upper() for item in items]
+    # 4 items missing from the first answer go again in batches of 4, the one still missing in batches of 2
+    assert llm.batches == [items, ["item 1", "item 2", "item 3", "item 6"], ["item 6"]]
+    assert batcher.stats == {**batcher.stats, "calls": 3, "retried": 5, "failed": 0}
+
+def test_failed_batches_are_retried_and_items_that_keep_failing_give_none():
+    items = [f"item {i}" for i in range(4)]
+    llm = ScriptedLLM(fail={"item 0": 1}, skip={"item 3": 10})
+    batcher, results = run(llm, items, batch_size=4, max_retries=2)
+    assert results == ["ITEM 0", "ITEM 1", "ITEM 2", None]
+    assert [len(batch) for batch in llm.batches] == [4, 2, 2, 1]
+    assert batcher.stats["failed"] == 1
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from app.services import llm_provider
+from app.services.llm_provider import FakeLLMProvider, LLMError, get_llm_provider, set_llm_provider
+
+CHAT = (
+    "2024-03-01 18:02:11 Alice: my birthday is on 12/04, don't forget\n"
+    "2024-03-01 18:03:40 Bob: never! dinner at Luigi's?\n"
+    "2024-03-01 18:05:02 Alice: I really love their gnocchi\n"
+)
+
+def test_people_are_the_senders_in_order_of_appearance():
+    people = json.loads(FakeLLMProvider().generate(f"Who is chatting?\n{CHAT}", task="extract_people"))
+    assert people == ["Alice", "Bob"]
+
+def test_batched_fact_extraction_answers_every_item_by_id():
+    prompt = (
+        "Extract facts.\n"
+        "### Item 0\nAlice: my birthday is on 12/04\n"
+        "### Item 1\nBob: see you soon\n"
+    )
+    answers = json.loads(FakeLLMProvider().generate(prompt, task="batch:extract_facts"))
+    assert [answer["id"] for answer in answers] == [0, 1]
+    assert answers[0]["result"] == [{"type": "date", "label": "birthday", "value": "12/04", "sender": "Alice"}]
+    assert answers[1]["result"] == []
+
+def test_profile_summary_merges_into_the_current_profile():
+    prompt = (
+        'Current profile JSON: {"interests": ["hiking"]}\n'
+        "New messages:\nAlice: I really love their gnocchi. Not a fan of olives.\n"
+    )
+    profile = json.loads(FakeLLMProvider().generate(prompt, task="profile_summary"))
+    assert profile["interests"] == ["hiking", "their gnocchi"]
+    assert profile["dislikes"] == ["olives"]
+
+def test_recommendations_are_deterministic_and_cite_the_context():
+    prompt = "Context:\n- Alice loves gnocchi\n- Bob booked Luigi's\nQuestion: where should we eat?"
+    first, second = FakeLLMProvider().generate(prompt), FakeLLMProvider().generate(prompt)
+    assert first == second
+    assert first.startswith('Recommendation for "where should we eat?"')
+    assert "Alice loves gnocchi; Bob booked Luigi's" in first
+
+def test_error_injection_follows_the_rate():
+    with pytest.raises(LLMError, match="extract_people"):
+        FakeLLMProvider(error_rate=1).generate(CHAT, task="extract_people")
+    assert FakeLLMProvider(error_rate=0).generate(CHAT, task="extract_people")
+
+def test_provider_is_selected_by_env_and_can_be_overridden(monkeypatch):
+    monkeypatch.setattr(llm_provider, "_provider", None)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("FAKE_LLM_ERROR_RATE", "0.25")
+    provider = get_llm_provider()
+    assert isinstance(provider, FakeLLMProvider)
+    assert provider.error_rate == 0.25
+    assert get_llm_provider() is provider
+
+    replacement = FakeLLMProvider()
+    set_llm_provider(replacement)
+    assert get_llm_provider() is replacement
+
+    monkeypatch.setattr(llm_provider, "_provider", None)
+    monkeypatch.setenv("LLM_PROVIDER", "gpt")
+    with pytest.raises(ValueError, match="Unknown LLM_PROVIDER"):
+        get_llm_provider()
@@ -0,0 +1,68 @@
+import asyncio
+
+import time
+
+from app.services.cold_storage import compact_lock
+from app.services.maintenance import ACTIVITY, ActivityMiddleware, compact_cold_storage
+
+def call(app, path="/api/recommendations"):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({"type": "http", "path": path, "method": "GET", "headers": []}, receive, send))
+    return sent
+
+def test_streamed_request_counts_as_active_until_the_last_chunk():
+    seen = []
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"one\n", b"two\n"):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            seen.append(ACTIVITY.active)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        seen.append(ACTIVITY.active)
+
+    before = ACTIVITY.active
+    call(ActivityMiddleware(streaming_app))
+    assert seen == [before + 1, before + 1, before]
+    assert ACTIVITY.active == before
+
+def test_failed_and_passive_requests_leave_no_activity():
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    async def health_app(scope, receive, send):
+        assert ACTIVITY.active == before
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    before = ACTIVITY.active
+    try:
+        call(ActivityMiddleware(failing_app))
+    except RuntimeError:
+        pass
+    call(ActivityMiddleware(health_app), path="/api/health")
+    assert ACTIVITY.active == before
+
+def test_tracked_background_task_counts_while_running():
+    before = ACTIVITY.active
+    seen = []
+    ACTIVITY.tracked(lambda: seen.append(ACTIVITY.active))()
+    assert seen == [before + 1]
+    assert ACTIVITY.active == before
+    assert ACTIVITY.idle_for() < 1
+
+def test_cold_storage_step_skips_while_a_compaction_pass_runs(profile):
+    lock = compact_lock(profile)
+    with lock:
+        done, result = compact_cold_storage(time.monotonic() + 5)
+    assert done and "skipped" in result
+    done, result = compact_cold_storage(time.monotonic() + 5)
+    assert done and result["compressed"] == 0
+    assert not lock.locked()
@@ -0,0 +1,21 @@
+from app.models.database import ChatFile, ChatMemory, Person
+from app.services.memory_service import MemoryService
+
+def test_people_fall_back_to_parsed_senders(db, monkeypatch):
+    monkeypatch.setattr(MemoryService, "extract_people_with_llm", lambda self, text: [])
+    MemoryService(db).process_and_store_chat(
+        "15/01/2023, 17:02 - Alice: Dinner at 8?\n"
+        "15/01/2023, 17:05 - Bob: Sounds good\n"
+        "Note: bring the wine\n"
+        "15/01/2023, 17:06 - Alice: Great\n"
+    )
+    people = {person.name: person.message_count for person in db.query(Person)}
+    assert people == {"Alice": 2, "Bob": 1}
+    assert db.query(ChatFile).one().participants == '["Alice", "Bob"]'
+
+def test_unparsed_export_creates_no_people(db, monkeypatch):
+    monkeypatch.setattr(MemoryService, "extract_people_with_llm", lambda self, text: [])
+    MemoryService(db).process_and_store_chat("Alice said: dinner at 8?\nBob replied: sounds good\n")
+    assert db.query(Person).count() == 0
+    memories = db.query(ChatMemory).all()
+    assert memories and all(memory.person_id is None for memory in memories)
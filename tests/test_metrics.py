@@ -0,0 +1,53 @@
+import uuid
+
+import app.main as main
+from app.main import app
+from app.utils.metrics import Histogram, server_timing_header, start_request_timing, timed_stage
+from benchmarks.synthetic_chats import generate_chat_export
+
+def new_profile() -> dict:
+    return {"X-Profile-Id": f"test-{uuid.uuid4().hex[:12]}"}
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(("parse",), value)
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="parse"} 3' in lines
+    assert 'demo_seconds_sum{stage="parse"} 5.55' in lines
+
+def test_timed_stage_records_into_the_current_request():
+    timings = start_request_timing()
+    with timed_stage("parse"):
+        pass
+
+    @timed_stage("store")
+    def store():
+        return "stored"
+
+    assert store() == "stored"
+    assert [stage for stage, _ in timings] == ["parse", "store"]
+    header = server_timing_header([("parse", 0.0125)], 0.05)
+    assert header == "parse;dur=12.5, total;dur=50.0"
+
+def test_metrics_endpoint_reports_routes_and_stages(http, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_TIMING_HEADER", True)
+    chat = generate_chat_export("whatsapp", 50, 2, 10, seed=3)
+    uploaded = http(app, "POST", "/api/upload-chat", headers=new_profile(),
+                    files={"file": ("chat.txt", chat.encode())})
+    assert uploaded.status_code == 200
+    stages = [part.split(";")[0] for part in uploaded.headers["Server-Timing"].split(", ")]
+    assert "process_chat" in stages
+    assert stages[-1] == "total"
+
+    body = http(app, "GET", "/api/metrics").text
+    assert 'perfect_partner_request_duration_seconds_count{method="POST",route="/api/upload-chat",status="200"}' in body
+    assert 'perfect_partner_stage_duration_seconds_bucket{stage="process_chat",le="+Inf"}' in body
+
+def test_timing_header_is_off_by_default(http, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_TIMING_HEADER", False)
+    assert "Server-Timing" not in http(app, "GET", "/api/health").headers
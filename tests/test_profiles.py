@@ -0,0 +1,58 @@
+import contextvars
+import threading
+
+from app.services import profile_service
+from app.services.profile_service import ProfileService, _refresh_state, refresh_stale_profiles
+
+def count_passes(monkeypatch, during_pass=None):
+    passes = []
+
+    def refresh_profiles(self):
+        passes.append(len(passes))
+        if during_pass and len(passes) == 1:
+            during_pass()
+        return 1
+
+    monkeypatch.setattr(ProfileService, "refresh_profiles", refresh_profiles)
+    return passes
+
+def in_thread(func):
+    # Threads do not inherit context variables; run in the test's profile
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(func,))
+    thread.start()
+    thread.join()
+
+def test_requests_during_a_pass_are_coalesced_into_one_more_pass(profile, monkeypatch):
+    results = []
+    passes = count_passes(monkeypatch, during_pass=lambda: [
+        in_thread(lambda: results.append(refresh_stale_profiles())) for _ in range(3)
+    ])
+    assert refresh_stale_profiles() == 2
+    assert passes == [0, 1]
+    assert results == [0, 0, 0]
+
+def test_request_made_while_the_lock_is_released_is_not_lost(profile, monkeypatch):
+    passes = count_passes(monkeypatch)
+    real_lock, requested = _refresh_state(profile)
+
+    class RacingLock:
+        """
+        Lets another caller request a refresh after the running pass saw no request,
+        but before it released the lock
+        """
+        def __init__(self):
+            self.raced = False
+
+        def acquire(self, blocking=True):
+            return real_lock.acquire(blocking)
+
+        def release(self):
+            if not self.raced:
+                self.raced = True
+                in_thread(refresh_stale_profiles)
+            real_lock.release()
+
+    monkeypatch.setitem(profile_service._refresh_states, profile, (RacingLock(), requested))
+    assert refresh_stale_profiles() == 2
+    assert passes == [0, 1]
+    assert not requested.is_set()
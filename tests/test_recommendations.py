@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app import main
+from app.main import app
+from app.services.memory_service import MemoryService
+
+@pytest.fixture
+def headers(profile):
+    return {"X-Profile-Id": profile}
+
+def ndjson(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def ask(http, headers, questions):
+    return ndjson(http(app, "POST", "/api/get-recommendations", headers=headers, json={"questions": questions}))
+
+def test_every_question_is_answered_not_found_without_data(http, headers):
+    lines = ask(http, headers, ["Gift ideas?", "Date night?"])
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert {line["status"] for line in lines} == {"not_found"}
+
+def test_results_stream_in_completion_order_with_per_item_status(http, headers, monkeypatch):
+    http(app, "POST", "/api/notes", headers=headers, json={"title": "Flowers", "content": "Loves peonies"})
+    delays = {"slow": 0.3, "fast": 0.0, "boom": 0.1}
+
+    def generate_recommendation(self, question, **context):
+        time.sleep(delays[question])
+        if question == "boom":
+            raise RuntimeError("model overloaded")
+        return {"recommendation": f"Answer to {question}", "context_used": {"notes": len(context["notes"])}}
+
+    monkeypatch.setattr(MemoryService, "generate_recommendation", generate_recommendation)
+    lines = ask(http, headers, ["slow", "fast", "boom"])
+
+    assert [line["index"] for line in lines] == [1, 2, 0]
+    assert [line["question"] for line in lines] == ["fast", "boom", "slow"]
+    assert [line["status"] for line in lines] == ["ok", "error", "ok"]
+    assert lines[0]["result"] == {"recommendation": "Answer to fast", "context_used": {"notes": 1}}
+    assert lines[1]["detail"] == "model overloaded"
+
+def test_retrieval_is_shared_and_generations_are_bounded(http, headers, monkeypatch):
+    http(app, "POST", "/api/notes", headers=headers, json={"title": "Flowers", "content": "Loves peonies"})
+    monkeypatch.setattr(main, "RECOMMENDATION_CONCURRENCY", 2)
+    retrievals = []
+    running, peak = [0], [0]
+    lock = threading.Lock()
+    find_relevant_notes = MemoryService.find_relevant_notes
+
+    def counted_notes(self, query, limit=3):
+        retrievals.append(query)
+        return find_relevant_notes(self, query, limit)
+
+    def generate_recommendation(self, question, **context):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {"recommendation": question, "context_used": {}}
+
+    monkeypatch.setattr(MemoryService, "find_relevant_notes", counted_notes)
+    monkeypatch.setattr(MemoryService, "generate_recommendation", generate_recommendation)
+    lines = ask(http, headers, [f"Question {i}" for i in range(6)])
+
+    assert sorted(line["index"] for line in lines) == list(range(6))
+    assert {line["status"] for line in lines} == {"ok"}
+    assert len(retrievals) == 1
+    assert peak[0] == 2
@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import json
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+from app.main import app
+from app.utils import responses
+from app.utils.responses import CompressionMiddleware, FastJSONResponse, choose_encoding
+
+LARGE = [{"id": i, "text": f"Alice: dinner at eight on day {i}"} for i in range(200)]
+
+def compressed_app() -> FastAPI:
+    small_app = FastAPI()
+    small_app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @small_app.get("/large")
+    async def large():
+        return FastJSONResponse(LARGE, headers={"ETag": '"v1"'})
+
+    @small_app.get("/small")
+    async def small():
+        return FastJSONResponse({"ok": True}, headers={"ETag": '"v1"'})
+
+    @small_app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    @small_app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield json.dumps({"index": i}).encode() + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return small_app
+
+def call(asgi_app, path: str, accept_encoding: str = None):
+    """
+    Raw ASGI call returning the response start message and the body messages as sent
+    """
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": headers, "http_version": "1.1", "scheme": "http", "server": ("testserver", 80),
+             "client": ("test", 1), "root_path": ""}
+    sent = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Streaming responses listen for a disconnect until they are done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    return {k.decode().lower(): v.decode() for k, v in start["headers"]}, [m for m in sent if m["type"] == "http.response.body"]
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", "gzip"),
+    ("", None),
+])
+def test_gzip_is_negotiated_from_accept_encoding(accept_encoding, expected, monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert choose_encoding(accept_encoding) == expected
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+    assert choose_encoding("gzip, br") == "br"
+    headers, bodies = call(compressed_app(), "/large", "gzip, br")
+    assert headers["content-encoding"] == "br"
+    import brotli
+    assert json.loads(brotli.decompress(b"".join(m["body"] for m in bodies))) == LARGE
+
+def test_large_json_is_gzipped_with_a_weak_etag():
+    headers, bodies = call(compressed_app(), "/large", "gzip")
+    body = b"".join(m["body"] for m in bodies)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"v1"'
+    assert int(headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == LARGE
+
+def test_small_uncompressible_or_unrequested_responses_pass_through():
+    headers, bodies = call(compressed_app(), "/small", "gzip")
+    assert "content-encoding" not in headers and headers["etag"] == '"v1"'
+    headers, _ = call(compressed_app(), "/image", "gzip")
+    assert "content-encoding" not in headers
+    headers, bodies = call(compressed_app(), "/large")
+    assert "content-encoding" not in headers and json.loads(b"".join(m["body"] for m in bodies)) == LARGE
+
+def test_streamed_lines_are_flushed_one_by_one():
+    headers, bodies = call(compressed_app(), "/stream", "gzip")
+    assert headers["content-encoding"] == "gzip" and "content-length" not in headers
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every line can be decoded as soon as its own body message arrives
+    lines = [decompressor.decompress(message["body"]) for message in bodies]
+    assert lines[:3] == [json.dumps({"index": i}).encode() + b"\n" for i in range(3)]
+    assert decompressor.eof
+
+def test_weak_etag_of_a_compressed_response_still_revalidates(http, profile):
+    headers = {"X-Profile-Id": profile}
+    http(app, "POST", "/api/notes/batch", headers=headers, json={
+        "notes": [{"title": f"Note {i}", "content": "Peonies and dinner at eight"} for i in range(50)]
+    })
+    first = http(app, "GET", "/api/notes", headers={**headers, "Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].startswith("W/")
+    assert len(first.json()) == 50
+
+    again = http(app, "GET", "/api/notes", headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+def test_fast_json_serializes_datetimes_and_numpy():
+    body = FastJSONResponse({"at": datetime(2023, 1, 15, 10, 30), "scores": np.array([1, 2]), 3: "key"}).body
+    assert json.loads(body) == {"at": "2023-01-15T10:30:00", "scores": [1, 2], "3": "key"}
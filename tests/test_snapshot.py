@@ -0,0 +1,94 @@
+import os
+
+import pytest
+from sqlalchemy import func, select
+
+from app import snapshot
+from app.models.database import ChatFile, ChatMemory, MemoryBand, current_tenant, open_session
+from app.services.cold_storage import ColdStorage
+from app.services.memory_service import MemoryService
+from benchmarks.synthetic_chats import generate_chat_export
+
+def store_chats(db, count: int):
+    service = MemoryService(db)
+    return [
+        service.process_and_store_chat(generate_chat_export("whatsapp", 300, 2, 30, seed=seed), filename=f"chat-{seed}.txt")
+        for seed in range(count)
+    ]
+
+def table_rows(db, model, skip=()):
+    table = model.__table__
+    columns = [column for column in table.c if column.name not in skip]
+    return [dict(row._mapping) for row in db.execute(select(*columns).order_by(table.c.id))]
+
+def test_export_is_consistent_while_another_connection_commits(db, tmp_path, monkeypatch):
+    store_chats(db, 2)
+    files_before = db.query(func.count(ChatFile.id)).scalar()
+    memories_before = db.query(func.count(ChatMemory.id)).scalar()
+    deleted_file = db.query(func.min(ChatFile.id)).scalar()
+    monkeypatch.setattr(snapshot, "SNAPSHOT_ROW_GROUP", 5)
+
+    row_groups = snapshot.row_groups
+    committed = []
+
+    def row_groups_with_concurrent_delete(session, table, columns):
+        for rows in row_groups(session, table, columns):
+            yield rows
+            if not committed:
+                # Another connection deletes a chat file (and its memories) mid-export
+                writer = open_session()
+                try:
+                    assert MemoryService(writer).delete_chat_file(deleted_file)
+                finally:
+                    writer.close()
+                committed.append(True)
+
+    monkeypatch.setattr(snapshot, "row_groups", row_groups_with_concurrent_delete)
+    counts = snapshot.export_snapshot(db, str(tmp_path / "snap"))
+
+    assert committed
+    assert counts["chat_files"] == files_before
+    assert counts["chat_memories"] == memories_before
+    assert db.query(func.count(ChatMemory.id)).scalar() < memories_before
+    # Only the parquet files and the manifest are left behind
+    assert sorted(os.listdir(tmp_path / "snap")) == sorted(
+        [f"{model.__tablename__}.parquet" for model, _ in snapshot.SNAPSHOT_TABLES] + [snapshot.SNAPSHOT_MANIFEST]
+    )
+
+def test_restore_reproduces_every_table_and_the_dedup_index(db, tmp_path):
+    store_chats(db, 2)
+    # A re-upload adds duplicate references, compaction makes the memories cold
+    MemoryService(db).process_and_store_chat(generate_chat_export("whatsapp", 300, 2, 30, seed=0), filename="again.txt")
+    MemoryService(db).add_partner_note(title="Anniversary", content="Dinner at eight", category="dates")
+    ColdStorage(db).compact(max_age_days=-1)
+    expected = {model: table_rows(db, model, skip) for model, skip in snapshot.SNAPSHOT_TABLES}
+    texts = {memory.id: memory.text for memory in MemoryService(db).get_memories(limit=10000)}
+    assert all(row["text"] == "" for row in expected[ChatMemory])
+    # Exported decompressed: the restored memories are hot, with the original texts
+    expected[ChatMemory] = [{**row, "text": texts[row["id"]]} for row in expected[ChatMemory]]
+    bands = set(db.query(MemoryBand.memory_id, MemoryBand.bucket))
+    counts = snapshot.export_snapshot(db, str(tmp_path / "snap"))
+
+    token = current_tenant.set(f"{current_tenant.get()}-restored")
+    restored = open_session()
+    try:
+        assert snapshot.import_snapshot(restored, str(tmp_path / "snap")) == {**counts, MemoryBand.__tablename__: len(texts)}
+        for model, skip in snapshot.SNAPSHOT_TABLES:
+            assert table_rows(restored, model, skip) == expected[model], model.__tablename__
+        assert restored.query(ChatMemory).filter(ChatMemory.text_dict_id.isnot(None)).count() == 0
+        assert set(restored.query(MemoryBand.memory_id, MemoryBand.bucket)) == bands
+
+        # The rebuilt index still collapses a re-upload onto the restored memories
+        again = MemoryService(restored).process_and_store_chat(
+            generate_chat_export("whatsapp", 300, 2, 30, seed=1), filename="restored-again.txt"
+        )
+        assert again["duplicate_chunks"] > 0
+        assert restored.query(func.count(ChatMemory.id)).scalar() == len(texts)
+
+        with pytest.raises(ValueError):
+            snapshot.import_snapshot(restored, str(tmp_path / "snap"))
+        assert snapshot.import_snapshot(restored, str(tmp_path / "snap"), replace=True) == {**counts, MemoryBand.__tablename__: len(texts)}
+        assert table_rows(restored, ChatFile) == expected[ChatFile]
+    finally:
+        restored.close()
+        current_tenant.reset(token)
@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+from sqlalchemy import text
+
+from app.main import app
+from app.models import database
+from app.models.database import PartnerNote, TenantEngines, current_tenant, open_session
+
+def new_profile() -> dict:
+    return {"X-Profile-Id": f"test-{uuid.uuid4().hex[:12]}"}
+
+def test_requests_are_served_from_their_profile_database(http):
+    alice, bob = new_profile(), new_profile()
+    created = http(app, "POST", "/api/notes", headers=alice, json={"title": "Anniversary", "content": "Dinner at eight"})
+    assert created.status_code == 200
+
+    assert [note["title"] for note in http(app, "GET", "/api/notes", headers=alice).json()] == ["Anniversary"]
+    assert http(app, "GET", "/api/notes", headers=bob).json() == []
+    assert "Anniversary" not in [note["title"] for note in http(app, "GET", "/api/notes").json()]
+
+    token = current_tenant.set(alice["X-Profile-Id"])
+    try:
+        db = open_session()
+        try:
+            assert [note.title for note in db.query(PartnerNote)] == ["Anniversary"]
+        finally:
+            db.close()
+    finally:
+        current_tenant.reset(token)
+
+def test_malformed_profile_ids_are_rejected(http):
+    response = http(app, "GET", "/api/notes", headers={"X-Profile-Id": "../default"})
+    assert response.status_code == 400
+
+def test_least_recently_used_engines_are_evicted_and_disposed(tmp_path, monkeypatch):
+    engines = TenantEngines(directory=str(tmp_path), capacity=2)
+    disposed = []
+    first = engines.get("a")
+    monkeypatch.setattr(first, "dispose", lambda *args, **kwargs: disposed.append("a"))
+    with first.begin() as conn:
+        conn.execute(text("INSERT INTO partner_notes (title, content) VALUES ('Kept', 'on disk')"))
+    engines.get("b")
+    assert engines.get("a") is first  # a is used again, so b is now the oldest
+    engines.get("c")
+    assert engines.open_tenants() == ["a", "c"]
+    assert disposed == []
+
+    engines.get("d")
+    assert engines.open_tenants() == ["c", "d"]
+    assert disposed == ["a"]
+    # The database outlives its engine: reopening the profile finds its data
+    reopened = engines.get("a")
+    assert reopened is not first
+    with reopened.connect() as conn:
+        assert conn.execute(text("SELECT title FROM partner_notes")).scalar() == "Kept"
+
+def test_schema_creation_does_not_block_other_profiles(tmp_path, monkeypatch):
+    engines = TenantEngines(directory=str(tmp_path), capacity=10)
+    create_schema = database.create_schema
+    started, release = threading.Event(), threading.Event()
+    created = []
+
+    def slow_create_schema(bind):
+        created.append(bind.url.database)
+        if bind.url.database.endswith("slow.db"):
+            started.set()
+            assert release.wait(10)
+        create_schema(bind)
+
+    monkeypatch.setattr(database, "create_schema", slow_create_schema)
+    results = []
+    slow = [threading.Thread(target=lambda: results.append(engines.get("slow"))) for _ in range(2)]
+    for thread in slow:
+        thread.start()
+    assert started.wait(10)
+
+    # Another profile is created and served while the slow one is still building its schema
+    assert engines.get("fast") is engines.get("fast")
+    assert engines.open_tenants() == ["fast"]
+
+    release.set()
+    for thread in slow:
+        thread.join(10)
+    assert len(results) == 2 and results[0] is results[1]
+    assert sum(path.endswith("slow.db") for path in created) == 1
+    assert engines.open_tenants() == ["fast", "slow"]
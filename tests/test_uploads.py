@@ -0,0 +1,77 @@
+import io
+import uuid
+from functools import partial
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+
+import app.main as main
+from app.utils.uploads import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware, UploadTooLarge, spool_file, spool_upload
+
+LIMIT = 1000
+
+def upload_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=LIMIT)
+    received = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(file.filename)
+        with await spool_upload(file, max_bytes=LIMIT) as spooled:
+            return {"size": spooled.size, "hash": spooled.content_hash}
+
+    app.state.received = received
+    return app
+
+def multipart_body(size: int):
+    boundary = "boundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"chat.txt\"\r\n"
+        f"Content-Type: text/plain\r\n\r\n"
+    ).encode() + b"a" * size + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+def test_upload_within_the_limit_is_spooled_off_the_event_loop(http):
+    response = http(upload_app(), "POST", "/upload", files={"file": ("chat.txt", b"hello " * 100)})
+    assert response.status_code == 200
+    assert response.json()["size"] == 600
+
+def test_declared_oversized_upload_is_rejected_before_the_route_runs(http):
+    app = upload_app()
+    body, headers = multipart_body(LIMIT + MULTIPART_OVERHEAD_BYTES + 1)
+    response = http(app, "POST", "/upload", content=body, headers=headers)
+    assert response.status_code == 413
+    assert app.state.received == []
+
+def test_chunked_oversized_upload_is_rejected_while_it_arrives(http):
+    app = upload_app()
+    body, headers = multipart_body(LIMIT + MULTIPART_OVERHEAD_BYTES + 1)
+
+    async def chunks():
+        # A streamed body is sent without Content-Length
+        for i in range(0, len(body), 4096):
+            yield body[i:i + 4096]
+
+    response = http(app, "POST", "/upload", content=chunks(), headers=headers)
+    assert response.status_code == 413
+    assert app.state.received == []
+
+def test_spool_file_enforces_the_limit_and_validates_utf8():
+    with pytest.raises(UploadTooLarge):
+        spool_file(io.BytesIO(b"a" * (LIMIT + 1)), "chat.txt", max_bytes=LIMIT, block_size=100)
+    with pytest.raises(UnicodeDecodeError):
+        spool_file(io.BytesIO(b"caf\xe9"), "chat.txt")
+
+def test_upload_chat_answers_413_past_the_limit(http, monkeypatch):
+    monkeypatch.setattr(main, "spool_upload", partial(spool_upload, max_bytes=LIMIT))
+    headers = {"X-Profile-Id": f"test-{uuid.uuid4().hex[:12]}"}
+    line = b"[1/15/23, 10:30:00 AM] Alice: Dinner at 8?\n"
+
+    within = http(main.app, "POST", "/api/upload-chat", headers=headers, files={"file": ("chat.txt", line * 10)})
+    assert within.status_code == 200
+
+    over = http(main.app, "POST", "/api/upload-chat", headers=headers, files={"file": ("chat.txt", line * 100)})
+    assert over.status_code == 413
+    assert over.json()["detail"] == f"Upload exceeds the {LIMIT} byte limit"
+    assert len(http(main.app, "GET", "/api/chat-files", headers=headers).json()) == 1